@@ -1,9 +1,12 @@
 import streamlit as st
+from timing import start_run, show_timings
 
 st.set_page_config(
     page_title="TEG STATS",
     #page_icon="👋",
 )
+# Also builds the cached datasets in the background the first time any page is loaded on this server
+start_run('Home')
 
 st.write("# The El Golfo stats & records")
 
@@ -46,4 +49,6 @@ st.markdown(
         - Data update
    
 """
-)
\ No newline at end of file
+)
+
+show_timings()
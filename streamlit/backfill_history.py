@@ -0,0 +1,337 @@
+"""
+Rebuild the hole-level score history from the raw historical files in data/.
+
+Discovers the historical sources (wide CSVs such as teg10-14-data.csv and the Excel workbooks), streams their
+rows (workbooks in read-only mode), and processes each TEG in a process pool through the same
+reshape_round_data -> process_round_for_all_scores path used for new rounds.
+
+The combined long-format history (teg-all-data-long-XLworking.xlsx) is read first, as it was kept up to date
+while the per-TEG working files were not (they disagree with the published scores for TEGs 11 and 14). The
+per-TEG wide files are then read only for TEGs the history does not cover: a file whose TEG is covered is not
+read past its header, and rows of covered TEGs are dropped as they stream past.
+
+Usage:
+    python backfill_history.py [--data-dir DIR] [--output FILE] [--workers N] [--update-all-data]
+
+By default the result is written to data/all-scores-backfill.csv so it can be compared with all-scores.csv
+before anything is replaced.
+"""
+import os
+import re
+import csv
+import time
+import argparse
+import fnmatch
+import itertools
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import AbstractSet, Dict, List, NamedTuple, Optional, Tuple
+import openpyxl
+import pandas as pd
+from utils import (
+    BASE_DIR,
+    reshape_round_data,
+    process_round_for_all_scores,
+    load_and_prepare_handicap_data,
+    update_all_data
+)
+
+# Configure Logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Constants
+DATA_DIR = os.path.join(BASE_DIR, "../data")
+DEFAULT_OUTPUT = "all-scores-backfill.csv"
+SOURCE_PATTERNS = ['teg*-data.csv', 'teg*.xlsx']
+WIDE_ID_VARS = ['TEGNum', 'Round', 'Hole', 'PAR', 'SI']
+ALL_SCORES_COLUMNS = ['TEG', 'Round', 'Hole', 'PAR', 'SI', 'Pl', 'Sc', 'HC', 'HCStrokes', 'GrossVP', 'Net', 'NetVP',
+                      'Stableford', 'TEGNum', 'HoleID', 'Player', 'FrontBack']
+HEADER_SCAN_ROWS = 10
+HISTORY_PATTERNS = ['teg-all-data-long*']  # The maintained combined history, read before the per-TEG working files
+
+# Alternative column headers used in the historical files
+COLUMN_ALIASES = {'Rd': 'Round', 'H': 'Hole', 'Par': 'PAR', 'Score': 'Sc'}
+
+# Per-file corrections that cannot be inferred from the file itself
+SOURCE_HINTS: Dict[str, Dict] = {
+    'tegxi data.xlsx': {'TEGNum': 11, 'rename': {'HC': 'SI'}},  # The 'HC' column holds each hole's stroke index
+}
+
+ROMAN_NUMERALS = {'I': 1, 'V': 5, 'X': 10, 'L': 50, 'C': 100}
+
+
+class Source(NamedTuple):
+    path: str
+    sheet: Optional[str]
+
+
+def roman_to_int(numeral: str) -> int:
+    values = [ROMAN_NUMERALS[c] for c in numeral.upper()]
+    return sum(-v if i + 1 < len(values) and v < values[i + 1] else v for i, v in enumerate(values))
+
+
+def parse_teg_number(text) -> Optional[int]:
+    """
+    Parse a TEG number from text such as 'TEG 10', 'TEG X', 'TEG IX SCORES' or 'tegxi data'.
+    """
+    if pd.isna(text):
+        return None
+    if isinstance(text, (int, float)):
+        return int(text)
+    match = re.search(r'teg\s*(\d+|[ivxlc]+)\b', str(text), flags=re.IGNORECASE)
+    if not match:
+        return None
+    value = match.group(1)
+    return int(value) if value.isdigit() else roman_to_int(value)
+
+
+def load_player_codes(data_dir: str) -> List[str]:
+    return pd.read_csv(os.path.join(data_dir, 'players.csv'))['Pl'].tolist()
+
+
+def discover_sources(data_dir: str) -> List[Source]:
+    """
+    Find the historical source files in data_dir, one Source per CSV file and per workbook sheet.
+
+    Parameters:
+        data_dir (str): Directory to search.
+
+    Returns:
+        List[Source]: Sources sorted by file name and sheet order.
+    """
+    sources = []
+    for file_name in sorted(os.listdir(data_dir)):
+        if not any(fnmatch.fnmatch(file_name.lower(), pattern) for pattern in SOURCE_PATTERNS):
+            continue
+        path = os.path.join(data_dir, file_name)
+        if file_name.lower().endswith('.csv'):
+            sources.append(Source(path, None))
+        else:
+            workbook = openpyxl.load_workbook(path, read_only=True)
+            sources.extend(Source(path, sheet) for sheet in workbook.sheetnames)
+            workbook.close()
+    logger.info(f"Discovered {len(sources)} candidate sources in {data_dir}.")
+    return sources
+
+
+def is_history_source(source: Source) -> bool:
+    return any(fnmatch.fnmatch(os.path.basename(source.path).lower(), pattern) for pattern in HISTORY_PATTERNS)
+
+
+def _iter_source_rows(source: Source):
+    """
+    Stream the rows of a source as tuples of cell values. Workbooks are opened read-only and with the cached
+    values of formula cells.
+    """
+    if source.sheet is None:
+        with open(source.path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.reader(f):
+                yield tuple(value if value != '' else None for value in row)
+        return
+
+    workbook = openpyxl.load_workbook(source.path, read_only=True, data_only=True)
+    try:
+        yield from workbook[source.sheet].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _find_header(rows: List[tuple], players: List[str]) -> Optional[Tuple[int, str]]:
+    """
+    Find the header row and whether the source is long ('Pl' and 'Sc' columns) or wide (a column per player).
+    """
+    for i, row in enumerate(rows):
+        headers = [COLUMN_ALIASES.get(h, h) for h in row]
+        if 'Pl' in headers and 'Sc' in headers:
+            return i, 'long'
+        if 'PAR' in headers and 'SI' in headers and sum(h in players for h in headers) >= 2:
+            return i, 'wide'
+    return None
+
+
+def _wide_columns(headers: List, players: List[str]) -> Dict[int, str]:
+    """
+    Map column positions of a wide layout to WIDE_ID_VARS and player codes. Only the first block of player
+    columns is used; later blocks in the workbooks are formulas derived from it. Unlabelled Round and Hole
+    columns are taken to be the two columns before the first player column.
+    """
+    columns = {}
+    for pos, header in enumerate(headers):
+        if (header in players or header in ('TEG', 'Round', 'Hole', 'PAR', 'SI')) and header not in columns.values():
+            columns[pos] = header
+
+    first_player = min(pos for pos, name in columns.items() if name in players)
+    for name, pos in (('Round', first_player - 2), ('Hole', first_player - 1)):
+        if name not in columns.values() and pos >= 0 and headers[pos] is None:
+            columns[pos] = name
+    return columns
+
+
+def read_source(source: Source, players: List[str], skip_tegs: AbstractSet[int] = frozenset()) -> List[Tuple[int, pd.DataFrame]]:
+    """
+    Read one source into wide frames with WIDE_ID_VARS and a column per player, one frame per TEG.
+
+    Rows are streamed and only the cells of the recognised columns are kept, bucketed by TEG as they are read.
+    Rows of TEGs in skip_tegs are dropped as they stream past, and a single-TEG source whose TEG is skipped is
+    not read past its header. Long sources are pivoted to the wide layout so every TEG takes the same path
+    through reshape_round_data.
+
+    Parameters:
+        source (Source): The file and sheet to read.
+        players (List[str]): Known player codes, used to recognise player columns.
+        skip_tegs (AbstractSet[int]): TEGs already covered by another source.
+
+    Returns:
+        List[Tuple[int, pd.DataFrame]]: (TEGNum, wide frame) pairs. Empty if the source has no recognisable
+        layout or only skipped TEGs.
+    """
+    rows = _iter_source_rows(source)
+    head = list(itertools.islice(rows, HEADER_SCAN_ROWS))
+    found = _find_header(head, players)
+    if found is None:
+        return []
+
+    header_row, layout = found
+    hints = SOURCE_HINTS.get(os.path.basename(source.path), {})
+    headers = [hints.get('rename', {}).get(h, COLUMN_ALIASES.get(h, h)) for h in head[header_row]]
+
+    if layout == 'long':
+        columns = {}
+        for pos, header in enumerate(headers):
+            if header in ('TEG', 'Round', 'Hole', 'PAR', 'SI', 'Pl', 'Sc') and header not in columns.values():
+                columns[pos] = header
+    else:
+        columns = _wide_columns(headers, players)
+    positions, names = list(columns), list(columns.values())
+
+    fixed_teg = None
+    if 'TEG' not in names:
+        fixed_teg = hints.get('TEGNum', parse_teg_number(source.sheet) or parse_teg_number(os.path.basename(source.path)))
+        if fixed_teg is None or fixed_teg in skip_tegs:
+            return []
+
+    teg_pos = positions[names.index('TEG')] if fixed_teg is None else None
+    teg_numbers: Dict = {}
+    blocks: Dict[int, List[list]] = {}
+    for row in itertools.chain(head[header_row + 1:], rows):
+        if fixed_teg is None:
+            value = row[teg_pos] if teg_pos < len(row) else None
+            if value not in teg_numbers:
+                teg_numbers[value] = parse_teg_number(value)
+            teg_num = teg_numbers[value]
+        else:
+            teg_num = fixed_teg
+        if teg_num is None or teg_num in skip_tegs:
+            continue
+        blocks.setdefault(teg_num, []).append([row[pos] if pos < len(row) else None for pos in positions])
+
+    return [(teg_num, _block_to_wide(block, names, teg_num, layout, players)) for teg_num, block in sorted(blocks.items())]
+
+
+def _block_to_wide(block: List[list], names: List[str], teg_num: int, layout: str, players: List[str]) -> pd.DataFrame:
+    """
+    Convert the rows read for one TEG into a wide frame with WIDE_ID_VARS and a column per player.
+    """
+    df = pd.DataFrame(block, columns=names)
+    df['TEGNum'] = teg_num
+
+    df['Round'] = df['Round'].astype(str).str.extract(r'(\d+)', expand=False)
+    df[['Round', 'Hole', 'PAR', 'SI']] = df[['Round', 'Hole', 'PAR', 'SI']].apply(pd.to_numeric, errors='coerce')
+    df = df.dropna(subset=['Round', 'Hole', 'PAR', 'SI'])
+    df[['Round', 'Hole', 'PAR', 'SI']] = df[['Round', 'Hole', 'PAR', 'SI']].astype(int)
+
+    if layout == 'long':
+        df = df.drop_duplicates(subset=WIDE_ID_VARS + ['Pl'])
+        df = df.pivot(index=WIDE_ID_VARS, columns='Pl', values='Sc').reset_index()
+        df.columns.name = None
+
+    return df[WIDE_ID_VARS + [col for col in df.columns if col in players]].reset_index(drop=True)
+
+
+def process_teg(wide_df: pd.DataFrame, hc_long: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reshape and process one TEG's wide frame into all-scores rows.
+    """
+    long_df = reshape_round_data(wide_df, WIDE_ID_VARS)
+    return process_round_for_all_scores(long_df, hc_long)
+
+
+def choose_sources(frames: List[Tuple[Source, int, pd.DataFrame]]) -> Dict[int, Tuple[Source, pd.DataFrame]]:
+    """
+    Pick one source per TEG among the frames read for it. Sources covering more TEGs are preferred, then the one
+    with more hole scores, then the first discovered.
+    """
+    tegs_per_source = pd.Series([source for source, _, _ in frames]).value_counts()
+    chosen: Dict[int, Tuple[Source, pd.DataFrame, Tuple[int, int]]] = {}
+    for source, teg_num, frame in frames:
+        n_scores = int(frame.drop(columns=WIDE_ID_VARS).apply(pd.to_numeric, errors='coerce').gt(0).sum().sum())
+        rank = (int(tegs_per_source[source]), n_scores)
+        if teg_num not in chosen or rank > chosen[teg_num][2]:
+            chosen[teg_num] = (source, frame, rank)
+    return {teg_num: (source, frame) for teg_num, (source, frame, _) in sorted(chosen.items())}
+
+
+def backfill_history(data_dir: str = DATA_DIR, workers: Optional[int] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Rebuild the all-scores table from the historical sources in data_dir.
+
+    Parameters:
+        data_dir (str): Directory holding the sources, players.csv and handicaps.csv.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: The all-scores rows, and a summary of the source used for each TEG.
+    """
+    players = load_player_codes(data_dir)
+    hc_long = load_and_prepare_handicap_data(os.path.join(data_dir, 'handicaps.csv'))
+    sources = discover_sources(data_dir)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Read the combined history first, then the other sources only for the TEGs it does not cover
+        is_history = [is_history_source(source) for source in sources]
+        frames = []
+        covered: set = set()
+        for tier_sources in ([s for s, h in zip(sources, is_history) if h], [s for s, h in zip(sources, is_history) if not h]):
+            n = len(tier_sources)
+            read_results = list(executor.map(read_source, tier_sources, [players] * n, [frozenset(covered)] * n))
+            tier_frames = [(source, teg_num, frame) for source, result in zip(tier_sources, read_results) for teg_num, frame in result]
+            covered |= {teg_num for _, teg_num, _ in tier_frames}
+            frames += tier_frames
+        logger.info(f"Read {len(frames)} TEG frames; {len(sources) - len({source for source, _, _ in frames})} sources had none needed.")
+
+        chosen = choose_sources(frames)
+        processed = list(executor.map(process_teg, [frame for _, frame in chosen.values()], [hc_long] * len(chosen)))
+
+    all_scores = pd.concat(processed, ignore_index=True)[ALL_SCORES_COLUMNS].sort_values(['TEGNum', 'Pl', 'Round', 'Hole'], ignore_index=True)
+
+    summary = pd.DataFrame([
+        {'TEGNum': teg_num, 'Source': os.path.basename(source.path), 'Sheet': source.sheet, 'Scores': len(rows)}
+        for (teg_num, (source, _)), rows in zip(chosen.items(), processed)
+    ])
+    return all_scores, summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the hole-level score history from the historical files in data/.")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Directory holding the historical sources.")
+    parser.add_argument('--output', default=None, help=f"Output CSV. Defaults to {DEFAULT_OUTPUT} in the data directory.")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes.")
+    parser.add_argument('--update-all-data', action='store_true',
+                        help="Also rebuild all-data.parquet and all-data.csv from the output.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    all_scores, summary = backfill_history(args.data_dir, args.workers)
+
+    output = args.output or os.path.join(args.data_dir, DEFAULT_OUTPUT)
+    all_scores.to_csv(output, index=False)
+    print(summary.to_string(index=False))
+    print(f"Wrote {len(all_scores)} rows for {len(summary)} TEGs to {output} in {time.perf_counter() - start:.1f}s.")
+
+    if args.update_all_data:
+        update_all_data(output, os.path.join(args.data_dir, 'all-data.parquet'), os.path.join(args.data_dir, 'all-data.csv'))
+
+
+if __name__ == "__main__":
+    main()
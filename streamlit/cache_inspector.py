@@ -0,0 +1,222 @@
+"""
+Memory accounting for the cached datasets.
+
+Getters declared with timing.timed_cache_data or timed_cache_resource register each cache entry here when it
+is computed (a cache miss): the deep memory of the value by column, its row count and when it was built. Hits
+on the entry are counted as they happen. Entries are identified by the getter and the arguments Streamlit
+hashes for the cache key: DataFrames by shape and a hash of their contents, scalars by value, and arguments
+whose names start with an underscore left out.
+
+The registry mirrors what the wrappers have seen, so caches must be cleared through clear_caches() or the
+getter's .clear() for it to stay accurate; max_entries evictions are mirrored, oldest first.
+"""
+import sys
+import time
+import inspect
+import hashlib
+import functools
+import pickle
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+import streamlit as st
+from telemetry import args_signature
+
+# Configure Logging
+logger = logging.getLogger(__name__)
+
+# Constants
+REPORT_COLUMNS = ['Function', 'Arguments', 'Cache', 'Rows', 'Columns', 'Memory MB', 'Hits', 'Age (s)', 'Since last hit (s)']
+
+_functions: Dict[str, Dict[str, Any]] = {}
+_entries: 'OrderedDict[Tuple[str, str], Dict[str, Any]]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def register_cached_function(name: str, clear: Callable[[], None], max_entries: Optional[int] = None,
+                             cache: str = 'data') -> None:
+    """
+    Register a cached getter so its entries can be reported and cleared by name.
+
+    Parameters:
+        name (str): The getter's name.
+        clear (Callable): Clears the getter's Streamlit cache.
+        max_entries (int, optional): The cache's max_entries, so evictions can be mirrored.
+        cache (str): 'data' for st.cache_data, 'resource' for st.cache_resource.
+    """
+    _functions[name] = {'clear': clear, 'max_entries': max_entries, 'cache': cache}
+
+
+def value_memory(value: Any) -> Dict[str, int]:
+    """
+    Return the deep memory of a cached value in bytes, by column for DataFrames and Arrow tables (plus 'Index'),
+    by part for tuples of them, and as a single 'value' otherwise.
+    """
+    if isinstance(value, pd.DataFrame):
+        return {str(col): int(size) for col, size in value.memory_usage(deep=True, index=True).items()}
+    if isinstance(value, pd.Series):
+        return {str(value.name or 'values'): int(value.memory_usage(deep=True, index=True))}
+    if isinstance(value, pa.Table):
+        return {name: int(value.column(name).nbytes) for name in value.column_names}
+    if isinstance(value, (tuple, list)) and any(isinstance(v, (pd.DataFrame, pd.Series, pa.Table)) for v in value):
+        return {f"[{i}] {col}": size for i, part in enumerate(value) for col, size in value_memory(part).items()}
+    if isinstance(value, (str, bytes)):
+        return {'value': sys.getsizeof(value)}
+    try:
+        return {'value': len(pickle.dumps(value))}
+    except Exception:
+        return {'value': sys.getsizeof(value)}
+
+
+def value_rows(value: Any) -> Optional[int]:
+    if isinstance(value, (pd.DataFrame, pd.Series, pa.Table)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        rows = [len(v) for v in value if isinstance(v, (pd.DataFrame, pd.Series, pa.Table))]
+        return sum(rows) if rows else None
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def _signature(func: Callable) -> Optional[inspect.Signature]:
+    try:
+        return inspect.signature(func)
+    except (TypeError, ValueError):
+        return None
+
+
+def describe_argument(value: Any) -> str:
+    """
+    Describe one argument of a cached call: DataFrames and Series by shape and a hash of their contents, so
+    frames of the same shape but different data are told apart, and scalars by value.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        try:
+            digest = int(pd.util.hash_pandas_object(value).sum())
+        except TypeError:  # Unhashable cells, e.g. lists
+            digest = int(hashlib.sha1(pickle.dumps(value)).hexdigest(), 16)
+        shape = 'x'.join(str(size) for size in value.shape)
+        return f"{type(value).__name__}[{shape} #{digest & 0xffffffff:08x}]"
+    return args_signature((value,), {}, max_length=None)[1:-1]
+
+
+def entry_key(func: Callable, args: tuple, kwargs: dict) -> str:
+    """
+    Describe a cached call by the arguments st.cache_data hashes for its key. Arguments named with a leading
+    underscore are not hashed by Streamlit, so they are left out here too.
+    """
+    signature = _signature(func)
+    try:
+        args, kwargs = (), signature.bind(*args, **kwargs).arguments
+    except (AttributeError, TypeError):  # No signature, or a call the function would reject
+        pass
+    described = [describe_argument(value) for value in args]
+    described += [f"{name}={describe_argument(value)}" for name, value in kwargs.items() if not name.startswith('_')]
+    return '(' + ', '.join(described) + ')'
+
+
+def record_miss(name: str, key: str, value: Any) -> None:
+    """
+    Register the value just computed for a cache entry, replacing any previous value for the same key.
+    """
+    now = time.time()
+    entry = {'Function': name, 'Arguments': key, 'Created': now, 'Last used': now, 'Hits': 0,
+             'Rows': value_rows(value), 'Memory': value_memory(value)}
+    with _lock:
+        _entries.pop((name, key), None)
+        _entries[(name, key)] = entry
+        max_entries = _functions.get(name, {}).get('max_entries')
+        if max_entries:
+            keys = [k for k in _entries if k[0] == name]
+            for old_key in keys[:max(0, len(keys) - max_entries)]:
+                del _entries[old_key]
+
+
+def record_hit(name: str, key: str) -> None:
+    with _lock:
+        entry = _entries.get((name, key))
+        if entry is not None:
+            entry['Hits'] += 1
+            entry['Last used'] = time.time()
+            _entries.move_to_end((name, key))
+
+
+def forget(name: Optional[str] = None, cache: Optional[str] = None) -> None:
+    """
+    Drop the registered entries of one getter, or of every getter using the given cache type, or all.
+    """
+    with _lock:
+        for key in [k for k in _entries
+                    if (name is None or k[0] == name) and (cache is None or _functions.get(k[0], {}).get('cache', 'data') == cache)]:
+            del _entries[key]
+
+
+def clear_function(name: str) -> None:
+    """
+    Clear one getter's Streamlit cache and its entries.
+    """
+    _functions[name]['clear']()
+    forget(name)
+    logger.info(f"Cleared the cache of {name}.")
+
+
+def clear_caches() -> None:
+    """
+    Clear every st.cache_data cache (as st.cache_data.clear() does) and the matching entries.
+    """
+    st.cache_data.clear()
+    forget(cache='data')
+
+
+def cache_report() -> pd.DataFrame:
+    """
+    Return one row per cached entry with its size, hits and age, largest first.
+    """
+    now = time.time()
+    with _lock:
+        entries = [dict(entry) for entry in _entries.values()]
+    if not entries:
+        return pd.DataFrame(columns=REPORT_COLUMNS)
+    report = pd.DataFrame([{
+        'Function': entry['Function'],
+        'Arguments': entry['Arguments'],
+        'Cache': _functions.get(entry['Function'], {}).get('cache', 'data'),
+        'Rows': entry['Rows'],
+        'Columns': len([col for col in entry['Memory'] if not col.endswith('Index')]) if entry['Rows'] is not None else None,
+        'Memory MB': round(sum(entry['Memory'].values()) / 1024 ** 2, 3),
+        'Hits': entry['Hits'],
+        'Age (s)': round(now - entry['Created']),
+        'Since last hit (s)': round(now - entry['Last used']) if entry['Hits'] else None
+    } for entry in entries])
+    report[['Rows', 'Columns']] = report[['Rows', 'Columns']].astype('Int64')
+    return report.sort_values('Memory MB', ascending=False).reset_index(drop=True)
+
+
+def column_report(name: Optional[str] = None, key: Optional[str] = None) -> pd.DataFrame:
+    """
+    Return the memory of every column of the cached entries (optionally of one getter, or one entry), largest
+    first.
+    """
+    with _lock:
+        entries = [dict(entry) for (entry_name, entry_args), entry in _entries.items()
+                   if (name is None or entry_name == name) and (key is None or entry_args == key)]
+    columns = pd.DataFrame([{'Function': entry['Function'], 'Arguments': entry['Arguments'], 'Column': col, 'Bytes': size}
+                            for entry in entries for col, size in entry['Memory'].items()],
+                           columns=['Function', 'Arguments', 'Column', 'Bytes'])
+    columns['MB'] = (columns['Bytes'] / 1024 ** 2).round(3)
+    return columns.sort_values('Bytes', ascending=False).reset_index(drop=True)
+
+
+def log_cache_report(top: int = 10) -> pd.DataFrame:
+    """
+    Log the total cached memory and the `top` largest entries, and return the full report.
+    """
+    report = cache_report()
+    logger.info(f"Cache report: {len(report)} entries, {report['Memory MB'].sum():.1f} MB in total.")
+    for _, entry in report.head(top).iterrows():
+        logger.info(f"  {entry['Memory MB']:.2f} MB  {entry['Function']}{entry['Arguments']}  "
+                    f"hits={entry['Hits']} age={entry['Age (s)']}s")
+    return report
@@ -0,0 +1,78 @@
+import json
+import logging
+from typing import Any, Callable, Dict, Optional
+import altair as alt
+import plotly.graph_objects as go
+import streamlit as st
+from timing import timed_cache_data
+
+# Configure Logging
+logger = logging.getLogger(__name__)
+
+# Constants
+MAX_CACHED_CHARTS = 256
+
+
+def _params_key(params: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(params or {}, sort_keys=True, default=str)
+
+
+@timed_cache_data(show_spinner=False, max_entries=MAX_CACHED_CHARTS)
+def _cached_chart_json(name: str, params_key: str, data_version: str, _build: Callable[[], Any]) -> str:
+    """
+    Build a chart and serialise it. Cached on (name, params_key, data_version); _build is not hashed.
+    """
+    logger.info(f"Building chart '{name}' {params_key} for data version {data_version}.")
+    chart = _build()
+    return chart.to_json()
+
+
+def get_chart_json(name: str, params: Optional[Dict[str, Any]], data_version: str, build: Callable[[], Any]) -> str:
+    """
+    Return the serialised JSON spec of an Altair chart or Plotly figure, building it only on a cache miss.
+
+    Parameters:
+        name (str): Name of the chart, unique across the app.
+        params (Dict[str, Any], optional): The chart's parameters, e.g. {'teg': 'TEG 15'}. Must be JSON-serialisable
+            (other values are converted with str).
+        data_version (str): Version of the data the chart is drawn from, from utils.get_data_version().
+        build (Callable): Function taking no arguments that computes the chart's data and returns the chart.
+
+    Returns:
+        str: The Vega-Lite spec (Altair) or figure JSON (Plotly).
+    """
+    return _cached_chart_json(name, _params_key(params), data_version, build)
+
+
+def altair_chart(name: str, params: Optional[Dict[str, Any]], data_version: str, build: Callable[[], alt.TopLevelMixin], **kwargs) -> None:
+    """
+    Display an Altair chart from the chart cache. On a hit neither the chart's data nor its Vega-Lite spec is
+    recomputed; the cached spec is passed straight to st.vega_lite_chart.
+
+    Parameters:
+        name, params, data_version, build: See get_chart_json.
+        **kwargs: Passed to st.vega_lite_chart, e.g. use_container_width.
+    """
+    spec = json.loads(get_chart_json(name, params, data_version, build))
+    st.vega_lite_chart(spec, **kwargs)
+
+
+def plotly_figure(name: str, params: Optional[Dict[str, Any]], data_version: str, build: Callable[[], go.Figure]) -> go.Figure:
+    """
+    Return a Plotly figure from the chart cache. The figure is rebuilt from its cached JSON without re-validating
+    it, which Plotly already did when the chart was first built.
+
+    Parameters:
+        name, params, data_version, build: See get_chart_json.
+
+    Returns:
+        go.Figure: The figure, ready for st.plotly_chart.
+    """
+    return go.Figure(json.loads(get_chart_json(name, params, data_version, build)), _validate=False)
+
+
+def clear_chart_cache() -> None:
+    """
+    Drop every cached chart spec.
+    """
+    _cached_chart_json.clear()
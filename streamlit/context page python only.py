@@ -1,9 +1,9 @@
-from utils import get_ranked_teg_data, get_ranked_round_data, get_ranked_frontback_data,safe_ordinal
+from utils import get_ranked_teg_data, get_ranked_round_data, get_ranked_frontback_data,safe_ordinal, get_data_version
 from utils import chosen_rd_context, chosen_teg_context
 
 # ROUND CONTEXT
 
-df = get_ranked_round_data()
+df = get_ranked_round_data(get_data_version())
 max_teg_r = df.loc[df['TEGNum'].idxmax(), 'TEG']
 max_rd_in_max_teg = df[df['TEG'] == max_teg]['Round'].max()
 
@@ -18,7 +18,7 @@ print(chosen_rd_context(df,teg_r,rd_r,'Stableford'))
 
 # TEG CONTEXT
 
-df = get_ranked_teg_data()
+df = get_ranked_teg_data(get_data_version())
 max_teg_t = df.loc[df['TEGNum'].idxmax(), 'TEG']
 teg_t = max_teg_t
 
@@ -0,0 +1,354 @@
+import os
+import json
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+# Configure Logging
+logger = logging.getLogger(__name__)
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(BASE_DIR, "../data/store")
+FILE_PATH_PLAYERS = os.path.join(BASE_DIR, "../data/players.csv")
+ARROW_DIR = os.path.join(BASE_DIR, "../data/arrow")
+UNKNOWN_PLAYER = 'Unknown Player'
+STORE_TABLES = ['facts', 'course_holes', 'rounds', 'players']
+
+# Columns held in each dimension table and the fact columns that key them
+ROUND_COLUMNS = ['TEG', 'Date', 'Course', 'Year']
+COURSE_HOLE_COLUMNS = ['PAR', 'SI', 'FrontBack']
+PLAYER_COLUMNS = ['Pl', 'Player']
+DERIVED_COLUMNS = ['HoleID']
+DIMENSION_COLUMNS = ROUND_COLUMNS + COURSE_HOLE_COLUMNS + PLAYER_COLUMNS + DERIVED_COLUMNS
+FACT_KEYS = ['TEGNum', 'Round', 'Hole', 'PlayerCode', 'CourseHoleKey']
+
+
+def _table_path(store_dir: str, table: str) -> str:
+    return os.path.join(store_dir, f"{table}.parquet")
+
+
+@lru_cache(maxsize=4)
+def _read_player_registry(players_file: str, modified: int) -> pd.DataFrame:
+    registry = pd.read_csv(players_file, dtype=str)
+    registry['Pl'] = registry['Pl'].str.strip().str.upper()
+    registry.insert(0, 'PlayerCode', np.arange(len(registry), dtype='int16'))
+    return registry[['PlayerCode', 'Pl', 'Player']]
+
+
+def load_player_registry(players_file: str = FILE_PATH_PLAYERS) -> pd.DataFrame:
+    """
+    Load the player registry from players.csv. Each player's code is their row position in the file, so codes
+    stay stable as long as new players are added at the end. Re-read only when the file changes.
+
+    Parameters:
+        players_file (str): Path to players.csv, with Pl and Player columns.
+
+    Returns:
+        pd.DataFrame: PlayerCode, Pl and Player for every registered player.
+    """
+    return _read_player_registry(players_file, os.stat(players_file).st_mtime_ns)
+
+
+def player_codes(initials: pd.Series, registry: Optional[pd.DataFrame] = None) -> np.ndarray:
+    """
+    Return the integer player code for each set of initials, or -1 where the player is not registered.
+    """
+    if registry is None:
+        registry = load_player_registry()
+    positions = pd.Index(registry['Pl']).get_indexer(initials.astype(str).str.upper())
+    return np.where(positions >= 0, registry['PlayerCode'].to_numpy()[positions], -1).astype('int16')
+
+
+def player_names(codes: np.ndarray, registry: Optional[pd.DataFrame] = None) -> np.ndarray:
+    """
+    Return the player name for each integer player code, or 'Unknown Player' for -1.
+    """
+    if registry is None:
+        registry = load_player_registry()
+    names = np.append(registry['Player'].to_numpy(dtype=object), UNKNOWN_PLAYER)
+    lookup = pd.Index(registry['PlayerCode']).get_indexer(np.asarray(codes))
+    return names[np.where(lookup >= 0, lookup, len(names) - 1)]
+
+
+def extend_registry(df: pd.DataFrame, registry: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Return the player registry plus any player in the data who is not registered, with codes after the
+    registry's, so every player in the data has a code of their own.
+
+    Parameters:
+        df (pd.DataFrame): Data with Pl and Player columns.
+        registry (pd.DataFrame, optional): Player registry. Defaults to load_player_registry().
+
+    Returns:
+        pd.DataFrame: PlayerCode, Pl and Player for the registry and the unregistered players.
+    """
+    players = load_player_registry() if registry is None else registry
+    unregistered = df.loc[player_codes(df['Pl'], players) < 0, ['Pl', 'Player']].drop_duplicates('Pl')
+    if unregistered.empty:
+        return players
+    unregistered = unregistered.assign(Pl=unregistered['Pl'].astype(str).str.upper())
+    unregistered.insert(0, 'PlayerCode', np.arange(len(players), len(players) + len(unregistered), dtype='int16'))
+    return pd.concat([players, unregistered], ignore_index=True)
+
+
+def hole_keys(tegnum: pd.Series, round_num: pd.Series, hole: pd.Series) -> np.ndarray:
+    """
+    Return an integer key for each hole played, TEGNum * 10000 + Round * 100 + Hole. Sorting on the key orders
+    holes the same way as the HoleID strings.
+    """
+    return (tegnum.to_numpy(dtype='int32') * 10000 + round_num.to_numpy(dtype='int32') * 100 +
+            hole.to_numpy(dtype='int32'))
+
+
+def format_hole_ids(keys: np.ndarray) -> np.ndarray:
+    """
+    Turn hole keys from hole_keys() into HoleID strings ('T07|R01|H01'). Each distinct key is formatted once.
+    """
+    unique, positions = np.unique(keys, return_inverse=True)
+    labels = np.array([f"T{key // 10000:02d}|R{key // 100 % 100:02d}|H{key % 100:02d}" for key in unique.tolist()],
+                      dtype=object)
+    return labels[positions]
+
+
+def build_normalised_store(all_data: pd.DataFrame, registry: Optional[pd.DataFrame] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Split the wide hole-level data into a fact table and dimension tables.
+
+    - facts: one row per player and hole with integer keys and the score columns
+    - course_holes: one row per distinct (Course, Hole, PAR, SI) layout, keyed by CourseHoleKey
+    - rounds: one row per (TEGNum, Round) with TEG, Date, Course and Year
+    - players: the player registry, keyed by PlayerCode
+
+    Parameters:
+        all_data (pd.DataFrame): Hole-level data, as saved to all-data.parquet.
+        registry (pd.DataFrame, optional): Player registry. Defaults to load_player_registry().
+
+    Returns:
+        Dict[str, pd.DataFrame]: The four tables keyed by name.
+    """
+    df = all_data.reset_index(drop=True)
+
+    rounds = (df[['TEGNum', 'Round'] + ROUND_COLUMNS].drop_duplicates(['TEGNum', 'Round'])
+              .sort_values(['TEGNum', 'Round'], ignore_index=True))
+
+    course_hole_cols = ['Course', 'Hole', 'PAR', 'SI']
+    course_holes = (df[course_hole_cols + ['FrontBack']].drop_duplicates(course_hole_cols)
+                    .sort_values(course_hole_cols, na_position='last', ignore_index=True))
+    course_holes.insert(0, 'CourseHoleKey', np.arange(len(course_holes), dtype='int32'))
+
+    # Registered players keep their registry code; anyone else gets a code after the registry's
+    registry = load_player_registry() if registry is None else registry
+    players = extend_registry(df, registry)
+    if len(players) > len(registry):
+        logger.warning(f"Players not in the registry: {players['Pl'].iloc[len(registry):].tolist()}")
+    initials = df['Pl'].astype(str).str.upper()
+
+    fact_cols = [col for col in df.columns if col not in DIMENSION_COLUMNS]
+    facts = df[fact_cols].copy()
+    key_index = pd.MultiIndex.from_frame(course_holes[course_hole_cols])
+    facts.insert(4, 'CourseHoleKey', key_index.get_indexer(pd.MultiIndex.from_frame(df[course_hole_cols])).astype('int32'))
+    facts.insert(4, 'PlayerCode', players['PlayerCode'].to_numpy()[pd.Index(players['Pl']).get_indexer(initials)])
+    facts = facts.drop(columns=['Course', 'PAR', 'SI'], errors='ignore')
+    facts[['TEGNum', 'Round', 'Hole']] = facts[['TEGNum', 'Round', 'Hole']].astype('int16')
+
+    return {'facts': facts, 'course_holes': course_holes, 'rounds': rounds, 'players': players}
+
+
+def save_normalised_store(all_data: pd.DataFrame, data_version: str, store_dir: str = STORE_DIR) -> None:
+    """
+    Build the normalised store and save each table as Parquet, tagged with the data version it came from.
+
+    Parameters:
+        all_data (pd.DataFrame): Hole-level data that has just been saved.
+        data_version (str): Version of the all-data file, from utils.get_data_version().
+        store_dir (str): Directory for the store tables.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    for table, frame in build_normalised_store(all_data).items():
+        frame.attrs['data_version'] = data_version
+        if table == 'facts':
+            # Kept so the full view comes back with the same column order as the all-data file
+            frame.attrs['columns'] = [str(col) for col in all_data.columns]
+        frame.to_parquet(_table_path(store_dir, table), index=False)
+    logger.info(f"Normalised store saved to {store_dir}")
+
+
+def store_is_current(data_version: str, store_dir: str = STORE_DIR) -> bool:
+    """
+    Return True if every store table exists and was built from the given data version.
+    """
+    for table in STORE_TABLES:
+        if not os.path.exists(_table_path(store_dir, table)):
+            return False
+        if _store_attrs(store_dir, table).get('data_version') != data_version:
+            return False
+    return True
+
+
+def _store_attrs(store_dir: str, table: str) -> Dict:
+    import pyarrow.parquet as pq
+
+    metadata = pq.read_schema(_table_path(store_dir, table)).metadata or {}
+    return json.loads(metadata.get(b'PANDAS_ATTRS', b'{}'))
+
+
+def store_columns(store_dir: str = STORE_DIR) -> List[str]:
+    """
+    Return the columns of the wide hole-level view the store can rebuild, in the all-data file's order.
+    """
+    import pyarrow.parquet as pq
+
+    fact_columns = pq.read_schema(_table_path(store_dir, 'facts')).names
+    columns = [col for col in fact_columns if col not in FACT_KEYS[3:]] + DIMENSION_COLUMNS
+    order = _store_attrs(store_dir, 'facts').get('columns')
+    if order and set(order) == set(columns):
+        return order
+    return columns
+
+
+def _join(frame: pd.DataFrame, keys: List[str], dim: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """
+    Add dimension columns to the fact rows by position lookups on the dimension's key.
+    """
+    positions = pd.MultiIndex.from_frame(dim[keys]).get_indexer(pd.MultiIndex.from_frame(frame[keys]))
+    for col in columns:
+        frame[col] = dim[col].take(positions).set_axis(frame.index)
+    return frame
+
+
+def read_columns(columns: Optional[Sequence[str]] = None, store_dir: str = STORE_DIR) -> pd.DataFrame:
+    """
+    Rebuild the wide hole-level view from the normalised store for the requested columns only.
+
+    Only the fact columns needed are read from disk, and only the dimension tables holding a requested
+    column are read and joined.
+
+    Parameters:
+        columns (Sequence[str], optional): Columns of the wide view to return. None returns all of them, in the
+            all-data file's order.
+        store_dir (str): Directory of the store tables.
+
+    Returns:
+        pd.DataFrame: The requested columns, one row per player and hole.
+    """
+    import pyarrow.parquet as pq
+
+    fact_columns = pq.read_schema(_table_path(store_dir, 'facts')).names
+    columns = store_columns(store_dir) if columns is None else list(columns)
+
+    unknown = [col for col in columns if col not in fact_columns and col not in DIMENSION_COLUMNS]
+    if unknown:
+        raise KeyError(f"Columns not in the data store: {unknown}")
+
+    needs_rounds = any(col in ROUND_COLUMNS for col in columns)
+    needs_course_holes = any(col in COURSE_HOLE_COLUMNS for col in columns)
+    needs_players = any(col in PLAYER_COLUMNS for col in columns)
+    keys = set()
+    if needs_rounds or 'HoleID' in columns:
+        keys.update(['TEGNum', 'Round'])
+    if 'HoleID' in columns:
+        keys.add('Hole')
+    if needs_course_holes:
+        keys.add('CourseHoleKey')
+    if needs_players:
+        keys.add('PlayerCode')
+
+    read = [col for col in fact_columns if col in keys or col in columns]
+    facts = pd.read_parquet(_table_path(store_dir, 'facts'), columns=read)
+
+    if needs_rounds:
+        rounds = pd.read_parquet(_table_path(store_dir, 'rounds'))
+        facts = _join(facts, ['TEGNum', 'Round'], rounds, [col for col in ROUND_COLUMNS if col in columns])
+    if needs_course_holes:
+        course_holes = pd.read_parquet(_table_path(store_dir, 'course_holes'))
+        facts = _join(facts, ['CourseHoleKey'], course_holes, [col for col in COURSE_HOLE_COLUMNS if col in columns])
+    if needs_players:
+        players = pd.read_parquet(_table_path(store_dir, 'players'))
+        facts = _join(facts, ['PlayerCode'], players, [col for col in PLAYER_COLUMNS if col in columns])
+    if 'HoleID' in columns:
+        facts['HoleID'] = format_hole_ids(hole_keys(facts['TEGNum'], facts['Round'], facts['Hole']))
+
+    # Restore the wide view's dtypes for the compact key columns
+    int_keys = [col for col in ['TEGNum', 'Round', 'Hole'] if col in columns]
+    facts[int_keys] = facts[int_keys].astype('int64')
+
+    return facts[columns]
+
+
+def write_arrow_cache(frames: Dict[str, pd.DataFrame], data_version: str, arrow_dir: str = ARROW_DIR) -> None:
+    """
+    Save each frame as an uncompressed Arrow IPC (Feather v2) file tagged with the data version, so other
+    processes can memory-map it instead of parsing Parquet.
+
+    Each file is written to a temporary name and moved into place, so a process that already has the old file
+    mapped keeps reading a complete copy.
+
+    Parameters:
+        frames (Dict[str, pd.DataFrame]): Frames to save, keyed by cache name.
+        data_version (str): Version of the all-data file, from utils.get_data_version().
+        arrow_dir (str): Directory for the Arrow files.
+    """
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    os.makedirs(arrow_dir, exist_ok=True)
+    for name, frame in frames.items():
+        table = pa.Table.from_pandas(frame)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'data_version': data_version.encode()})
+        path = os.path.join(arrow_dir, f"{name}.arrow")
+        feather.write_feather(table, f"{path}.tmp", compression='uncompressed')
+        os.replace(f"{path}.tmp", path)
+    logger.info(f"Arrow cache saved to {arrow_dir}: {', '.join(frames)}")
+
+
+def open_arrow_table(name: str, data_version: str, arrow_dir: str = ARROW_DIR):
+    """
+    Memory-map a cached Arrow file read-only. The table's buffers point into the OS page cache, which every
+    process on the machine shares, rather than into memory owned by this process.
+
+    Parameters:
+        name (str): Cache name the frame was saved under.
+        data_version (str): The current data version.
+        arrow_dir (str): Directory of the Arrow files.
+
+    Returns:
+        pyarrow.Table or None: The table, or None if the file is missing or from another data version.
+    """
+    import pyarrow as pa
+
+    path = os.path.join(arrow_dir, f"{name}.arrow")
+    if not os.path.exists(path):
+        return None
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    if (table.schema.metadata or {}).get(b'data_version', b'').decode() != data_version:
+        return None
+    return table
+
+
+def arrow_frame_view(table) -> pd.DataFrame:
+    """
+    Return a table as a DataFrame that reads the table's own memory rather than copying it. Numeric columns
+    without nulls become read-only NumPy views and string columns stay Arrow-backed (pd.ArrowDtype), so a frame
+    over a memory-mapped table adds next to nothing to the process. Other columns are converted as usual.
+    """
+    import pyarrow as pa
+
+    return table.to_pandas(split_blocks=True,
+                           types_mapper=lambda typ: pd.ArrowDtype(typ) if pa.types.is_string(typ) else None)
+
+
+def own_frame(df: pd.DataFrame, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """
+    Copy a frame from arrow_frame_view (or the given row positions of it) into ordinary writable pandas
+    columns, with Arrow-backed strings turned back into object columns holding None for missing values.
+    """
+    import pyarrow as pa
+
+    df = df.copy() if rows is None else df.take(rows)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.ArrowDtype):
+            df[col] = pa.array(df[col].array).to_numpy(zero_copy_only=False)
+    return df
@@ -0,0 +1,152 @@
+import logging
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+
+# Configure Logging
+logger = logging.getLogger(__name__)
+
+ACTUAL_SCENARIO = 'Actual'
+
+
+def actual_handicaps(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return the handicap applied to each player in each TEG.
+
+    Parameters:
+        df (pd.DataFrame): Hole-level data containing 'TEG', 'Pl' and 'HC'.
+
+    Returns:
+        pd.DataFrame: Long handicap table with columns TEG, Pl and HC.
+    """
+    return df[['TEG', 'TEGNum', 'Pl', 'HC']].drop_duplicates(subset=['TEG', 'Pl']).sort_values('TEGNum')[['TEG', 'Pl', 'HC']]
+
+
+def apply_handicap_rules(hc_long: pd.DataFrame, allowance: float = 1.0, max_change: Optional[int] = None) -> pd.DataFrame:
+    """
+    Derive an alternative handicap table from a base table using allowance and capping rules.
+
+    Parameters:
+        hc_long (pd.DataFrame): Long handicap table with columns TEG, Pl and HC.
+        allowance (float): Fraction of handicap to apply, e.g. 0.9 for a 90% allowance. Rounded half up.
+        max_change (int, optional): Largest change allowed between a player's consecutive TEGs. The cap is
+            applied to the already-capped previous handicap. None means no cap.
+
+    Returns:
+        pd.DataFrame: Long handicap table with columns TEG, Pl and HC.
+    """
+    hc_wide = hc_long.pivot(index='TEG', columns='Pl', values='HC')
+    hc_wide = hc_wide.loc[sorted(hc_wide.index, key=lambda teg: int(teg.split()[-1]))]
+
+    if max_change is not None:
+        capped = hc_wide.to_numpy(dtype=float, copy=True)
+        previous = np.full(capped.shape[1], np.nan)
+        for i in range(capped.shape[0]):
+            row = capped[i]
+            has_previous = ~np.isnan(previous) & ~np.isnan(row)
+            row[has_previous] = np.clip(row[has_previous], previous[has_previous] - max_change, previous[has_previous] + max_change)
+            previous = np.where(np.isnan(row), previous, row)
+        hc_wide = pd.DataFrame(capped, index=hc_wide.index, columns=hc_wide.columns)
+
+    hc_wide = np.floor(hc_wide * allowance + 0.5)
+
+    return hc_wide.reset_index().melt(id_vars='TEG', var_name='Pl', value_name='HC').dropna(subset=['HC'])
+
+
+def evaluate_handicap_scenarios(df: pd.DataFrame, scenarios: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Recompute HCStrokes, NetVP, Stableford and TEG results for many handicap scenarios at once.
+
+    Every scenario's handicaps are laid out as one row of an [scenario, hole] matrix and the scoring formulas from
+    process_round_for_all_scores are applied to the whole matrix in a single broadcasted pass. TEG totals are
+    summed with one bincount over (scenario, TEG, player) codes.
+
+    Parameters:
+        df (pd.DataFrame): Hole-level data containing TEG, TEGNum, Pl, Player, SI, PAR and Sc.
+        scenarios (Dict[str, pd.DataFrame]): Long handicap tables (TEG, Pl, HC) keyed by scenario name.
+            Players missing from a table play off 0, as in process_round_for_all_scores.
+
+    Returns:
+        Dict[str, pd.DataFrame]:
+            'teg_results': Scenario, TEGNum, TEG, Player, Stableford, NetVP and GrossVP totals.
+            'winners': Scenario, TEGNum, TEG, TEG Trophy, Green Jacket and HMM Wooden Spoon.
+    """
+    logger.info(f"Evaluating {len(scenarios)} handicap scenarios.")
+    names = list(scenarios)
+
+    # [scenario, hole] handicap matrix
+    row_keys = pd.MultiIndex.from_frame(df[['TEG', 'Pl']])
+    hc = np.vstack([
+        scenarios[name].set_index(['TEG', 'Pl'])['HC'].reindex(row_keys).fillna(0).to_numpy(dtype=float)
+        for name in names
+    ])
+
+    si = df['SI'].to_numpy(dtype=float)
+    par = df['PAR'].to_numpy(dtype=float)
+    sc = df['Sc'].to_numpy(dtype=float)
+
+    hc_strokes = (hc // 18) + ((hc % 18) >= si)
+    net_vp = sc - hc_strokes - par
+    stableford = np.clip(2 - net_vp, 0, None)
+
+    # Sum per (scenario, TEG, player)
+    teg_codes, tegs = pd.factorize(df['TEGNum'], sort=True)
+    player_codes, players = pd.factorize(df['Player'], sort=True)
+    n_groups = len(tegs) * len(players)
+    group_codes = teg_codes * len(players) + player_codes
+    flat_codes = (np.arange(len(names))[:, None] * n_groups + group_codes).ravel()
+
+    def group_sum(values: np.ndarray) -> np.ndarray:
+        return np.bincount(flat_codes, weights=values.ravel(), minlength=len(names) * n_groups).reshape(len(names), len(tegs), len(players))
+
+    played = np.bincount(group_codes, minlength=n_groups).reshape(len(tegs), len(players)) > 0
+    stableford_totals = np.where(played, group_sum(stableford), np.nan)
+    net_totals = np.where(played, group_sum(net_vp), np.nan)
+    # Gross scores do not depend on handicaps, so they are summed once and shared by every scenario
+    gross_totals = np.where(played, np.bincount(group_codes, weights=sc - par, minlength=n_groups).reshape(len(tegs), len(players)), np.nan)
+    gross_totals = np.broadcast_to(gross_totals, stableford_totals.shape)
+
+    teg_results = pd.DataFrame({
+        'Scenario': np.repeat(names, n_groups),
+        'TEGNum': np.tile(np.repeat(np.asarray(tegs), len(players)), len(names)),
+        'Player': np.tile(np.asarray(players), len(names) * len(tegs)),
+        'Stableford': stableford_totals.ravel(),
+        'NetVP': net_totals.ravel(),
+        'GrossVP': gross_totals.ravel()
+    }).dropna(subset=['Stableford'])
+    teg_results.insert(2, 'TEG', 'TEG ' + teg_results['TEGNum'].astype(str))
+
+    # Winners per scenario and TEG; NaN marks players absent from a TEG
+    player_names = np.asarray(players)
+    winners = pd.DataFrame({
+        'Scenario': np.repeat(names, len(tegs)),
+        'TEGNum': np.tile(np.asarray(tegs), len(names)),
+        'TEG Trophy': player_names[np.nanargmax(stableford_totals, axis=2)].ravel(),
+        'Green Jacket': player_names[np.nanargmin(gross_totals, axis=2)].ravel(),
+        'HMM Wooden Spoon': player_names[np.nanargmin(stableford_totals, axis=2)].ravel()
+    })
+    winners.insert(2, 'TEG', 'TEG ' + winners['TEGNum'].astype(str))
+
+    logger.info("Handicap scenarios evaluated.")
+    return {'teg_results': teg_results, 'winners': winners}
+
+
+def compare_scenario_winners(winners: pd.DataFrame, scenario: str, baseline: str = ACTUAL_SCENARIO) -> pd.DataFrame:
+    """
+    Put a scenario's winners next to the baseline winners for each TEG.
+
+    Parameters:
+        winners (pd.DataFrame): The 'winners' output of evaluate_handicap_scenarios.
+        scenario (str): Name of the scenario to compare.
+        baseline (str): Name of the baseline scenario. Defaults to the actual handicaps.
+
+    Returns:
+        pd.DataFrame: One row per TEG with baseline and scenario Trophy and Spoon winners and a 'Changed' flag.
+    """
+    competitions = ['TEG Trophy', 'HMM Wooden Spoon']
+    base = winners[winners['Scenario'] == baseline].set_index(['TEGNum', 'TEG'])[competitions]
+    alt = winners[winners['Scenario'] == scenario].set_index(['TEGNum', 'TEG'])[competitions]
+
+    comparison = base.join(alt, lsuffix=f' ({baseline})', rsuffix=f' ({scenario})').reset_index().sort_values('TEGNum')
+    comparison['Changed'] = np.any([comparison[f'{c} ({baseline})'] != comparison[f'{c} ({scenario})'] for c in competitions], axis=0)
+    return comparison.drop(columns='TEGNum')
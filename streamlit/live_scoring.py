@@ -0,0 +1,387 @@
+import os
+import threading
+import logging
+from datetime import datetime
+from typing import Optional, Any, Callable, Dict, List, Tuple
+import pandas as pd
+import streamlit as st
+from utils import (
+    BASE_DIR,
+    fetch_sheet_blocks,
+    new_sheet_fetch_state,
+    process_round_for_all_scores,
+    load_and_prepare_handicap_data,
+    load_all_data,
+    get_data_version,
+    add_round_info,
+    upsert_hole_scores,
+    build_leaderboard,
+    LEADERBOARD_MEASURES
+)
+
+# Configure Logging
+logger = logging.getLogger(__name__)
+
+# Constants
+LIVE_SHEET_NAME = "TEG Round Input"
+LIVE_WORKSHEET_NAME = "Scores"
+LIVE_ID_VARS = ['TEGNum', 'Round', 'Hole', 'Par', 'SI']
+LIVE_POLL_SECONDS = 15
+HANDICAPS_PATH = os.path.join(BASE_DIR, "../data/handicaps.csv")
+HOLE_KEY = ['TEGNum', 'Round', 'Pl', 'Hole']
+MEASURES = ['Sc', 'GrossVP', 'NetVP', 'Stableford']
+LIVE_LEADERBOARDS = ['Stableford', 'GrossVP']  # TEG Trophy and Green Jacket
+
+
+class LiveScoringWorker(threading.Thread):
+    """
+    Background worker that polls the score sheet every `poll_seconds` and keeps an in-memory copy of the
+    hole-level data with the live scores for the TEG in progress upserted into it.
+
+    Only holes that are new or whose score differs from the data held (the saved data plus earlier polls) are
+    passed through process_round_for_all_scores and upsert_hole_scores, so each poll costs O(new holes) once
+    the sheet has been fetched, and TEGs already saved do not become live. Holes cleared from the sheet are
+    dropped again, reverting to the saved score if there is one. Rows from rounds that are still in play are
+    flagged as provisional.
+
+    The worker keeps its own sheet fetch state, so fetches made elsewhere (e.g. the Data update page) do not
+    hide changes from it. When the saved data changes (an ingest from any process) the held data is reseeded
+    from it on the next poll, with the handicaps reloaded and the live holes applied again.
+
+    After each ingest the live leaderboards are rebuilt and the changes since the previous ingest are passed
+    to any listeners added with add_listener, so clients can be pushed deltas rather than polling.
+    """
+
+    def __init__(self, poll_seconds: int = LIVE_POLL_SECONDS, client: Optional[Any] = None):
+        super().__init__(name="live-scoring-worker", daemon=True)
+        self.poll_seconds = poll_seconds
+        self.client = client
+        self.fetch_state = new_sheet_fetch_state()
+        self.hc_long: Optional[pd.DataFrame] = None
+        self.live_data = pd.DataFrame()
+        self.data: Optional[pd.DataFrame] = None
+        self.data_version: Optional[str] = None  # Version of the saved data self.data was seeded from
+        self.version = 0
+        self.last_update: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._leaderboards: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self._listeners: List[Callable[[dict], None]] = []
+
+    def run(self) -> None:
+        logger.info(f"Live scoring worker started. Polling every {self.poll_seconds}s.")
+        while not self._stop_event.is_set():
+            try:
+                self.poll_once()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Live scoring poll failed: {e}")
+            self._stop_event.wait(self.poll_seconds)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def poll_once(self) -> bool:
+        """
+        Fetch the score sheet once and ingest any new, changed or cleared holes, after reseeding the held data
+        if the saved data has changed.
+
+        Returns:
+            bool: True if the held data or the live table changed.
+        """
+        reseeded = self.refresh_base()
+        long_df, changed_blocks = fetch_sheet_blocks(LIVE_SHEET_NAME, LIVE_WORKSHEET_NAME, LIVE_ID_VARS,
+                                                     client=self.client, state=self.fetch_state)
+        if not changed_blocks:
+            return reseeded
+
+        with self._lock:
+            base = self.data
+            live_data = self.live_data
+
+        # Restrict to the (TEGNum, Round) blocks that changed, then to holes not already held with the same score
+        block_index = pd.MultiIndex.from_tuples(changed_blocks, names=['TEGNum', 'Round'])
+        candidates = long_df[long_df.set_index(['TEGNum', 'Round']).index.isin(block_index)]
+        new_holes = new_hole_scores(candidates, base)
+        cleared = cleared_live_holes(live_data, long_df)
+        if new_holes.empty and cleared.empty:
+            return reseeded
+
+        processed = self.process_holes(new_holes)
+
+        # Cleared holes go back to their saved score, if they had one
+        new_rows = processed
+        if not cleared.empty:
+            saved = load_all_data()
+            restored = saved[saved.set_index(HOLE_KEY).index.isin(cleared.set_index(HOLE_KEY).index)]
+            if not restored.empty:
+                new_rows = restored if processed.empty else pd.concat([processed, restored], ignore_index=True)
+
+        with self._lock:
+            self.data = upsert_hole_scores(base, new_rows, remove=cleared)
+            self.live_data = upsert_live_holes(live_data, processed, cleared)
+            self.version += 1
+            self.last_update = datetime.now()
+
+        logger.info(f"Live scoring ingested {len(new_holes)} holes and cleared {len(cleared)} (version {self.version}).")
+        self.publish_leaderboards()
+        return True
+
+    def refresh_base(self) -> bool:
+        """
+        Reseed the held data from the saved data if it has changed since it was loaded, and reload the
+        handicaps. Live holes the saved data now holds with the same score stop being live; the rest are
+        processed again with the current handicaps and upserted into the fresh data.
+
+        Returns:
+            bool: True if the held data was reseeded (other than the first time it is loaded).
+        """
+        data_version = get_data_version()
+        if data_version == self.data_version:
+            return False
+
+        saved = load_all_data()
+        self.hc_long = load_and_prepare_handicap_data(HANDICAPS_PATH)
+        with self._lock:
+            live_data = self.live_data
+        if not live_data.empty:
+            saved_scores = saved.set_index(HOLE_KEY + ['Sc']).index
+            live_data = live_data[~live_data.set_index(HOLE_KEY + ['Sc']).index.isin(saved_scores)]
+            sheet_rows = live_data[['TEGNum', 'Round', 'Hole', 'PAR', 'SI', 'Pl', 'Sc']].rename(
+                columns={'PAR': 'Par', 'Sc': 'Score'})
+            live_data = self.process_holes(sheet_rows.reset_index(drop=True))
+        data = upsert_hole_scores(saved, live_data) if not live_data.empty else saved
+
+        first_load = self.data_version is None
+        with self._lock:
+            self.data = data
+            self.live_data = live_data
+            self.data_version = data_version
+            if not first_load:
+                self.version += 1
+                self.last_update = datetime.now()
+
+        if first_load:
+            return False
+        logger.info(f"Saved data changed; live scoring reseeded with {len(live_data)} live holes (version {self.version}).")
+        self.publish_leaderboards()
+        return True
+
+    def process_holes(self, sheet_rows: pd.DataFrame) -> pd.DataFrame:
+        """
+        Turn long-format sheet rows (as from fetch_sheet_blocks) into hole rows with round info and Year.
+        """
+        if sheet_rows.empty:
+            return sheet_rows
+        processed = process_round_for_all_scores(sheet_rows.copy(), self.hc_long)
+        processed = add_round_info(processed)
+        processed['Year'] = pd.to_datetime(processed['Date'], dayfirst=True, errors='coerce').dt.year.astype('Int64')
+        return processed
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        """
+        Call `listener` with each leaderboard delta event (see leaderboard_deltas) after every ingest.
+        Listeners run on the worker thread, so they should only hand the event off (e.g. to a queue).
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[dict], None]) -> None:
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def publish_leaderboards(self) -> None:
+        """
+        Rebuild the live leaderboards from the current snapshot and send the changes to the listeners.
+        """
+        data, live_data, version = self.snapshot()
+        if data is None:
+            return
+        # With no live scores left (e.g. the round was saved or cleared) every board is removed
+        leaderboards = {} if live_data.empty else build_live_leaderboards(data, live_data)
+        with self._lock:
+            events = leaderboard_deltas(self._leaderboards, leaderboards, version)
+            self._leaderboards = leaderboards
+            listeners = list(self._listeners)
+
+        for event in events:
+            for listener in listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    logger.error(f"Live leaderboard listener failed: {e}")
+
+    def leaderboard_snapshot(self) -> List[dict]:
+        """
+        Return the current live leaderboards as delta events against an empty board, for a client that has
+        just subscribed.
+        """
+        with self._lock:
+            return leaderboard_deltas({}, self._leaderboards, self.version)
+
+    def snapshot(self) -> Tuple[pd.DataFrame, pd.DataFrame, int]:
+        """
+        Return the hole-level data including live scores (None before the first poll), the live rows
+        on their own, and the version number.
+        """
+        with self._lock:
+            return self.data, self.live_data, self.version
+
+
+def new_hole_scores(candidates: pd.DataFrame, held: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return the rows of `candidates` (long-format sheet rows with a Score) that are not already in `held` with the
+    same score.
+
+    Parameters:
+        candidates (pd.DataFrame): Sheet rows from fetch_sheet_blocks.
+        held (pd.DataFrame): Hole-level data already held: the saved data with any live scores upserted.
+
+    Returns:
+        pd.DataFrame: The new or changed holes.
+    """
+    if candidates.empty or held.empty:
+        return candidates
+
+    in_tegs = held['TEGNum'].isin(candidates['TEGNum'].unique())
+    known = held.loc[in_tegs, HOLE_KEY + ['Sc']].rename(columns={'Sc': 'Score'})
+    merged = candidates.merge(known, on=HOLE_KEY + ['Score'], how='left', indicator=True)
+    return merged[merged['_merge'] == 'left_only'].drop(columns=['_merge'])
+
+
+def cleared_live_holes(live_data: pd.DataFrame, long_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return the keys (TEGNum, Round, Pl, Hole) of live holes that are no longer in the score sheet.
+    """
+    if live_data.empty:
+        return pd.DataFrame(columns=HOLE_KEY)
+
+    in_sheet = live_data.set_index(HOLE_KEY).index.isin(long_df.set_index(HOLE_KEY).index)
+    return live_data.loc[~in_sheet, HOLE_KEY].reset_index(drop=True)
+
+
+def upsert_live_holes(live_data: pd.DataFrame, new_rows: pd.DataFrame, removed: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Replace or append processed hole rows in the live table, keyed by TEGNum, Round, Pl and Hole, and drop
+    any removed holes.
+
+    Parameters:
+        live_data (pd.DataFrame): The current live table.
+        new_rows (pd.DataFrame): Processed hole rows to upsert.
+        removed (pd.DataFrame, optional): Keys of holes to drop, from cleared_live_holes.
+
+    Returns:
+        pd.DataFrame: The updated live table.
+    """
+    if live_data.empty:
+        return new_rows.reset_index(drop=True)
+
+    live_keys = live_data.set_index(HOLE_KEY).index
+    dropped = live_keys.isin(new_rows.set_index(HOLE_KEY).index)
+    if removed is not None and not removed.empty:
+        dropped |= live_keys.isin(removed.set_index(HOLE_KEY).index)
+    if new_rows.empty:
+        return live_data[~dropped].reset_index(drop=True)
+    return pd.concat([live_data[~dropped], new_rows], ignore_index=True)
+
+
+def merge_live_round_data(round_df: pd.DataFrame, merged_data: pd.DataFrame, live_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Replace the round-level rows of TEGs with live scores by aggregating the merged hole-level data.
+
+    Parameters:
+        round_df (pd.DataFrame): Stored round-level data, as returned by get_round_data.
+        merged_data (pd.DataFrame): Hole-level data including live scores, from LiveScoringWorker.snapshot().
+        live_data (pd.DataFrame): The live table from LiveScoringWorker.snapshot().
+
+    Returns:
+        pd.DataFrame: Round-level data including the live rounds.
+    """
+    if live_data.empty:
+        return round_df
+
+    live_tegs = live_data['TEGNum'].unique()
+    live_rounds = (merged_data[merged_data['TEGNum'].isin(live_tegs)]
+                   .groupby(['Player', 'Pl', 'TEGNum', 'TEG', 'Round'], as_index=False)[MEASURES].sum())
+    return pd.concat([round_df[~round_df['TEGNum'].isin(live_tegs)], live_rounds], ignore_index=True)
+
+
+def build_live_leaderboards(merged_data: pd.DataFrame, live_data: pd.DataFrame) -> Dict[Tuple[str, str], pd.DataFrame]:
+    """
+    Build the Trophy and Jacket leaderboards of each TEG with live scores.
+
+    Parameters:
+        merged_data (pd.DataFrame): Hole-level data including live scores, from LiveScoringWorker.snapshot().
+        live_data (pd.DataFrame): The live table from LiveScoringWorker.snapshot().
+
+    Returns:
+        dict: Leaderboard indexed by Player (as returned by build_leaderboard), keyed by (TEG, measure).
+    """
+    live_tegs = live_data['TEGNum'].unique()
+    live_rounds = (merged_data[merged_data['TEGNum'].isin(live_tegs)]
+                   .groupby(['Player', 'Pl', 'TEGNum', 'TEG', 'Round'], as_index=False)[MEASURES].sum())
+    return {(teg, measure): build_leaderboard(teg_rounds, measure, LEADERBOARD_MEASURES[measure]).set_index('Player')
+            for teg, teg_rounds in live_rounds.groupby('TEG') for measure in LIVE_LEADERBOARDS}
+
+
+def leaderboard_deltas(previous: Dict[Tuple[str, str], pd.DataFrame], current: Dict[Tuple[str, str], pd.DataFrame],
+                       version: int) -> List[dict]:
+    """
+    Compare two sets of live leaderboards and describe what changed, one event per leaderboard with changes.
+
+    Each event is {'teg', 'measure', 'version', 'changes'}, where changes lists the players whose rank or scores
+    moved: their new Rank and Total, Previous Rank (None for a player new to the board), and only the round
+    totals (R1, R2, ...) that changed. A player who has left a board is listed with 'Removed': True and a Rank
+    and Total of None. A board that is no longer live gets an event with 'removed': True and no changes.
+
+    Parameters:
+        previous (dict): Leaderboards from the previous ingest, as returned by build_live_leaderboards.
+        current (dict): Leaderboards from this ingest.
+        version (int): The live data version the current leaderboards were built from.
+
+    Returns:
+        list: Delta events, empty if nothing changed.
+    """
+    events = []
+    for (teg, measure), board in current.items():
+        before_board = previous.get((teg, measure), pd.DataFrame(columns=board.columns))
+        before = before_board.reindex(index=board.index, columns=board.columns)
+        changed = (board.astype(object) != before.astype(object)) & ~(board.isna() & before.isna())
+        changes = []
+        for player in board.index[changed.any(axis=1)]:
+            rounds = {col: float(board.at[player, col]) for col in board.columns
+                      if col.startswith('R') and col != 'Rank' and changed.at[player, col]}
+            previous_rank = before.at[player, 'Rank']
+            changes.append({
+                'Player': player,
+                'Rank': str(board.at[player, 'Rank']),
+                'Previous Rank': None if pd.isna(previous_rank) else str(previous_rank),
+                'Total': float(board.at[player, 'Total']),
+                **rounds
+            })
+        for player in before_board.index.difference(board.index):
+            changes.append({
+                'Player': player,
+                'Rank': None,
+                'Previous Rank': str(before_board.at[player, 'Rank']),
+                'Total': None,
+                'Removed': True
+            })
+        if changes:
+            events.append({'teg': teg, 'measure': measure, 'version': version, 'changes': changes})
+    for teg, measure in [key for key in previous if key not in current]:
+        events.append({'teg': teg, 'measure': measure, 'version': version, 'removed': True, 'changes': []})
+    return events
+
+
+@st.cache_resource(show_spinner=False)
+def get_live_worker(poll_seconds: int = LIVE_POLL_SECONDS) -> LiveScoringWorker:
+    """
+    Start the live scoring worker once per server process and return it.
+    """
+    worker = LiveScoringWorker(poll_seconds)
+    worker.start()
+    return worker
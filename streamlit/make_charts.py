@@ -2,13 +2,9 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-
-def add_round_annotations(fig, max_round):
-    for round_num in range(1, max_round + 1):
-        x_pos = (round_num - 1) * 18
-        fig.add_vline(x=x_pos, line=dict(color='lightgrey', width=1))
-        fig.add_annotation(x=x_pos + 9, y=0.11, text=f'Round {round_num}', 
-                           showarrow=False, yref='paper', yshift=-40)
+from utils import build_race_series, load_race_series
+from chart_cache import plotly_figure
+from timing import timed
 
 def format_value(value, chart_type):
     if chart_type == 'stableford':
@@ -23,77 +19,108 @@ def format_value(value, chart_type):
     else:
         return f"{value:.0f}"  # Default formatting
 
-def create_cumulative_graph(df, chosen_teg, y_series, title, y_calculation=None, y_axis_label=None, chart_type='default'):
-    # Filter data based on the chosen TEG
-    teg_data = df[df['TEG'] == chosen_teg].sort_values(['Round', 'Hole'])
-    teg_data['x_value'] = (teg_data['Round'] - 1) * 18 + teg_data['Hole']  # Create x-axis value based on rounds and holes
+# Title, axis label and value format for each precomputed race series
+RACE_CHARTS = {
+    'Stableford Cum TEG': dict(title='Trophy race: {teg}', y_axis_label='Cumulative Stableford Points', chart_type='stableford'),
+    'Adjusted Stableford': dict(title='Trophy race (Adjusted scale): {teg}', y_axis_label='Cumulative Stableford Points vs. net par', chart_type='stableford'),
+    'GrossVP Cum TEG': dict(title='Green Jacket race: {teg}', y_axis_label='Cumulative gross vs par', chart_type='gross'),
+    'Adjusted GrossVP': dict(title='Green Jacket race (Adjusted scale): {teg}', y_axis_label='Cumulative gross vs. bogey golf (par+1)', chart_type='gross'),
+}
 
-    max_round = teg_data['Round'].max()
-    x_axis_max = max_round * 18
+@timed
+def build_race_figure(teg_series, y_series, title, y_axis_label=None, chart_type='default'):
+    """
+    Build a race chart for one TEG in a single pass. Traces, end labels, round lines and round labels are
+    all created up front and handed to the figure together, so there are no per-player layout updates.
 
-    fig = go.Figure()
-
-    # Generate color palette for players
-    colors = px.colors.qualitative.Plotly[:len(teg_data['Pl'].unique())]
-    color_map = dict(zip(teg_data['Pl'].unique(), colors))
+    teg_series holds one row per player and hole with 'Pl', 'Round', 'x_value' and the y_series column,
+    sorted by x_value (see utils.build_race_series).
+    """
+    players = teg_series['Pl'].unique()
+    colors = px.colors.qualitative.Plotly
+    color_map = {player: colors[i % len(colors)] for i, player in enumerate(players)}
 
     traces = []
-    for player in teg_data['Pl'].unique():
-        player_data = teg_data[teg_data['Pl'] == player]
-        
-        # Apply custom y-calculation if provided
-        if y_calculation:
-            y_values = y_calculation(player_data)
-        else:
-            y_values = player_data[y_series]
-        
+    annotations = []
+    for player, player_data in teg_series.groupby('Pl', sort=False):
+        x_values = player_data['x_value'].to_numpy()
+        y_values = player_data[y_series].to_numpy()
+
         traces.append(go.Scatter(
-            x=player_data['x_value'],
+            x=x_values,
             y=y_values,
             mode='lines',
             name=player,
-            line=dict(width=2),
+            line=dict(width=2, color=color_map[player]),
         ))
-        
-        # Add end label
-        last_x = player_data['x_value'].iloc[-1]
-        last_y = y_values.iloc[-1]
-        formatted_value = format_value(last_y, chart_type)
-        fig.add_annotation(
-            x=last_x,
-            y=last_y,
-            text=f"{player}: {formatted_value}",
+
+        # End label
+        annotations.append(dict(
+            x=x_values[-1],
+            y=y_values[-1],
+            text=f"{player}: {format_value(y_values[-1], chart_type)}",
             showarrow=False,
             xanchor='left',
             yanchor='middle',
             xshift=5,
-            font=dict(
-                size=10,  # Increased from 8 to 10
-                color=color_map[player]
-            )
-        )
+            font=dict(size=10, color=color_map[player])
+        ))
 
-    fig.add_traces(traces)
+    max_round = int(teg_series['Round'].max())
+    shapes = []
+    for round_num in range(1, max_round + 1):
+        x_pos = (round_num - 1) * 18
+        shapes.append(dict(type='line', x0=x_pos, x1=x_pos, xref='x', y0=0, y1=1, yref='paper',
+                           line=dict(color='lightgrey', width=1)))
+        annotations.append(dict(x=x_pos + 9, y=0.11, text=f'Round {round_num}',
+                                showarrow=False, yref='paper', yshift=-40))
 
-    fig.update_layout(
+    layout = go.Layout(
         title=title,
-        xaxis_title='Rounds',
-        yaxis_title=y_axis_label if y_axis_label else f'Cumulative {y_series}',
+        xaxis=dict(title='Rounds', tickvals=[], range=[0, max_round * 18]),
+        yaxis=dict(title=y_axis_label if y_axis_label else f'Cumulative {y_series}'),
         hovermode='x unified',
         legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0, traceorder='normal', itemsizing='constant'),
-        margin=dict(r=100)
+        margin=dict(r=100),
+        annotations=annotations,
+        shapes=shapes
     )
 
-    add_round_annotations(fig, max_round)
+    return go.Figure(data=traces, layout=layout)
+
+@timed
+def get_race_chart(chosen_teg, y_series, data_version, all_data=None):
+    """
+    Return the race chart for a TEG and one of the RACE_CHARTS series from the chart cache, keyed by
+    (TEG, series, data version).
+
+    By default the precomputed race series for the data version is used. Pass all_data (e.g. hole-level data
+    including live scores) with a data_version that identifies it to build the series from that data instead.
+    """
+    def build():
+        if all_data is None:
+            race_series = load_race_series(data_version)
+            teg_series = race_series[race_series['TEG'] == chosen_teg]
+        else:
+            teg_series = build_race_series(all_data[all_data['TEG'] == chosen_teg])
+
+        chart = RACE_CHARTS[y_series]
+        return build_race_figure(teg_series, y_series, chart['title'].format(teg=chosen_teg),
+                                 y_axis_label=chart['y_axis_label'], chart_type=chart['chart_type'])
+
+    return plotly_figure('race_chart', {'teg': chosen_teg, 'series': y_series}, data_version, build)
 
-    fig.update_xaxes(tickvals=[], range=[0, x_axis_max])
+@timed
+def create_cumulative_graph(df, chosen_teg, y_series, title, y_calculation=None, y_axis_label=None, chart_type='default'):
+    # Filter data based on the chosen TEG
+    teg_data = df[df['TEG'] == chosen_teg].sort_values(['Round', 'Hole'])
+    teg_series = teg_data[['Pl', 'Round']].copy()
+    teg_series['x_value'] = (teg_data['Round'] - 1) * 18 + teg_data['Hole']  # Create x-axis value based on rounds and holes
 
-    for trace in fig.data:
-        player = trace.name
-        color = color_map[player]
-        fig.update_traces(selector=dict(name=player), line=dict(color=color))
+    # Apply custom y-calculation if provided
+    teg_series[y_series] = y_calculation(teg_data) if y_calculation else teg_data[y_series]
 
-    return fig
+    return build_race_figure(teg_series, y_series, title, y_axis_label=y_axis_label, chart_type=chart_type)
 
 # Define custom calculations
 def adjusted_stableford(data):
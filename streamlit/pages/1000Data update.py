@@ -6,14 +6,25 @@ from pathlib import Path
 from typing import Optional
 from utils import (
     process_round_for_all_scores,
-    get_google_sheet,
-    reshape_round_data,
+    fetch_sheet_blocks,
     load_and_prepare_handicap_data,
     summarise_existing_rd_data,
-    update_all_data,
-    check_for_complete_and_duplicate_data,
+    mark_provisional,
+    load_score_hashes,
+    save_score_hashes,
+    compare_score_blocks,
+    upsert_all_data,
+    load_records_broken,
+    validate_data_integrity,
+    INTEGRITY_CHECKS,
+    INTEGRITY_WARNINGS,
     get_base_directory
 )
+from warmup import run_warmup
+from timing import start_run, show_timings, debug_enabled
+from cache_inspector import clear_caches
+
+start_run('Data update')
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO)
@@ -46,12 +57,14 @@ ALL_SCORES_PATH = BASE_DIR / 'data' / 'all-scores.csv'
 HANDICAPS_PATH = BASE_DIR / 'data' / 'handicaps.csv'
 PARQUET_FILE = BASE_DIR / 'data' / 'all-data.parquet'
 CSV_OUTPUT_FILE = BASE_DIR / 'data' / 'all-data.csv'
+SCORE_HASHES_PATH = BASE_DIR / 'data' / 'score-hashes.csv'
 
 # Initialize Session State
 def initialize_session_state():
     default_states = {
         "data_loaded": False,
-        "rounds_with_18_holes": None,
+        "rounds_loaded": None,
+        "block_status": None,
         "continue_processing": False,
         "overwrite_data": False,
         "overwrite_step_done": False,
@@ -64,20 +77,23 @@ def initialize_session_state():
 
 initialize_session_state()
 
-# Optional: Enable Debugging Mode
-DEBUG_MODE = False
+# Optional: Enable Debugging Mode (TEG_DEBUG=1 or ?debug=1)
+DEBUG_MODE = debug_enabled()
 if DEBUG_MODE:
     st.write("### Session State:", st.session_state)
 
 # Function Definitions
 
 #@st.cache_data(show_spinner=False)
-def load_google_sheet(sheet_name: str, worksheet_name: str) -> pd.DataFrame:
+def load_google_sheet(sheet_name: str, worksheet_name: str, id_vars: list) -> pd.DataFrame:
     """
-    Load data from a specified Google Sheet and worksheet.
+    Load data from a specified Google Sheet and worksheet in long format.
+    Only blocks that changed since the last load are downloaded and reshaped again.
     """
     logger.info("Fetching data from Google Sheets.")
-    return get_google_sheet(sheet_name, worksheet_name)
+    long_df, changed_blocks = fetch_sheet_blocks(sheet_name, worksheet_name, id_vars)
+    logger.info(f"Changed (TEGNum, Round) blocks since last load: {changed_blocks}")
+    return long_df
 
 #@st.cache_data(show_spinner=False)
 def load_handicap_data(path: str) -> pd.DataFrame:
@@ -87,22 +103,22 @@ def load_handicap_data(path: str) -> pd.DataFrame:
     logger.info("Loading handicap data.")
     return load_and_prepare_handicap_data(path)
 
-def remove_duplicates(existing_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
+def remove_duplicates(existing_df: pd.DataFrame, new_df: pd.DataFrame, keys: list = ['TEGNum', 'Round']) -> pd.DataFrame:
     """
-    Remove duplicates from existing_df based on TEGNum and Round present in new_df.
+    Remove duplicates from existing_df based on the key combinations (default TEGNum and Round) present in new_df.
     """
     logger.info("Identifying duplicates.")
     duplicates = existing_df.merge(
-        new_df,
-        on=['TEGNum', 'Round'],
+        new_df[keys],
+        on=keys,
         how='inner',
         indicator=True
     )
     if not duplicates.empty:
         logger.info(f"Found {len(duplicates)} duplicates. Removing them.")
         existing_df = existing_df.merge(
-            new_df,
-            on=['TEGNum', 'Round'],
+            new_df[keys],
+            on=keys,
             how='left',
             indicator=True
         )
@@ -111,6 +127,26 @@ def remove_duplicates(existing_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.Dat
         logger.info("No duplicates found.")
     return existing_df, duplicates
 
+def display_integrity_report(report: dict) -> bool:
+    """
+    Show the result of validate_data_integrity. Returns True if no errors were found (warnings allowed).
+    """
+    errors = [check for check, problems in report.items() if not problems.empty and check not in INTEGRITY_WARNINGS]
+    warnings = [check for check, problems in report.items() if not problems.empty and check in INTEGRITY_WARNINGS]
+
+    if errors:
+        st.error("⚠️ **Data Integrity Issues Detected:**")
+    for check in errors:
+        st.error(f"❗ {INTEGRITY_CHECKS[check]}: {len(report[check])} found.")
+        st.dataframe(report[check])
+    for check in warnings:
+        st.warning(f"ℹ️ {INTEGRITY_CHECKS[check]}: {len(report[check])} found.")
+        st.dataframe(report[check])
+    if not errors:
+        st.success("✅ **Data Integrity Check Passed. No issues found.**" if not warnings else "✅ **Data Integrity Check Passed.**")
+    return not errors
+
+
 # Streamlit App Title
 st.title("🏌️‍♂️ TEG Round Data Processing")
 #st.write(st.secrets)
@@ -119,32 +155,44 @@ try:
     if not st.session_state.data_loaded:
         if st.button("🔄 Load Data", key="load_data_btn"):
             with st.spinner("Loading data from Google Sheets..."):
-                df = load_google_sheet("TEG Round Input", "Scores")
+                long_df = load_google_sheet("TEG Round Input", "Scores", ['TEGNum', 'Round', 'Hole', 'Par', 'SI'])
                 st.success("✅ Data loaded from Google Sheets.")
-
-                # Reshape to Long Format
-                long_df = reshape_round_data(df, ['TEGNum', 'Round', 'Hole', 'Par', 'SI'])
                 st.info("🔄 Data reshaped to long format.")
 
                 # Filter Scores
                 long_df = long_df.dropna(subset=['Score'])[long_df['Score'] != 0]
                 st.info("📊 Filtered out scores that are 0 or blank.")
 
-                # Check for 18 Holes
-                rounds_with_18_holes = long_df.groupby(['TEGNum', 'Round', 'Pl']).filter(lambda x: len(x) == 18)
-
-                if rounds_with_18_holes.empty:
+                if long_df.empty:
                     st.error("❌ No valid rounds found. Please check the data and try again.")
                     st.stop()
 
+                # Skip (TEGNum, Round, Pl) blocks whose scores match what is already stored
+                block_status = compare_score_blocks(long_df, load_score_hashes(SCORE_HASHES_PATH, ALL_SCORES_PATH))
+                unchanged = block_status[block_status['Status'] == 'unchanged']
+                if not unchanged.empty:
+                    st.info(f"⏭️ Skipping {len(unchanged)} player round(s) with no changes since the last update.")
+                block_status = block_status[block_status['Status'] != 'unchanged']
+                if block_status.empty:
+                    st.success("✅ No new or changed scores. Nothing to update.")
+                    st.stop()
+                long_df = long_df.merge(block_status[['TEGNum', 'Round', 'Pl']], on=['TEGNum', 'Round', 'Pl'])
+
+                # Keep partial rounds, flagged as provisional until all 18 holes are in
+                rounds_loaded = mark_provisional(long_df)
+                partial_rounds = rounds_loaded.loc[rounds_loaded['Provisional'], ['TEGNum', 'Round', 'Pl']].drop_duplicates()
+                if not partial_rounds.empty:
+                    st.info(f"⏳ {len(partial_rounds)} partial round(s) will be saved as provisional.")
+
                 # Update Session State
-                st.session_state.rounds_with_18_holes = rounds_with_18_holes
+                st.session_state.rounds_loaded = rounds_loaded
+                st.session_state.block_status = block_status
                 st.session_state.data_loaded = True
                 st.success("✅ Data loaded and processed successfully.")
 
     # Step 2: Show Summary and Continue/Cancel Buttons
     if st.session_state.data_loaded and not st.session_state.continue_processing and not st.session_state.overwrite_step_done:
-        summary_df = st.session_state.rounds_with_18_holes.groupby(['TEGNum', 'Round', 'Pl'])['Score'].sum().reset_index()
+        summary_df = st.session_state.rounds_loaded.groupby(['TEGNum', 'Round', 'Pl'])['Score'].sum().reset_index()
         summary_pivot = summary_df.pivot(index='Pl', columns=['Round', 'TEGNum'], values='Score').fillna('-')
 
         st.write("### 📊 Score Summary by Player, Round, and TEG:")
@@ -161,7 +209,7 @@ try:
                 st.warning("❌ Process cancelled by user.")
                 # Reset relevant session state
                 st.session_state.data_loaded = False
-                st.session_state.rounds_with_18_holes = None
+                st.session_state.rounds_loaded = None
                 st.stop()
 
     # Step 3: Check for Existing Data Upon Continuing
@@ -176,17 +224,18 @@ try:
                 st.error(f"❌ File not found: {ALL_SCORES_PATH}. Please ensure the file exists.")
                 st.stop()
 
-        # Identify New TEG & Round Combinations
-        new_tegs_rounds = st.session_state.rounds_with_18_holes[['TEGNum', 'Round']].drop_duplicates()
+        # Identify the new and changed (TEGNum, Round, Pl) blocks; unchanged blocks were skipped on load
+        block_keys = ['TEGNum', 'Round', 'Pl']
+        new_blocks = st.session_state.block_status[block_keys].copy()
 
         # Ensure consistent data types
         all_scores_df['TEGNum'] = all_scores_df['TEGNum'].astype(str).str.strip()
         all_scores_df['Round'] = all_scores_df['Round'].astype(str).str.strip()
-        new_tegs_rounds['TEGNum'] = new_tegs_rounds['TEGNum'].astype(str).str.strip()
-        new_tegs_rounds['Round'] = new_tegs_rounds['Round'].astype(str).str.strip()
+        new_blocks['TEGNum'] = new_blocks['TEGNum'].astype(str).str.strip()
+        new_blocks['Round'] = new_blocks['Round'].astype(str).str.strip()
 
-        # Identify duplicates
-        all_scores_df, duplicates = remove_duplicates(all_scores_df, new_tegs_rounds)
+        # Identify duplicates: only blocks whose scores actually differ from the stored ones
+        all_scores_df, duplicates = remove_duplicates(all_scores_df, new_blocks, keys=block_keys)
 
         if not duplicates.empty and not st.session_state.overwrite_data:
             st.write("### ⚠️ Existing Data Found:")
@@ -211,7 +260,7 @@ try:
             # Remove duplicates if overwrite is confirmed
             if st.session_state.overwrite_data:
                 with st.spinner("🗑️ Removing duplicates..."):
-                    all_scores_df, _ = remove_duplicates(all_scores_df, new_tegs_rounds)
+                    all_scores_df, _ = remove_duplicates(all_scores_df, new_blocks, keys=block_keys)
                     st.success("🗑️ Duplicates removed successfully.")
                 # Reset overwrite flag
                 st.session_state.overwrite_data = False
@@ -223,7 +272,7 @@ try:
 
             # Process Rounds
             with st.spinner("🔄 Processing rounds..."):
-                processed_rounds = process_round_for_all_scores(st.session_state.rounds_with_18_holes, hc_long)
+                processed_rounds = process_round_for_all_scores(st.session_state.rounds_loaded, hc_long)
                 st.success("🔄 Rounds processed successfully.")
 
             if not processed_rounds.empty:
@@ -235,10 +284,34 @@ try:
                 all_scores_df.to_csv(ALL_SCORES_PATH, index=False)
                 st.success(f"✅ Updated data saved to {ALL_SCORES_PATH}.")
 
-                # Run the update_all_data process
+                # Upsert the new rounds into all-data, recomputing cumulative columns only where needed
                 with st.spinner("💾 Updating all-data..."):
-                    update_all_data(ALL_SCORES_PATH, PARQUET_FILE, CSV_OUTPUT_FILE)
+                    ingest_started = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+                    updated_data = upsert_all_data(processed_rounds, PARQUET_FILE, CSV_OUTPUT_FILE, replace_on=block_keys)
                     st.success("💾 All-data updated and CSV created.")
+
+                # Show any records the new rounds broke, found by upsert_all_data against the record index
+                records_broken = load_records_broken(since=ingest_started)
+                if records_broken.empty:
+                    st.write("🏆 No records broken.")
+                else:
+                    st.success(f"🏆 {len(records_broken)} record(s) broken or equalled.")
+                    st.dataframe(records_broken.drop(columns=['Detected']), hide_index=True)
+
+                # Record the hashes of the saved blocks so unchanged scores are skipped next time
+                save_score_hashes(load_score_hashes(SCORE_HASHES_PATH, ALL_SCORES_PATH), st.session_state.block_status[block_keys + ['Hash']], SCORE_HASHES_PATH)
+
+                # Validate the rounds just loaded
+                with st.spinner("🔍 Checking the updated rounds..."):
+                    display_integrity_report(validate_data_integrity(updated_data, rounds=processed_rounds[['TEGNum', 'Round']]))
+
+                # Rebuild the cached datasets from the new data so no page loads on a cold cache
+                with st.spinner("🔥 Warming caches..."):
+                    clear_caches()
+                    warmup_report = run_warmup()
+                    st.success(f"🔥 {len(warmup_report)} cached datasets rebuilt in {warmup_report.attrs['elapsed']:.1f}s.")
+                    if DEBUG_MODE:
+                        st.dataframe(warmup_report)
             else:
                 st.warning("⚠️ No new records to append.")
 
@@ -246,7 +319,8 @@ try:
             st.session_state.continue_processing = False
             st.session_state.overwrite_step_done = False
             st.session_state.data_loaded = False
-            st.session_state.rounds_with_18_holes = None
+            st.session_state.rounds_loaded = None
+            st.session_state.block_status = None
 
 except Exception as e:
     logger.error(f"An unexpected error occurred: {e}")
@@ -257,44 +331,7 @@ st.write("---")
 st.write("### 🔍 Data Integrity Check")
 if st.button("🔍 Run Data Integrity Check", key="integrity_check_btn"):
     with st.spinner("🔍 Running data integrity checks..."):
-        summary = check_for_complete_and_duplicate_data(ALL_SCORES_PATH, PARQUET_FILE)
-
-        # Evaluate the summary dictionary to determine if there are issues
-        issues_found = False
-        issue_messages = []
-
-        if not summary['incomplete_scores'].empty:
-            issues_found = True
-            issue_messages.append("❗ Incomplete data found in **all-scores.csv**.")
-
-        if not summary['duplicate_scores'].empty:
-            issues_found = True
-            issue_messages.append("❗ Duplicate data found in **all-scores.csv**.")
-
-        if not summary['incomplete_data'].empty:
-            issues_found = True
-            issue_messages.append("❗ Incomplete data found in **all-data.parquet**.")
-
-        if not summary['duplicate_data'].empty:
-            issues_found = True
-            issue_messages.append("❗ Duplicate data found in **all-data.parquet**.")
-
-        if issues_found:
-            st.error("⚠️ **Data Integrity Issues Detected:**")
-            for msg in issue_messages:
-                st.error(msg)
-            # Optionally, display detailed tables
-            if not summary['incomplete_scores'].empty:
-                st.write("#### 📌 Incomplete Scores in all-scores.csv:")
-                st.dataframe(summary['incomplete_scores'])
-            if not summary['duplicate_scores'].empty:
-                st.write("#### 📌 Duplicate Scores in all-scores.csv:")
-                st.dataframe(summary['duplicate_scores'])
-            if not summary['incomplete_data'].empty:
-                st.write("#### 📌 Incomplete Data in all-data.parquet:")
-                st.dataframe(summary['incomplete_data'])
-            if not summary['duplicate_data'].empty:
-                st.write("#### 📌 Duplicate Data in all-data.parquet:")
-                st.dataframe(summary['duplicate_data'])
-        else:
-            st.success("✅ **Data Integrity Check Passed. No issues found.**")
+        report = validate_data_integrity(pd.read_parquet(PARQUET_FILE))
+        display_integrity_report(report)
+
+show_timings()
@@ -0,0 +1,66 @@
+import streamlit as st
+from cache_inspector import cache_report, column_report, clear_function, clear_caches, log_cache_report
+from timing import start_run, show_timings
+
+st.set_page_config(page_title="Cache Inspector")
+start_run('Cache Inspector')
+
+st.title("Cache Inspector")
+st.markdown('Every cached dataset held by this server, with its memory, hits and age. Use it to find the caches '
+            'to drop or slim down when the app is near its memory limit.')
+st.caption('Memory is the deep in-memory size of each dataset, measured when it was built. Datasets appear once '
+           'they have been loaded since the server started.')
+
+report = cache_report()
+
+'---'
+
+if report.empty:
+    st.info("Nothing has been cached yet. Open some pages (or run the cache warm-up) and come back.")
+else:
+    m1, m2, m3 = st.columns(3)
+    m1.metric('Cached datasets', len(report))
+    m2.metric('Total memory', f"{report['Memory MB'].sum():.1f} MB")
+    m3.metric('Hits', int(report['Hits'].sum()))
+
+    st.subheader('Datasets')
+    by_function = (report.groupby(['Function', 'Cache'], as_index=False)
+                   .agg(Entries=('Arguments', 'count'), Memory_MB=('Memory MB', 'sum'), Hits=('Hits', 'sum'))
+                   .rename(columns={'Memory_MB': 'Memory MB'}).sort_values('Memory MB', ascending=False))
+    tab_function, tab_entry = st.tabs(['By function', 'By entry'])
+    with tab_function:
+        st.dataframe(by_function, hide_index=True, use_container_width=True)
+    with tab_entry:
+        st.dataframe(report, hide_index=True, use_container_width=True)
+
+    '---'
+
+    st.subheader('Memory by column')
+    entries = (report['Function'] + report['Arguments']).tolist()
+    chosen = st.selectbox('Dataset', range(len(entries)), format_func=lambda i: entries[i])
+    columns = column_report(report.loc[chosen, 'Function'], report.loc[chosen, 'Arguments'])
+    st.dataframe(columns[['Column', 'Bytes', 'MB']], hide_index=True, use_container_width=True)
+    st.caption('Wide object (text) columns are usually the first candidates for categoricals or dropping.')
+
+    '---'
+
+    st.subheader('Drop caches')
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        function = st.selectbox('Function', by_function['Function'].tolist())
+    with col2:
+        st.write('')
+        if st.button('Clear', use_container_width=True):
+            clear_function(function)
+            st.rerun()
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button('Clear all data caches'):
+            clear_caches()
+            st.rerun()
+    with col2:
+        if st.button('Write report to the log'):
+            log_cache_report()
+            st.success('Cache report written to the server log.')
+
+show_timings()
@@ -1,40 +1,45 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from utils import load_all_data, get_teg_winners, get_teg_rounds, datawrapper_table_css
+from utils import get_teg_winners_data, datawrapper_table_css, get_data_version
+from chart_cache import altair_chart
+from timing import start_run, show_timings, timed_cache_data
+
+start_run('TEG History')
 
 # === LOAD DATA === #
-all_data = load_all_data(exclude_incomplete_tegs=True, exclude_teg_50=True)
-filtered_data = all_data.copy()
 datawrapper_table_css()
-# CREATE WINNERS TABLE
-
-winners = get_teg_winners(filtered_data).drop(columns=['Year'])
-winner_df = winners.replace(r'\*', '', regex=True)
-
-# === GENERATE DATA FOR CHARTS AND DOUBLES === #
-# Melt the DataFrame for players and competitions in long format
-melted_winners = pd.melt(winner_df, id_vars=['TEG'], value_vars=['TEG Trophy', 'Green Jacket', 'HMM Wooden Spoon'],
-                         var_name='Competition', value_name='Player')
-
-# Group by player and competition, then count the occurrences
-player_wins = melted_winners.groupby(['Player', 'Competition']).size().unstack(fill_value=0).sort_values(by='TEG Trophy', ascending=False)
-player_wins = player_wins[['TEG Trophy', 'Green Jacket', 'HMM Wooden Spoon']]
-player_wins.columns = ['Trophy', 'Jacket', 'Spoon']
-
-# Sort data for each competition
-trophy_sorted = player_wins.sort_values(by='Trophy', ascending=False).reset_index()
-jacket_sorted = player_wins.sort_values(by='Jacket', ascending=False).reset_index()
-spoon_sorted = player_wins.sort_values(by='Spoon', ascending=False).reset_index()
-
-# Find players who won both the Trophy and Jacket in the same TEG
-same_player_both = winner_df[winner_df['TEG Trophy'] == winner_df['Green Jacket']]
-player_doubles = same_player_both['TEG Trophy'].value_counts().reset_index()
-player_doubles.columns = ['Player', 'Doubles']
-player_doubles = player_doubles.sort_values(by='Doubles', ascending=False)
-
-# Find the maximum number of wins across all competitions to set the x-axis range
-max_wins = max(trophy_sorted['Trophy'].max(), jacket_sorted['Jacket'].max(), spoon_sorted['Spoon'].max())
+data_version = get_data_version()
+
+@timed_cache_data
+def get_history_tables(data_version):
+    """
+    Winners table, win counts by player and competition, and Trophy / Jacket doubles. Only changes when the
+    data does, so it is cached on the data version.
+    """
+    # CREATE WINNERS TABLE
+    winners = get_teg_winners_data(data_version).drop(columns=['Year'])
+    winner_df = winners.replace(r'\*', '', regex=True)
+
+    # === GENERATE DATA FOR CHARTS AND DOUBLES === #
+    # Melt the DataFrame for players and competitions in long format
+    melted_winners = pd.melt(winner_df, id_vars=['TEG'], value_vars=['TEG Trophy', 'Green Jacket', 'HMM Wooden Spoon'],
+                             var_name='Competition', value_name='Player')
+
+    # Group by player and competition, then count the occurrences
+    player_wins = melted_winners.groupby(['Player', 'Competition']).size().unstack(fill_value=0).sort_values(by='TEG Trophy', ascending=False)
+    player_wins = player_wins[['TEG Trophy', 'Green Jacket', 'HMM Wooden Spoon']]
+    player_wins.columns = ['Trophy', 'Jacket', 'Spoon']
+
+    # Find players who won both the Trophy and Jacket in the same TEG
+    same_player_both = winner_df[winner_df['TEG Trophy'] == winner_df['Green Jacket']]
+    player_doubles = same_player_both['TEG Trophy'].value_counts().reset_index()
+    player_doubles.columns = ['Player', 'Doubles']
+    player_doubles = player_doubles.sort_values(by='Doubles', ascending=False)
+
+    return winners, player_wins, player_doubles
+
+winners, player_wins, player_doubles = get_history_tables(data_version)
 
 # === FUNCTION TO CREATE A HORIZONTAL BAR CHART === #
 def create_bar_chart(df, x_col, y_col, title):
@@ -69,18 +74,19 @@ st.subheader("Competition wins")
 
 col1, col2, col3 = st.columns(3,gap = 'medium')
 
+# Charts are cached as Vega-Lite specs, so reruns skip sorting the data and serialising the charts
+def wins_chart(col, title):
+    return lambda: create_bar_chart(player_wins.sort_values(by=col, ascending=False).reset_index(), col, 'Player', title)
+
 with col1:
-    trophy_chart = create_bar_chart(trophy_sorted, 'Trophy', 'Player', 'TEG Trophy Wins')
-    st.altair_chart(trophy_chart, use_container_width=True)
+    altair_chart('history_wins', {'competition': 'Trophy'}, data_version, wins_chart('Trophy', 'TEG Trophy Wins'), use_container_width=True)
 
 with col2:
-    jacket_chart = create_bar_chart(jacket_sorted, 'Jacket', 'Player', 'Green Jacket Wins')
-    st.altair_chart(jacket_chart, use_container_width=True)
+    altair_chart('history_wins', {'competition': 'Jacket'}, data_version, wins_chart('Jacket', 'Green Jacket Wins'), use_container_width=True)
     st.caption('*Green Jacket awarded in TEG 5 to SN for best stableford round; DM had best gross score')
 
 with col3:
-    spoon_chart = create_bar_chart(spoon_sorted, 'Spoon', 'Player', 'Wooden Spoon Wins')
-    st.altair_chart(spoon_chart, use_container_width=True)
+    altair_chart('history_wins', {'competition': 'Spoon'}, data_version, wins_chart('Spoon', 'Wooden Spoon Wins'), use_container_width=True)
 
 st.divider()
 
@@ -94,5 +100,7 @@ st.divider()
 
 # Show the 'Doubles' section from the 'winners' page
 st.subheader("Doubles")
-st.caption(f"There have been {same_player_both.shape[0]} trophy / jacket doubles")
+st.caption(f"There have been {player_doubles['Doubles'].sum()} trophy / jacket doubles")
 st.write(player_doubles.to_html(index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+
+show_timings()
@@ -2,8 +2,11 @@ import streamlit as st
 import pandas as pd
 from typing import List, Dict, Any
 import logging
-from utils import get_teg_rounds, get_round_data, load_all_data
-from make_charts import create_cumulative_graph, adjusted_grossvp, adjusted_stableford
+from utils import get_teg_rounds, get_round_data, load_all_data, get_data_version, build_leaderboard
+from make_charts import get_race_chart
+from live_scoring import get_live_worker, merge_live_round_data, LIVE_POLL_SECONDS
+from projections import project_teg_outcomes
+from timing import start_run, show_timings, timer, timed_cache_data
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -82,7 +85,7 @@ CUSTOM_CSS = """
 </style>
 """
 
-@st.cache_data
+@timed_cache_data
 def create_leaderboard(leaderboard_df: pd.DataFrame, value_column: str, ascending: bool = True) -> pd.DataFrame:
     """
     Create a leaderboard from the given dataframe.
@@ -95,25 +98,7 @@ def create_leaderboard(leaderboard_df: pd.DataFrame, value_column: str, ascendin
     Returns:
         pd.DataFrame: Leaderboard dataframe.
     """
-    pivot_df = leaderboard_df.pivot_table(
-        index=PLAYER_COLUMN, 
-        columns='Round', 
-        values=value_column, 
-        aggfunc='sum', 
-        fill_value=0
-    ).assign(Total=lambda x: x.sum(axis=1)).sort_values('Total', ascending=ascending)
-
-    pivot_df.columns = [f'R{col}' if isinstance(col, int) else col for col in pivot_df.columns]
-    pivot_df = pivot_df.reset_index()
-    pivot_df['Rank'] = pivot_df['Total'].rank(method='min', ascending=ascending).astype(int)
-
-    duplicated_scores = pivot_df['Total'].duplicated(keep=False)
-    pivot_df.loc[duplicated_scores, 'Rank'] = pivot_df.loc[duplicated_scores, 'Rank'].astype(str) + '='
-
-    columns = ['Rank', PLAYER_COLUMN] + [col for col in pivot_df.columns if col not in ['Rank', PLAYER_COLUMN]]
-    leaderboard = pivot_df[columns]
-    logger.info(f"Leaderboard created for {value_column}.")
-    return leaderboard
+    return build_leaderboard(leaderboard_df, value_column, ascending)
 
 def generate_table_html(df: pd.DataFrame) -> str:
     """
@@ -206,21 +191,140 @@ def display_leaderboard(leaderboard_df: pd.DataFrame, value_column: str, title:
     table_html = generate_table_html(leaderboard)
     st.markdown(table_html, unsafe_allow_html=True)
 
+@timed_cache_data(show_spinner="Simulating the rest of the TEG...")
+def get_projection(data_version: str, teg_num: int, _all_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Project final standings for a TEG in progress. Cached on the data version (the live version in live mode),
+    so it reruns after each new hole; the data itself is not hashed.
+
+    Args:
+        data_version (str): Identifies _all_data, as for the race chart cache.
+        teg_num (int): The TEG to project.
+        _all_data (pd.DataFrame): Hole-level data including the TEG in progress.
+
+    Returns:
+        pd.DataFrame: Projection table formatted for display.
+    """
+    projection = project_teg_outcomes(_all_data, teg_num)
+    display_df = projection[['Player', 'P(Trophy)', 'P(Jacket)', 'P(Spoon)', 'Exp. Trophy Position', 'Exp. Jacket Position']].copy()
+    for col in ['P(Trophy)', 'P(Jacket)', 'P(Spoon)']:
+        display_df[col] = display_df[col].map(lambda p: f"{p:.0%}" if p >= 0.005 or p == 0 else "<1%")
+    for col in ['Exp. Trophy Position', 'Exp. Jacket Position']:
+        display_df[col] = display_df[col].map(lambda x: f"{x:.1f}")
+    return display_df
+
+def display_results(chosen_teg: str, round_df: pd.DataFrame, all_data: pd.DataFrame, data_version: str, live: bool = False) -> None:
+    """
+    Display the leaderboards and race charts for the chosen TEG.
+
+    Args:
+        chosen_teg (str): The TEG to display.
+        round_df (pd.DataFrame): Round-level data.
+        all_data (pd.DataFrame): Hole-level data.
+        data_version (str): Identifies all_data for the race chart and projection caches.
+        live (bool): True if all_data includes live scores, so the race charts are built from it rather than
+            from the precomputed race series.
+    """
+    chart_data = all_data if live else None
+    leaderboard_df = round_df[round_df['TEG'] == chosen_teg]
+
+    if leaderboard_df.empty:
+        st.warning(f"No data available for {chosen_teg}.")
+        st.stop()
+
+    current_rounds = leaderboard_df['Round'].nunique()
+    total_rounds = get_teg_rounds(chosen_teg)
+    is_complete = current_rounds >= total_rounds
+
+    page_header = f"{chosen_teg} Results" if is_complete else f"{chosen_teg} Scoreboard"
+    leader_label = "Champion" if is_complete else "Leader"
+
+    st.subheader(page_header)
+
+    if not is_complete:
+        with st.expander("Projected outcome"):
+            projection = get_projection(data_version, int(leaderboard_df['TEGNum'].iloc[0]), all_data)
+            st.write(projection.to_html(index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+            st.caption("Based on 100,000 simulations of the remaining holes, sampling each player's historical scores on holes of the same par and stroke index")
+
+    tab1, tab2 = st.tabs(["TEG Trophy & Spoon", "Green Jacket"])
+
+    with tab1:
+
+        display_leaderboard(
+            leaderboard_df, 
+            'Stableford', 
+            "TEG Trophy Leaderboard (Best Stableford)",
+            leader_label, 
+            ascending=False
+        )
+
+        stableford_chart_type = st.radio(
+                "Choose Stableford chart type:",
+                ('Standard', 'Adjusted scale'),
+                key='stableford_chart_type'
+            )
+        st.caption("Adjusted view 'zooms in' by showing performance vs. net par to more clearly show gaps between players")
+
+        stableford_series = 'Stableford Cum TEG' if stableford_chart_type == 'Standard' else 'Adjusted Stableford'
+        fig_stableford = get_race_chart(chosen_teg, stableford_series, data_version, all_data=chart_data)
+
+        st.plotly_chart(fig_stableford, use_container_width=True)
+        st.caption('Higher = better')
+
+    with tab2: 
+        display_leaderboard(
+            leaderboard_df, 
+            'GrossVP', 
+            "Green Jacket Leaderboard (Best Gross)",
+            leader_label, 
+            ascending=True
+        )
+
+        # with st.expander("The race for the jacket..."):
+        #     fig_grossvp = create_cumulative_graph(all_data, chosen_teg, 'GrossVP Cum TEG', f'Cumulative gross for {chosen_teg}')
+        #     st.plotly_chart(fig_grossvp, use_container_width=True)
+
+
+        grossvp_chart_type = st.radio(
+            "Choose Green Jacket chart type:",
+            ('Standard', 'Adjusted scale'),
+            key='grossvp_chart_type'
+        )
+        st.caption("Adjusted view 'zooms in' by showing performance vs. bogey golf to more clearly show gaps between players")
+
+        grossvp_series = 'GrossVP Cum TEG' if grossvp_chart_type == 'Standard' else 'Adjusted GrossVP'
+        fig_grossvp = get_race_chart(chosen_teg, grossvp_series, data_version, all_data=chart_data)
+
+        st.plotly_chart(fig_grossvp, use_container_width=True)
+        st.caption('Lower = better')
+
+
 def main() -> None:
     """
     Main function to run the Streamlit app.
     """
     st.set_page_config(page_title=PAGE_TITLE, page_icon=PAGE_ICON)
+    start_run(PAGE_TITLE)
     st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
     if st.sidebar.button("Refresh Data"):
-        st.cache_data.clear()
+        # Cached data is keyed on the data version, so a rerun picks up new data without clearing other users' caches
         st.rerun()
 
+    live_mode = st.sidebar.toggle("Live mode", help=f"Poll the score sheet every {LIVE_POLL_SECONDS}s and update the leaderboards as scores are entered")
+
     try:
         with st.spinner("Loading data..."):
             round_df = get_round_data()
             all_data = load_all_data()
+            data_version = get_data_version()
+
+        if live_mode:
+            worker = get_live_worker()
+            live_all_data, live_data, _ = worker.snapshot()
+            if live_all_data is not None:
+                round_df = merge_live_round_data(round_df, live_all_data, live_data)
 
         required_columns = [PLAYER_COLUMN, 'TEGNum', 'TEG', 'Round'] + MEASURES
         missing_columns = [col for col in required_columns if col not in round_df.columns]
@@ -238,100 +342,31 @@ def main() -> None:
 
         chosen_teg = st.radio('Select TEG', tegs, horizontal=True)
 
-        leaderboard_df = round_df[round_df['TEG'] == chosen_teg]
-
-        if leaderboard_df.empty:
-            st.warning(f"No data available for {chosen_teg}.")
-            st.stop()
-
-        current_rounds = leaderboard_df['Round'].nunique()
-        total_rounds = get_teg_rounds(chosen_teg)
-        is_complete = current_rounds >= total_rounds
-
-        page_header = f"{chosen_teg} Results" if is_complete else f"{chosen_teg} Scoreboard"
-        leader_label = "Champion" if is_complete else "Leader"
-
-        st.subheader(page_header)
-
-        tab1, tab2 = st.tabs(["TEG Trophy & Spoon", "Green Jacket"])
-
-        with tab1:
-
-            display_leaderboard(
-                leaderboard_df, 
-                'Stableford', 
-                "TEG Trophy Leaderboard (Best Stableford)",
-                leader_label, 
-                ascending=False
-            )
-
-            stableford_chart_type = st.radio(
-                    "Choose Stableford chart type:",
-                    ('Standard', 'Adjusted scale'),
-                    key='stableford_chart_type'
-                )
-            st.caption("Adjusted view 'zooms in' by showing performance vs. net par to more clearly show gaps between players")
-
-            # fig_stableford = create_cumulative_graph(all_data, chosen_teg,  'Stableford Cum TEG', f'Trophy race: {chosen_teg}')
-            # st.plotly_chart(fig_stableford, use_container_width=True)
-
-            # Create and display Stableford chart
-            if stableford_chart_type == 'Standard':
-                fig_stableford = create_cumulative_graph(all_data, chosen_teg, 'Stableford Cum TEG', 
-                                                        f'Trophy race: {chosen_teg}',
-                                                        y_axis_label='Cumulative Stableford Points',
-                                                        chart_type='stableford')
-            else:
-                fig_stableford = create_cumulative_graph(all_data, chosen_teg, 'Adjusted Stableford', 
-                                                        f'Trophy race (Adjusted scale): {chosen_teg}', 
-                                                        y_calculation=adjusted_stableford,
-                                                        y_axis_label='Cumulative Stableford Points vs. net par',
-                                                        chart_type='stableford')
-
-            st.plotly_chart(fig_stableford, use_container_width=True)
-            st.caption('Higher = better')
-
-        with tab2: 
-            display_leaderboard(
-                leaderboard_df, 
-                'GrossVP', 
-                "Green Jacket Leaderboard (Best Gross)",
-                leader_label, 
-                ascending=True
-            )
-
-            # with st.expander("The race for the jacket..."):
-            #     fig_grossvp = create_cumulative_graph(all_data, chosen_teg, 'GrossVP Cum TEG', f'Cumulative gross for {chosen_teg}')
-            #     st.plotly_chart(fig_grossvp, use_container_width=True)
-
-
-            grossvp_chart_type = st.radio(
-                "Choose Green Jacket chart type:",
-                ('Standard', 'Adjusted scale'),
-                key='grossvp_chart_type'
-            )
-            st.caption("Adjusted view 'zooms in' by showing performance vs. bogey golf to more clearly show gaps between players")
-
-            # Create and display Green Jacket chart
-            if grossvp_chart_type == 'Standard':
-                fig_grossvp = create_cumulative_graph(all_data, chosen_teg, 'GrossVP Cum TEG', 
-                                                    f'Green Jacket race: {chosen_teg}',
-                                                    y_axis_label='Cumulative gross vs par',
-                                                    chart_type='gross')
-            else:
-                fig_grossvp = create_cumulative_graph(all_data, chosen_teg, 'Adjusted GrossVP', 
-                                                    f'Green Jacket race (Adjusted scale): {chosen_teg}', 
-                                                    y_calculation=adjusted_grossvp,
-                                                    y_axis_label='Cumulative gross vs. bogey golf (par+1)',
-                                                    chart_type='gross')
-
-            st.plotly_chart(fig_grossvp, use_container_width=True)
-            st.caption('Lower = better')
-
+        if live_mode:
+            @st.fragment(run_every=LIVE_POLL_SECONDS)
+            def live_results() -> None:
+                live_all_data, live_data, live_version = worker.snapshot()
+                if live_all_data is None:
+                    live_all_data, live_round_df = all_data, round_df
+                else:
+                    live_round_df = merge_live_round_data(round_df, live_all_data, live_data)
+                if worker.last_error:
+                    st.warning(f"Live scoring error: {worker.last_error}")
+                if worker.last_update:
+                    st.caption(f"🔴 Live: last update {worker.last_update:%H:%M:%S} (v{live_version})")
+                live_data_version = f"live-{id(worker)}-{live_version}" if live_version else data_version
+                with timer('display_results (live)'):
+                    display_results(chosen_teg, live_round_df, live_all_data, live_data_version, live=live_version > 0)
+
+            live_results()
+        else:
+            with timer('display_results'):
+                display_results(chosen_teg, round_df, all_data, data_version)
 
     except Exception as e:
         st.error(f"An error occurred: {str(e)}")
         logger.error(f"An error occurred: {str(e)}", exc_info=True)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+    show_timings()
@@ -1,8 +1,10 @@
-from utils import get_ranked_teg_data, get_best, get_ranked_round_data, get_ranked_frontback_data, create_stat_section
+from utils import get_ranked_teg_data, get_best, get_ranked_round_data, get_ranked_frontback_data, create_stat_section, load_records_broken, get_data_version
 import streamlit as st
 import pandas as pd
+from timing import start_run, show_timings
 
 st.set_page_config(page_title="TEG Records", page_icon="⛳")
+start_run('TEG Records')
 st.title("TEG Records")
 
 '---'
@@ -10,6 +12,7 @@ st.markdown("### Contents")
 st.markdown('1. Best TEGs')
 st.markdown('2. Best Rounds')
 st.markdown('3. Best 9s')
+st.markdown('4. Recently broken')
 '---'
 
 # Custom CSS
@@ -97,7 +100,7 @@ def prepare_df(best_records, record_type):
     return df
 
 
-tegs_ranked = get_ranked_teg_data()
+tegs_ranked = get_ranked_teg_data(get_data_version())
 st.subheader('Best TEGs')
 for measure in ['GrossVP', 'NetVP', 'Stableford']:
     best_records = get_best(tegs_ranked, measure_to_use=measure, top_n=1)
@@ -107,7 +110,7 @@ for measure in ['GrossVP', 'NetVP', 'Stableford']:
     st.markdown(create_stat_section(title, value, df, "| "), unsafe_allow_html=True)
 
 '---'
-rounds_ranked = get_ranked_round_data()
+rounds_ranked = get_ranked_round_data(get_data_version())
 st.subheader('Best Rounds')
 for measure in ['GrossVP', 'Sc', 'NetVP', 'Stableford']:
     best_records = get_best(rounds_ranked, measure_to_use=measure, top_n=1)
@@ -117,11 +120,28 @@ for measure in ['GrossVP', 'Sc', 'NetVP', 'Stableford']:
     st.markdown(create_stat_section(title, value, df, "| "), unsafe_allow_html=True)
 
 '---'
-frontback_ranked = get_ranked_frontback_data()
+frontback_ranked = get_ranked_frontback_data(get_data_version())
 st.subheader('Best 9s')
 for measure in ['GrossVP', 'Sc', 'NetVP', 'Stableford']:
     best_records = get_best(frontback_ranked, measure_to_use=measure, top_n=1)
     title = MEASURE_TITLES[measure]
     value = format_value(best_records[measure].iloc[0], measure)
     df = prepare_df(best_records, 'frontback')
-    st.markdown(create_stat_section(title, value, df, "| "), unsafe_allow_html=True)
\ No newline at end of file
+    st.markdown(create_stat_section(title, value, df, "| "), unsafe_allow_html=True)
+
+'---'
+st.subheader('Recently broken')
+records_broken = load_records_broken()
+if records_broken.empty:
+    st.markdown('No records have been broken since the record index was created.')
+else:
+    recent = records_broken.head(10).copy()
+    recent['Where'] = recent['TEG'] + recent['Round'].map(lambda r: f" | R{int(r)}" if pd.notna(r) else '') + \
+        recent['FrontBack'].map(lambda fb: f" {fb} 9" if pd.notna(fb) else '')
+    recent['Value'] = [format_value(v, m) for v, m in zip(recent['Value'], recent['Measure'])]
+    recent['Previous'] = [format_value(v, m) for v, m in zip(recent['Previous'], recent['Measure'])]
+    recent['Measure'] = recent['Measure'].map(MEASURE_TITLES)
+    st.dataframe(recent[['Detected', 'Scope', 'Level', 'Measure', 'Status', 'Player', 'Value', 'Where', 'Previous', 'Previous Holder']],
+                 hide_index=True)
+
+show_timings()
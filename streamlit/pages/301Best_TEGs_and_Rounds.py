@@ -1,13 +1,16 @@
-from utils import load_all_data, get_best, get_ranked_teg_data, get_ranked_round_data, datawrapper_table_css
+from utils import load_all_data, get_best, get_ranked_teg_data, get_ranked_round_data, datawrapper_table_css, get_data_version
 import streamlit as st
 import numpy as np, pandas as pd
+from timing import start_run, show_timings
+
+start_run('Top TEGs and Rounds')
 
 st.title('Top TEGs and Rounds')
 datawrapper_table_css()
 
 
-teg_data_ranked = get_ranked_teg_data()
-rd_data_ranked = get_ranked_round_data()
+teg_data_ranked = get_ranked_teg_data(get_data_version())
+rd_data_ranked = get_ranked_round_data(get_data_version())
 rd_data_ranked['Round'] = rd_data_ranked['TEG'] +'|R' + rd_data_ranked['Round'].astype(str)
 # measures = ['Sc', 'GrossVP', 'NetVP', 'Stableford']
 
@@ -74,4 +77,6 @@ with tab1:
 
 with tab2:
     st.markdown(f'### Top {n_keep} Rounds: {selected_friendly_name}')
-    st.write(best_r.to_html(escape=False, index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
\ No newline at end of file
+    st.write(best_r.to_html(escape=False, index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+
+show_timings()
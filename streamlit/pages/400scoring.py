@@ -1,9 +1,11 @@
-from utils import score_type_stats, load_all_data, apply_score_types, max_scoretype_per_round, format_vs_par, datawrapper_table_css
+from utils import score_type_stats, load_columns, get_data_version, apply_score_types, max_scoretype_per_round, format_vs_par, datawrapper_table_css
 import streamlit as st
 import pandas as pd, altair as alt
 import numpy as np
+from timing import start_run, show_timings
 
 st.set_page_config(page_title="TEG Scoring")
+start_run('Scoring')
 datawrapper_table_css()
 st.title("Scoring")
 
@@ -17,7 +19,7 @@ st.markdown('4. Longest streaks')
 
 st.subheader('Average score by Par')
 
-all_data = load_all_data(exclude_incomplete_tegs=False)
+all_data = load_columns(('Player', 'PAR', 'GrossVP'), get_data_version())
 avg_grossvp = all_data.groupby(['Player', 'PAR'])['GrossVP'].mean().unstack(fill_value=0)
 avg_grossvp['Total'] = all_data.groupby('Player')['GrossVP'].mean()
 avg_grossvp = avg_grossvp.sort_values('Total', ascending=True)
@@ -46,7 +48,7 @@ st.write(avg_grossvp.to_html(classes='dataframe, datawrapper-table', index=False
 st.subheader("Career Eagles, Birdies, Pars and Triple Bogey+")
 
 # Calculate the stats
-scoring_stats = score_type_stats()
+scoring_stats = score_type_stats(get_data_version())
 
 
 chart_fields_all = [
@@ -84,7 +86,7 @@ for i, tab in enumerate(tabs):
 '---'
 
 st.subheader('Most of each type of score in a single round')
-max_by_round = max_scoretype_per_round()
+max_by_round = max_scoretype_per_round(get_data_version())
 st.write(max_by_round.to_html(index=False, justify='left', classes = 'datawrapper-table'), unsafe_allow_html=True)
 
 '---'
@@ -156,7 +158,9 @@ def summarize_multi_score_running_sum(df):
 # summary_df.to_clipboard(index=False)
 # print("Summary copied to clipboard. You can now paste it into a text editor or spreadsheet.")
 
-all_data = load_all_data()
+all_data = load_columns(('Player', 'Career Count', 'GrossVP'), get_data_version())
 runsums = calculate_multi_score_running_sum(all_data)
 streak_summary = summarize_multi_score_running_sum(runsums)
-st.write(streak_summary.to_html(index=False, justify='left', classes = 'datawrapper-table'), unsafe_allow_html=True)
\ No newline at end of file
+st.write(streak_summary.to_html(index=False, justify='left', classes = 'datawrapper-table'), unsafe_allow_html=True)
+
+show_timings()
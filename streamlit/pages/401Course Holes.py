@@ -0,0 +1,90 @@
+from utils import load_course_hole_stats, get_data_version, SCORE_DISTRIBUTION, datawrapper_table_css
+import streamlit as st
+import altair as alt
+from timing import start_run, show_timings
+
+st.set_page_config(page_title="TEG Course Holes")
+start_run('Course Holes')
+datawrapper_table_css()
+st.title("Course Holes")
+
+# Stats are counted at ingest; this page only formats them
+hole_stats = load_course_hole_stats(get_data_version())
+
+
+def format_avg(value):
+    if value > 0:
+        return f"+{value:.2f}"
+    elif value < 0:
+        return f"{value:.2f}"
+    else:
+        return "="
+
+
+def format_rate(value):
+    return f"{value:.0%}" if value > 0 else "-"
+
+
+def hole_table(df, include_course=False):
+    columns = (['Course'] if include_course else []) + ['Hole', 'PAR', 'SI', 'Holes_Played', 'Avg_GrossVP', 'Birdie_Rate'] + \
+              [f'{bucket}_Rate' for bucket in SCORE_DISTRIBUTION if bucket not in ('Eagles_or_Better', 'Birdies')] + ['Difficulty_Rank']
+    table = df[columns].copy()
+    table['Avg_GrossVP'] = table['Avg_GrossVP'].apply(format_avg)
+    for col in [col for col in columns if col.endswith('_Rate')]:
+        table[col] = table[col].apply(format_rate)
+    table.columns = [col.replace('_Rate', ' %').replace('Avg_GrossVP', 'Avg vs Par').replace('Holes_Played', 'Played')
+                     .replace('Difficulty_Rank', 'Difficulty').replace('PAR', 'Par').replace('_', ' ') for col in columns]
+    return table
+
+
+st.markdown('Scoring on every hole played, with the share of birdies (or better), pars, bogeys, doubles and '
+            'triple bogey+. Difficulty ranks each hole on its course by average score vs par (1 = hardest).')
+
+'---'
+
+courses = sorted(hole_stats['Course'].unique())
+chosen_course = st.selectbox('Course', courses)
+course_holes = hole_stats[hole_stats['Course'] == chosen_course]
+
+st.subheader(chosen_course)
+if course_holes[['Hole']].duplicated().any():
+    st.caption('The course layout has changed over time, so some holes appear once per par and stroke index.')
+st.write(hole_table(course_holes).to_html(index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+
+col1, col2 = st.columns(2)
+with col1:
+    st.markdown('**Hardest holes**')
+    hardest = course_holes.sort_values(['Difficulty_Rank', 'Hole']).head(3)
+    st.write(hole_table(hardest)[['Hole', 'Par', 'SI', 'Avg vs Par']].to_html(index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+with col2:
+    st.markdown('**Easiest holes**')
+    easiest = course_holes.sort_values(['Avg_GrossVP', 'Hole']).head(3)
+    st.write(hole_table(easiest)[['Hole', 'Par', 'SI', 'Avg vs Par']].to_html(index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+
+'---'
+
+st.subheader('Average score vs par by stroke index')
+st.caption('All courses. Stroke index 1 should be the hardest hole on the course.')
+
+by_si = hole_stats.groupby('SI')[['GrossVP_Total', 'Holes_Played']].sum().reset_index()
+by_si['Avg vs Par'] = by_si['GrossVP_Total'] / by_si['Holes_Played']
+
+si_chart = alt.Chart(by_si).mark_bar().encode(
+    x=alt.X('SI:O', title='Stroke index'),
+    y=alt.Y('Avg vs Par:Q', title='Average vs par'),
+    tooltip=['SI', alt.Tooltip('Avg vs Par:Q', format='+.2f'), alt.Tooltip('Holes_Played:Q', title='Holes played')]
+)
+st.altair_chart(si_chart, use_container_width=True)
+
+'---'
+
+st.subheader('Hardest and easiest holes')
+tab_hard, tab_easy = st.tabs(['Hardest', 'Easiest'])
+with tab_hard:
+    st.write(hole_table(hole_stats.sort_values('Avg_GrossVP', ascending=False).head(10), include_course=True)
+             .to_html(index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+with tab_easy:
+    st.write(hole_table(hole_stats.sort_values('Avg_GrossVP').head(10), include_course=True)
+             .to_html(index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+
+show_timings()
@@ -0,0 +1,63 @@
+from utils import get_player_form, current_form, get_data_version, FORM_MEASURES, FORM_SPAN, datawrapper_table_css
+from chart_cache import altair_chart
+import streamlit as st
+import altair as alt
+from timing import start_run, show_timings
+
+st.set_page_config(page_title="TEG Player Form")
+start_run('Player Form')
+datawrapper_table_css()
+st.title("Player Form")
+st.markdown('How each player is trending: the average of their last few rounds and an exponentially weighted '
+            'average that gives recent rounds more weight, compared with their career average.')
+
+data_version = get_data_version()
+
+col1, col2 = st.columns(2)
+with col1:
+    measure = st.radio('Measure', FORM_MEASURES, horizontal=True,
+                       format_func=lambda m: {'GrossVP': 'Gross vs Par', 'NetVP': 'Net vs Par'}.get(m, m))
+with col2:
+    window = st.slider('Rounds in rolling average', min_value=3, max_value=12, value=5)
+
+form = get_player_form(data_version, window=window, span=FORM_SPAN)
+
+'---'
+
+st.subheader('Current form')
+summary = current_form(form, measure)
+for col in ['Rolling', 'EWM', 'Career', 'vs Career']:
+    summary[col] = summary[col].map(lambda x: f"{x:+.1f}" if measure != 'Stableford' or col == 'vs Career' else f"{x:.1f}")
+summary = summary.rename(columns={'Rolling': f'Last {window} avg', 'EWM': 'Weighted avg', 'Career': 'Career avg'})
+st.write(summary.to_html(index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+st.caption(f"Weighted average uses a span of {FORM_SPAN} rounds. "
+           f"{'Higher' if measure == 'Stableford' else 'Lower'} is better.")
+
+'---'
+
+st.subheader('Form over career')
+players = sorted(form['Player'].unique())
+chosen_players = st.multiselect('Players', players, default=players)
+
+
+def form_chart():
+    chart_data = form[form['Player'].isin(chosen_players)]
+    base = alt.Chart(chart_data).encode(
+        x=alt.X('Career Round:Q', title='Career round'),
+        color=alt.Color('Player:N', legend=alt.Legend(orient='bottom', title=None)),
+        tooltip=['Player', 'TEG', 'Round', 'Course',
+                 alt.Tooltip(f'{measure}:Q', title='Round score'),
+                 alt.Tooltip(f'{measure} Rolling:Q', title=f'Last {window} avg', format='.1f')]
+    )
+    lines = base.mark_line().encode(y=alt.Y(f'{measure} Rolling:Q', title=f'{measure} (last {window} rounds)',
+                                            scale=alt.Scale(zero=False, reverse=(measure != 'Stableford'))))
+    points = base.mark_circle(size=20, opacity=0.3).encode(y=f'{measure}:Q')
+    return (lines + points).properties(height=450)
+
+
+if chosen_players:
+    altair_chart('player_form', {'measure': measure, 'window': window, 'players': chosen_players},
+                 data_version, form_chart, use_container_width=True)
+    st.caption('Lines show the rolling average; dots show individual rounds. Better form is higher on the chart.')
+
+show_timings()
@@ -0,0 +1,62 @@
+from utils import get_head_to_head, get_data_version, HEAD_TO_HEAD_BASES, datawrapper_table_css
+import streamlit as st
+from timing import start_run, show_timings
+
+st.set_page_config(page_title="TEG Head to Head")
+start_run('Head to Head')
+datawrapper_table_css()
+st.title("Head to Head")
+st.markdown('Every round two players have both completed, compared on strokes and as a hole-by-hole match.')
+
+# Every pair is computed once per data version; this page only slices the results
+h2h_rounds, h2h_summary = get_head_to_head(get_data_version())
+
+players = sorted(h2h_summary['Player'].unique())
+
+col1, col2, col3 = st.columns([2, 2, 1])
+with col1:
+    player = st.selectbox('Player', players, index=0)
+with col2:
+    opponents = [p for p in players if p != player]
+    opponent = st.selectbox('Opponent', opponents, index=0)
+with col3:
+    basis = st.radio('Scoring', list(HEAD_TO_HEAD_BASES), horizontal=True)
+
+pair = h2h_summary[(h2h_summary['Basis'] == basis) & (h2h_summary['Player'] == player) & (h2h_summary['Opponent'] == opponent)]
+
+'---'
+
+if pair.empty:
+    st.info(f"{player} and {opponent} have not completed a round together.")
+else:
+    pair = pair.iloc[0]
+    st.subheader(f"{player} v {opponent}")
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric('Rounds together', int(pair['Rounds']))
+    m2.metric('Matches (W-H-L)', f"{pair['Matches Won']}-{pair['Matches Halved']}-{pair['Matches Lost']}")
+    m3.metric('Holes (W-H-L)', f"{pair['Holes Won']}-{pair['Holes Halved']}-{pair['Holes Lost']}")
+    m4.metric('Strokes per round', f"{pair['Strokes per Round']:+.1f}")
+    st.caption(f"{basis} scores. Negative strokes per round means {player} scored fewer than {opponent}.")
+
+    pair_rounds = h2h_rounds[(h2h_rounds['Basis'] == basis) & (h2h_rounds['Player'] == player) &
+                             (h2h_rounds['Opponent'] == opponent)].sort_values(['TEGNum', 'Round'], ascending=False)
+    round_table = pair_rounds[['TEG', 'Round', 'Player Score', 'Opponent Score', 'Holes Won', 'Holes Halved',
+                               'Holes Lost', 'Result', 'Margin']].copy()
+    round_table[['Player Score', 'Opponent Score']] = round_table[['Player Score', 'Opponent Score']].astype(int)
+    round_table = round_table.rename(columns={'Player Score': player, 'Opponent Score': opponent})
+    st.write(round_table.to_html(index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+
+'---'
+
+st.subheader('All matches')
+st.caption(f"{basis} matchplay record (won-halved-lost) of each player (row) against each opponent (column).")
+basis_summary = h2h_summary[h2h_summary['Basis'] == basis]
+record = (basis_summary['Matches Won'].astype(str) + '-' + basis_summary['Matches Halved'].astype(str) + '-' +
+          basis_summary['Matches Lost'].astype(str))
+matrix = basis_summary.assign(Record=record).pivot(index='Player', columns='Opponent', values='Record').fillna('')
+matrix.index.name = None
+matrix.columns.name = None
+st.write(matrix.reset_index(names='').to_html(index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+
+show_timings()
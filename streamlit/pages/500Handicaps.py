@@ -3,9 +3,11 @@ import pandas as pd
 import numpy as np
 import os
 from utils import get_base_directory, datawrapper_table_css
+from timing import start_run, show_timings
 
 
 st.set_page_config(page_title="Handicaps")
+start_run('Handicaps')
 datawrapper_table_css()
 def format_change(val):
     if val > 0:
@@ -122,4 +124,6 @@ with st.expander("Handicap history"):
     except pd.errors.EmptyDataError:
         st.warning("The file '/data/handicaps.csv' is empty.")
     except Exception as e:
-        st.error(f"An error occurred while reading the CSV file: {str(e)}")
\ No newline at end of file
+        st.error(f"An error occurred while reading the CSV file: {str(e)}")
+
+show_timings()
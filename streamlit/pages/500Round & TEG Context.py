@@ -1,7 +1,10 @@
 import streamlit as st
 import pandas as pd
-from utils import get_ranked_teg_data, get_ranked_round_data, get_ranked_frontback_data, safe_ordinal
-from utils import chosen_rd_context, chosen_teg_context, datawrapper_table_css
+from utils import get_context_table, context_lookup, get_data_version, safe_ordinal
+from utils import datawrapper_table_css
+from timing import start_run, show_timings
+
+start_run('Round & TEG Context')
 
 # Initialize session state
 if 'teg_r' not in st.session_state:
@@ -10,6 +13,10 @@ if 'rd_r' not in st.session_state:
     st.session_state.rd_r = None
 if 'teg_t' not in st.session_state:
     st.session_state.teg_t = None
+if 'teg_f' not in st.session_state:
+    st.session_state.teg_f = None
+if 'rd_f' not in st.session_state:
+    st.session_state.rd_f = None
 
 datawrapper_table_css()
 
@@ -20,8 +27,22 @@ def reset_round_selection():
 def reset_teg_selection():
     st.session_state.teg_t = max_teg_t
 
+def reset_nine_selection():
+    st.session_state.teg_f = max_teg_f
+    st.session_state.rd_f = max_rd_in_max_teg_f
+
+def show_context(table, metric, *key):
+    # Contexts are precomputed for every round, TEG and nine; this is an index lookup
+    output = context_lookup(table, metric, *key)
+    output['Percentile'] = output['All time percentile'].map(lambda p: f"{p:.0%}")
+    output = output.drop(columns=['Pl percentile', 'All time percentile'])
+    st.write(output.to_html(index=False, justify='left', classes='jb-table-test, datawrapper-table'), unsafe_allow_html=True)
+
 st.subheader("Round and TEG context")
 st.markdown('Shows how latest or selected rounds and TEGs compare to other rounds')
+st.caption('Percentile is the share of all results a score equals or beats.')
+
+data_version = get_data_version()
 
 name_mapping = {
     'Gross vs Par': 'GrossVP',
@@ -31,10 +52,11 @@ name_mapping = {
 }
 inverted_name_mapping = {v: k for k, v in name_mapping.items()}
 
-tab1, tab2 = st.tabs(["Chosen Round","Chosen TEG"])
+tab1, tab2, tab3 = st.tabs(["Chosen Round","Chosen TEG","Chosen 9"])
 
 with tab1:
-    df_round = get_ranked_round_data()
+    round_context = get_context_table('Round', data_version)
+    df_round = round_context.reset_index()[['TEG', 'TEGNum', 'Round']].drop_duplicates(ignore_index=True)
     max_teg_r = df_round.loc[df_round['TEGNum'].idxmax(), 'TEG']
     max_rd_in_max_teg = df_round[df_round['TEG'] == max_teg_r]['Round'].max()
 
@@ -66,11 +88,11 @@ with tab1:
         '---'
         friendly_metric = inverted_name_mapping.get(metric,metric)
         st.markdown(f"#### {friendly_metric}")
-        output = chosen_rd_context(df_round, teg_r, rd_r, metric)
-        st.write(output.to_html(index=False, justify='left', classes='jb-table-test, datawrapper-table'), unsafe_allow_html=True)
+        show_context(round_context, metric, teg_r, rd_r)
 
 with tab2:
-    df_teg = get_ranked_teg_data()
+    teg_context = get_context_table('TEG', data_version)
+    df_teg = teg_context.reset_index()[['TEG', 'TEGNum']].drop_duplicates(ignore_index=True)
     max_teg_t = df_teg.loc[df_teg['TEGNum'].idxmax(), 'TEG']
 
     # Set initial value if not already set
@@ -93,5 +115,47 @@ with tab2:
         '---'
         friendly_metric = inverted_name_mapping.get(metric,metric)
         st.markdown(f"#### {friendly_metric}")
-        output = chosen_teg_context(df_teg, teg_t, metric)
-        st.write(output.to_html(index=False, justify='left', classes='jb-table-test, datawrapper-table'), unsafe_allow_html=True)
\ No newline at end of file
+        show_context(teg_context, metric, teg_t)
+
+with tab3:
+    nine_context = get_context_table('FrontBack', data_version)
+    df_nine = nine_context.reset_index()[['TEG', 'TEGNum', 'Round', 'FrontBack']].drop_duplicates(ignore_index=True)
+    max_teg_f = df_nine.loc[df_nine['TEGNum'].idxmax(), 'TEG']
+    max_rd_in_max_teg_f = df_nine[df_nine['TEG'] == max_teg_f]['Round'].max()
+
+    # Set initial values if not already set
+    if st.session_state.teg_f is None:
+        st.session_state.teg_f = max_teg_f
+    if st.session_state.rd_f is None:
+        st.session_state.rd_f = max_rd_in_max_teg_f
+
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        teg_options = sorted(df_nine['TEG'].unique())
+        teg_index = teg_options.index(st.session_state.teg_f)
+        teg_f = st.selectbox("Select TEG (9)", options=teg_options, index=teg_index, key='teg_f_select')
+        st.session_state.teg_f = teg_f
+
+    with col2:
+        rd_options = sorted(df_nine[df_nine['TEG'] == teg_f]['Round'].unique())
+        rd_index = rd_options.index(st.session_state.rd_f) if st.session_state.rd_f in rd_options else 0
+        rd_f = st.selectbox("Select Round (9)", options=rd_options, index=rd_index, key='rd_f_select')
+        st.session_state.rd_f = rd_f
+
+    with col3:
+        nine_options = [fb for fb in ['Front', 'Back']
+                        if ((df_nine['TEG'] == teg_f) & (df_nine['Round'] == rd_f) & (df_nine['FrontBack'] == fb)).any()]
+        nine_f = st.radio("Nine", options=nine_options, horizontal=True, key='nine_f_select')
+
+    with col4:
+        st.button("Latest 9", on_click=reset_nine_selection)
+
+    # Display nine-hole context tables
+    for metric in ['Sc', 'Stableford', 'GrossVP', 'NetVP']:
+        '---'
+        friendly_metric = inverted_name_mapping.get(metric,metric)
+        st.markdown(f"#### {friendly_metric}")
+        show_context(nine_context, metric, teg_f, rd_f, nine_f)
+
+show_timings()
@@ -0,0 +1,79 @@
+import hashlib
+import streamlit as st
+import pandas as pd
+from utils import load_all_data, get_data_version, load_and_prepare_handicap_data, datawrapper_table_css
+from handicap_scenarios import (
+    ACTUAL_SCENARIO,
+    actual_handicaps,
+    apply_handicap_rules,
+    evaluate_handicap_scenarios,
+    compare_scenario_winners
+)
+from timing import start_run, show_timings, timed_cache_data
+
+st.set_page_config(page_title="What-if Handicaps")
+start_run('What-if Handicaps')
+datawrapper_table_css()
+
+st.title("What-if Handicaps")
+st.markdown("Recalculates every TEG with different handicaps to see who would have won")
+
+# === LOAD DATA === #
+all_data = load_all_data(exclude_incomplete_tegs=True, exclude_teg_50=True)
+
+@timed_cache_data
+def get_scenario_results(data_version: str, allowances: tuple, max_change, custom_table_key: str,
+                         _all_data: pd.DataFrame, _custom_table: pd.DataFrame = None):
+    # Cached on the data version and scenario settings; the frames themselves are not hashed
+    base = actual_handicaps(_all_data)
+    scenarios = {ACTUAL_SCENARIO: base}
+    for allowance in allowances:
+        name = f"{allowance:.0%}" + (f", max change {max_change}" if max_change else "")
+        scenarios[name] = apply_handicap_rules(base, allowance, max_change)
+    if _custom_table is not None:
+        scenarios['Custom table'] = _custom_table
+    return evaluate_handicap_scenarios(_all_data, scenarios)
+
+# === SCENARIO CONTROLS === #
+col1, col2 = st.columns(2)
+with col1:
+    allowance_pcts = st.multiselect(
+        "Handicap allowances",
+        options=[100, 95, 90, 85, 80, 75],
+        default=[90],
+        format_func=lambda pct: f"{pct}%"
+    )
+with col2:
+    max_change = st.number_input("Max handicap change between TEGs (0 = no cap)", min_value=0, max_value=10, value=0, step=1)
+
+uploaded_table = st.file_uploader("Or upload an alternative handicap table (same format as handicaps.csv)", type='csv')
+custom_table = load_and_prepare_handicap_data(uploaded_table) if uploaded_table is not None else None
+custom_table_key = hashlib.sha1(uploaded_table.getvalue()).hexdigest() if uploaded_table is not None else ''
+
+if not allowance_pcts and custom_table is None:
+    st.info("Choose at least one allowance or upload a handicap table.")
+    st.stop()
+
+results = get_scenario_results(get_data_version(), tuple(pct / 100 for pct in allowance_pcts), max_change or None,
+                               custom_table_key, all_data, custom_table)
+winners = results['winners']
+scenario_names = [name for name in winners['Scenario'].unique() if name != ACTUAL_SCENARIO]
+
+# === WINS BY PLAYER ACROSS SCENARIOS === #
+'---'
+st.subheader("TEG Trophy wins by scenario")
+trophy_wins = winners.groupby(['TEG Trophy', 'Scenario']).size().unstack(fill_value=0)
+trophy_wins = trophy_wins[[ACTUAL_SCENARIO] + scenario_names].sort_values(ACTUAL_SCENARIO, ascending=False)
+trophy_wins.index.name = 'Player'
+st.write(trophy_wins.reset_index().to_html(index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+
+# === WINNERS BY TEG === #
+'---'
+st.subheader("Winners by TEG")
+chosen_scenario = st.radio("Compare actual winners with:", scenario_names, horizontal=True)
+comparison = compare_scenario_winners(winners, chosen_scenario)
+comparison['Changed'] = comparison['Changed'].map({True: '✱', False: ''})
+st.write(comparison.to_html(index=False, justify='left', classes='datawrapper-table'), unsafe_allow_html=True)
+st.caption("✱ = a different Trophy or Spoon winner under this scenario. Actual winners shown before any manual overrides (e.g. TEG 5).")
+
+show_timings()
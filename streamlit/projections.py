@@ -0,0 +1,211 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from utils import get_teg_rounds, TOTAL_HOLES, CONFIG
+
+# Configure Logging
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_SIMULATIONS = 100_000
+CHUNK_SIZE = 10_000
+MIN_SAMPLES = 20  # Fewest historical holes needed before falling back to a broader distribution
+SI_BANDS = [0, 6, 12, 18]  # Stroke index bands: 1-6, 7-12, 13-18
+
+
+def _si_band(si: pd.Series) -> pd.Series:
+    return pd.cut(si, bins=SI_BANDS, labels=False)
+
+
+def remaining_hole_layout(all_data: pd.DataFrame, teg_num: int) -> pd.DataFrame:
+    """
+    Work out PAR and SI for every hole of the TEG, including rounds that have not been played yet.
+
+    Rounds already started use the layout entered for them. Rounds not yet started use the layout of the course
+    listed in round_info.csv for that round, taken from previous visits, and otherwise the layout of the TEG's
+    most complete round.
+
+    Parameters:
+        all_data (pd.DataFrame): Hole-level data including the TEG in progress.
+        teg_num (int): The TEG to lay out.
+
+    Returns:
+        pd.DataFrame: One row per (Round, Hole) with PAR and SI.
+    """
+    teg_rows = all_data[all_data['TEGNum'] == teg_num]
+    played = teg_rows.groupby(['Round', 'Hole'], as_index=False)[['PAR', 'SI']].first()
+    holes_per_round = played.groupby('Round').size()
+    fullest_round = holes_per_round[holes_per_round == holes_per_round.max()].index.max()
+    fallback_layout = played[played['Round'] == fullest_round][['Hole', 'PAR', 'SI']]
+
+    try:
+        round_info = pd.read_csv(CONFIG["ROUND_INFO_PATH"])
+        round_courses = round_info[round_info['TEGNum'] == teg_num].set_index('Round')['Course']
+    except FileNotFoundError:
+        round_courses = pd.Series(dtype=object)
+
+    layouts = [played]
+    for rd in range(1, get_teg_rounds(f'TEG {teg_num}') + 1):
+        missing_holes = set(range(1, TOTAL_HOLES + 1)) - set(played.loc[played['Round'] == rd, 'Hole'])
+        if not missing_holes:
+            continue
+
+        course = round_courses.get(rd)
+        course_rows = all_data[all_data['Course'] == course] if course is not None and 'Course' in all_data else all_data.iloc[0:0]
+        layout = course_rows.groupby('Hole', as_index=False)[['PAR', 'SI']].agg(lambda x: x.mode().iloc[0])
+        if len(layout) < TOTAL_HOLES:
+            layout = fallback_layout
+
+        layout = layout[layout['Hole'].isin(missing_holes)].assign(Round=rd)
+        layouts.append(layout)
+
+    return pd.concat(layouts, ignore_index=True)[['Round', 'Hole', 'PAR', 'SI']].sort_values(['Round', 'Hole'])
+
+
+def build_simulation_plan(all_data: pd.DataFrame, teg_num: int) -> Tuple[List[str], np.ndarray, np.ndarray, List[List[Tuple[np.ndarray, np.ndarray]]]]:
+    """
+    Gather what each player has scored so far and the holes they still have to play, paired with the
+    historical GrossVP distribution to sample each hole from.
+
+    Holes are grouped by (PAR, SI band). Each player's distribution for a group comes from their own history
+    outside this TEG, falling back to their PAR-only history and then to all players' history for that PAR
+    when there are fewer than MIN_SAMPLES holes.
+
+    Parameters:
+        all_data (pd.DataFrame): Hole-level data including the TEG in progress.
+        teg_num (int): The TEG to project.
+
+    Returns:
+        Tuple: Player names, current Stableford totals, current GrossVP totals, and for each player a list of
+        (historical GrossVP samples, handicap strokes for each remaining hole in the group) pairs.
+    """
+    teg_rows = all_data[all_data['TEGNum'] == teg_num]
+    history = all_data[all_data['TEGNum'] != teg_num].assign(Band=lambda x: _si_band(x['SI']))
+    layout = remaining_hole_layout(all_data, teg_num).assign(Band=lambda x: _si_band(x['SI']))
+
+    totals = teg_rows.groupby('Player').agg(Stableford=('Stableford', 'sum'), GrossVP=('GrossVP', 'sum'), HC=('HC', 'first'))
+    players = totals.index.tolist()
+
+    by_band = {key: grp['GrossVP'].to_numpy() for key, grp in history.groupby(['Player', 'PAR', 'Band'])}
+    by_par = {key: grp['GrossVP'].to_numpy() for key, grp in history.groupby(['Player', 'PAR'])}
+    all_by_par = {par: grp['GrossVP'].to_numpy() for par, grp in history.groupby('PAR')}
+
+    plan = []
+    for player in players:
+        played = teg_rows.loc[teg_rows['Player'] == player, ['Round', 'Hole']]
+        remaining = layout.merge(played, on=['Round', 'Hole'], how='left', indicator=True)
+        remaining = remaining[remaining['_merge'] == 'left_only']
+
+        hc = totals.loc[player, 'HC']
+        remaining = remaining.assign(HCStrokes=(hc // 18) + ((hc % 18) >= remaining['SI']).astype(int))
+
+        player_plan = []
+        for (par, band), holes in remaining.groupby(['PAR', 'Band']):
+            samples = by_band.get((player, par, band), np.array([]))
+            if len(samples) < MIN_SAMPLES:
+                samples = by_par.get((player, par), np.array([]))
+            if len(samples) < MIN_SAMPLES:
+                samples = all_by_par.get(par, np.array([0.0]))
+            player_plan.append((samples.astype(float), holes['HCStrokes'].to_numpy(dtype=float)))
+        plan.append(player_plan)
+
+    return players, totals['Stableford'].to_numpy(dtype=float), totals['GrossVP'].to_numpy(dtype=float), plan
+
+
+def _positions(totals: np.ndarray, higher_is_better: bool) -> np.ndarray:
+    """
+    Rank players within each simulation, ties sharing the better position.
+    """
+    if higher_is_better:
+        better = totals[:, None, :] > totals[:, :, None]
+    else:
+        better = totals[:, None, :] < totals[:, :, None]
+    return 1 + better.sum(axis=2)
+
+
+def _share_of_wins(totals: np.ndarray, best: np.ndarray) -> np.ndarray:
+    """
+    Credit each simulation's win to the players on the best total, split evenly on ties.
+    """
+    winners = totals == best[:, None]
+    return (winners / winners.sum(axis=1, keepdims=True)).sum(axis=0)
+
+
+def _simulate_chunk(current_stableford: np.ndarray, current_gross: np.ndarray, plan: List[List[Tuple[np.ndarray, np.ndarray]]],
+                    n_sims: int, seed: np.random.SeedSequence) -> Dict[str, np.ndarray]:
+    """
+    Simulate n_sims finishes and return summed outcome counts for each player.
+    """
+    rng = np.random.default_rng(seed)
+    stableford = np.tile(current_stableford, (n_sims, 1))
+    gross = np.tile(current_gross, (n_sims, 1))
+
+    for p, player_plan in enumerate(plan):
+        for samples, hc_strokes in player_plan:
+            gross_vp = samples[rng.integers(0, len(samples), size=(n_sims, len(hc_strokes)))]
+            gross[:, p] += gross_vp.sum(axis=1)
+            stableford[:, p] += np.clip(2 - gross_vp + hc_strokes, 0, None).sum(axis=1)
+
+    return {
+        'Trophy': _share_of_wins(stableford, stableford.max(axis=1)),
+        'Jacket': _share_of_wins(gross, gross.min(axis=1)),
+        'Spoon': _share_of_wins(stableford, stableford.min(axis=1)),
+        'Trophy Position': _positions(stableford, higher_is_better=True).sum(axis=0),
+        'Jacket Position': _positions(gross, higher_is_better=False).sum(axis=0),
+        'Stableford': stableford.sum(axis=0),
+        'GrossVP': gross.sum(axis=0)
+    }
+
+
+def project_teg_outcomes(all_data: pd.DataFrame, teg_num: int, n_sims: int = DEFAULT_SIMULATIONS,
+                         n_workers: Optional[int] = None, seed: Optional[int] = None) -> pd.DataFrame:
+    """
+    Monte Carlo projection of the final standings of a TEG in progress.
+
+    Each player's remaining holes are sampled from their historical GrossVP on holes of the same par and stroke
+    index band. Simulations run in vectorised chunks of CHUNK_SIZE, optionally spread over a process pool.
+
+    Parameters:
+        all_data (pd.DataFrame): Hole-level data including the TEG in progress.
+        teg_num (int): The TEG to project.
+        n_sims (int): Number of simulations.
+        n_workers (int, optional): Number of worker processes. None or 1 runs in this process.
+        seed (int, optional): Seed for reproducible projections.
+
+    Returns:
+        pd.DataFrame: One row per player with current totals, holes remaining, the probability of winning the
+        Trophy, Jacket and Spoon, expected finishing positions and expected final totals.
+    """
+    logger.info(f"Projecting TEG {teg_num} outcomes with {n_sims} simulations.")
+    players, current_stableford, current_gross, plan = build_simulation_plan(all_data, teg_num)
+
+    chunk_sizes = [CHUNK_SIZE] * (n_sims // CHUNK_SIZE) + ([n_sims % CHUNK_SIZE] if n_sims % CHUNK_SIZE else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    args = [(current_stableford, current_gross, plan, size, chunk_seed) for size, chunk_seed in zip(chunk_sizes, seeds)]
+
+    if n_workers and n_workers > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            chunks = list(executor.map(_simulate_chunk, *zip(*args)))
+    else:
+        chunks = [_simulate_chunk(*chunk_args) for chunk_args in args]
+
+    summed = {key: sum(chunk[key] for chunk in chunks) for key in chunks[0]}
+
+    projection = pd.DataFrame({
+        'Player': players,
+        'Stableford': current_stableford,
+        'GrossVP': current_gross,
+        'Holes Remaining': [int(sum(len(hc_strokes) for _, hc_strokes in player_plan)) for player_plan in plan],
+        'P(Trophy)': summed['Trophy'] / n_sims,
+        'P(Jacket)': summed['Jacket'] / n_sims,
+        'P(Spoon)': summed['Spoon'] / n_sims,
+        'Exp. Trophy Position': summed['Trophy Position'] / n_sims,
+        'Exp. Jacket Position': summed['Jacket Position'] / n_sims,
+        'Exp. Stableford': summed['Stableford'] / n_sims,
+        'Exp. GrossVP': summed['GrossVP'] / n_sims
+    }).sort_values('P(Trophy)', ascending=False, ignore_index=True)
+
+    logger.info(f"TEG {teg_num} projection complete.")
+    return projection
@@ -0,0 +1,459 @@
+"""
+Local read-only JSON API over the TEG stats.
+
+Serves leaderboards, round scorecards, winners, records and player careers from the same getters the Streamlit
+pages use, so widgets and other dashboards can poll without starting a Streamlit session per client.
+
+Responses are cached by request and data version. Each carries a content-hash ETag, so a client that sends
+If-None-Match gets a 304 until the data changes, and bodies are gzipped for clients that accept it.
+
+With --live the server also runs the live scoring worker and pushes leaderboard deltas (rank changes and new
+round totals) to subscribers as Server-Sent Events whenever new scores are ingested, instead of clients
+polling for reruns.
+
+Usage:
+    python stats_api.py [--host HOST] [--port PORT] [--live]
+
+Endpoints:
+    /api                          List the endpoints
+    /api/tegs                     Every TEG with its year and whether it is complete
+    /api/leaderboard?teg=&measure=  Leaderboard for a TEG (default latest) on Stableford, GrossVP, NetVP or Sc
+    /api/scorecard?teg=&round=&player=  Hole-by-hole scores for a round (default last round of the TEG)
+    /api/winners                  Trophy, Jacket and Spoon winners of every complete TEG
+    /api/records?scope=&player=   All-time records and personal bests
+    /api/players                  Every player
+    /api/players/<player>         Career totals, form, bests and wins for a player (name or initials)
+    /api/live                     Event stream of live leaderboard changes (with --live)
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import queue
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+import pandas as pd
+from utils import (
+    LEADERBOARD_MEASURES,
+    FORM_MEASURES,
+    build_leaderboard,
+    current_form,
+    get_data_version,
+    get_player_form,
+    get_Pl_data,
+    get_round_data,
+    get_teg_rounds,
+    get_teg_winners_data,
+    load_columns,
+    load_record_index
+)
+from live_scoring import LiveScoringWorker
+from cache_inspector import clear_caches
+
+# Configure Logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+CACHE_MAX_AGE = 30  # Seconds clients may reuse a response before revalidating
+MAX_CACHED_RESPONSES = 256
+GZIP_MIN_BYTES = 512  # Smaller bodies are not worth compressing
+LIVE_PATH = '/api/live'
+LIVE_KEEPALIVE_SECONDS = 15
+LIVE_QUEUE_SIZE = 64  # Deltas held for a slow subscriber before it is sent a fresh snapshot instead
+SCORECARD_COLUMNS = ('TEG', 'TEGNum', 'Round', 'Date', 'Course', 'Pl', 'Player', 'Hole', 'PAR', 'SI',
+                     'HCStrokes', 'Sc', 'GrossVP', 'NetVP', 'Stableford')
+
+ROUTES: Dict[str, Callable[..., Any]] = {}
+
+_response_cache: 'OrderedDict[Tuple, Tuple[bytes, Optional[bytes], str]]' = OrderedDict()
+_cache_lock = threading.Lock()
+_seen_version: Optional[str] = None
+_live_worker: Optional[LiveScoringWorker] = None
+
+
+def route(path: str) -> Callable:
+    """
+    Register an endpoint. The handler is called with the query parameters as keyword arguments (plus any path
+    argument) and returns a DataFrame, list or dict to be serialised as JSON.
+    """
+    def register(handler: Callable) -> Callable:
+        ROUTES[path] = handler
+        return handler
+    return register
+
+
+def records(df: pd.DataFrame) -> list:
+    """
+    Convert a DataFrame to a list of JSON-ready dicts (NaN becomes null, numpy types become Python types).
+    """
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+def current_version() -> str:
+    """
+    Return the current data version. When it changes (an ingest has run) the Streamlit caches behind the
+    unversioned getters and the response cache are cleared so nothing stale is served.
+    """
+    global _seen_version
+    data_version = get_data_version()
+    with _cache_lock:
+        if data_version != _seen_version:
+            if _seen_version is not None:
+                logger.info(f"Data version changed to {data_version}. Clearing caches.")
+                clear_caches()
+            _response_cache.clear()
+            _seen_version = data_version
+    return data_version
+
+
+def resolve_teg(round_data: pd.DataFrame, teg: Optional[str]) -> pd.DataFrame:
+    """
+    Return the round data for a TEG given as 'TEG 16' or '16', or for the latest TEG if none is given.
+
+    Raises:
+        ValueError: If teg is not a TEG label or number.
+        LookupError: If there is no data for the TEG.
+    """
+    if teg is None:
+        tegnum = round_data['TEGNum'].max()
+    else:
+        label = teg.strip().upper().replace('TEG', '').strip()
+        if not label.isdigit():
+            raise ValueError(f"teg must be a TEG label or number, not '{teg}'")
+        tegnum = int(label)
+    teg_rounds = round_data[round_data['TEGNum'] == tegnum]
+    if teg_rounds.empty:
+        raise LookupError(f"No data for TEG {tegnum}")
+    return teg_rounds
+
+
+def resolve_player(player: str) -> str:
+    """
+    Return the full name of a player given their name or initials (case-insensitive).
+
+    Raises:
+        LookupError: If no player matches.
+    """
+    players = get_Pl_data()[['Pl', 'Player']]
+    match = players[(players['Pl'].str.upper() == player.upper()) | (players['Player'].str.upper() == player.upper())]
+    if match.empty:
+        raise LookupError(f"Unknown player '{player}'")
+    return match['Player'].iloc[0]
+
+
+@route('/api')
+def api_index(data_version: str) -> list:
+    """List the endpoints."""
+    return [{'path': path, 'description': (handler.__doc__ or '').strip().split('\n')[0]}
+            for path, handler in ROUTES.items()]
+
+
+@route('/api/tegs')
+def api_tegs(data_version: str) -> list:
+    """Every TEG with its year, rounds played and whether it is complete."""
+    round_data = get_round_data()
+    tegs = (round_data.groupby(['TEGNum', 'TEG'], as_index=False)
+            .agg(Year=('Year', 'first'), Rounds_Played=('Round', 'nunique'))
+            .sort_values('TEGNum'))
+    tegs['Rounds'] = tegs['TEG'].map(get_teg_rounds)
+    tegs['Complete'] = tegs['Rounds_Played'] >= tegs['Rounds']
+    return records(tegs)
+
+
+@route('/api/leaderboard')
+def api_leaderboard(data_version: str, teg: Optional[str] = None, measure: str = 'Stableford') -> dict:
+    """Leaderboard for a TEG (default latest) on Stableford, GrossVP, NetVP or Sc."""
+    if measure not in LEADERBOARD_MEASURES:
+        raise ValueError(f"measure must be one of {', '.join(LEADERBOARD_MEASURES)}")
+    teg_rounds = resolve_teg(get_round_data(), teg)
+    teg_label = teg_rounds['TEG'].iloc[0]
+    leaderboard = build_leaderboard(teg_rounds, measure, ascending=LEADERBOARD_MEASURES[measure])
+    return {
+        'teg': teg_label,
+        'measure': measure,
+        'rounds_played': int(teg_rounds['Round'].nunique()),
+        'complete': bool(teg_rounds['Round'].nunique() >= get_teg_rounds(teg_label)),
+        'leaderboard': records(leaderboard)
+    }
+
+
+@route('/api/scorecard')
+def api_scorecard(data_version: str, teg: Optional[str] = None, round: Optional[str] = None,
+                  player: Optional[str] = None) -> dict:
+    """Hole-by-hole scores for a round (default the last round of the TEG), optionally for one player."""
+    teg_rounds = resolve_teg(get_round_data(), teg)
+    tegnum = int(teg_rounds['TEGNum'].iloc[0])
+    if round is None:
+        round_num = int(teg_rounds['Round'].max())
+    elif round.isdigit():
+        round_num = int(round)
+    else:
+        raise ValueError(f"round must be a number, not '{round}'")
+
+    holes = load_columns(SCORECARD_COLUMNS, data_version)
+    holes = holes[(holes['TEGNum'] == tegnum) & (holes['Round'] == round_num)]
+    if player is not None:
+        holes = holes[holes['Player'] == resolve_player(player)]
+    if holes.empty:
+        raise LookupError(f"No scores for TEG {tegnum} round {round_num}" + (f" for {player}" if player else ''))
+
+    first = holes.iloc[0]
+    scorecards = []
+    for (pl, name), player_holes in holes.sort_values(['Player', 'Hole']).groupby(['Pl', 'Player'], sort=False):
+        scorecards.append({
+            'Pl': pl,
+            'Player': name,
+            'Totals': records(player_holes[['Sc', 'GrossVP', 'NetVP', 'Stableford']].sum().to_frame().T)[0],
+            'Holes': records(player_holes[['Hole', 'PAR', 'SI', 'HCStrokes', 'Sc', 'GrossVP', 'NetVP', 'Stableford']])
+        })
+    return {'teg': first['TEG'], 'round': round_num, 'date': first['Date'], 'course': first['Course'],
+            'scorecards': scorecards}
+
+
+@route('/api/winners')
+def api_winners(data_version: str) -> list:
+    """Trophy, Jacket and Spoon winners of every complete TEG."""
+    return records(get_teg_winners_data(data_version))
+
+
+@route('/api/records')
+def api_records(data_version: str, scope: Optional[str] = None, player: Optional[str] = None) -> list:
+    """All-time records and personal bests, optionally filtered by scope ('All-time record' or 'Personal best') and player."""
+    index = load_record_index(data_version)
+    if scope is not None:
+        index = index[index['Scope'].str.lower() == scope.lower()]
+    if player is not None:
+        index = index[index['Player'] == resolve_player(player)]
+    return records(index)
+
+
+@route('/api/players')
+def api_players(data_version: str, player: Optional[str] = None) -> Any:
+    """Every player, or the career of one player at /api/players/<name or initials>."""
+    if player is None:
+        return records(get_Pl_data()[['Pl', 'Player']].sort_values('Player'))
+
+    name = resolve_player(player)
+    career = get_Pl_data().set_index('Player').loc[name]
+    rounds = get_round_data()
+    player_rounds = rounds[rounds['Player'] == name]
+    winners = get_teg_winners_data(data_version)
+    index = load_record_index(data_version)
+    form = get_player_form(data_version)
+    player_form = {}
+    for measure in FORM_MEASURES:
+        measure_form = current_form(form, measure)
+        player_form[measure] = records(measure_form[measure_form['Player'] == name])
+
+    return {
+        'Pl': career['Pl'],
+        'Player': name,
+        'TEGs': int(player_rounds['TEGNum'].nunique()),
+        'Rounds': int(len(player_rounds)),
+        'Totals': {measure: float(career[measure]) for measure in LEADERBOARD_MEASURES},
+        'Per Round': {measure: round(float(player_rounds[measure].mean()), 2) for measure in LEADERBOARD_MEASURES},
+        'Wins': {title: int((winners[title].str.rstrip('*') == name).sum()) for title in ['TEG Trophy', 'Green Jacket', 'HMM Wooden Spoon']},
+        'Form': {measure: rows[0] for measure, rows in player_form.items() if rows},
+        'Personal Bests': records(index[(index['Scope'] == 'Personal best') & (index['Player'] == name)]
+                                  .drop(columns=['Scope', 'Player']))
+    }
+
+
+def dispatch(path: str) -> Tuple[Callable, Dict[str, str]]:
+    """
+    Find the handler for a request path, with any path argument as a keyword.
+
+    Raises:
+        LookupError: If no endpoint matches the path.
+    """
+    path = path.rstrip('/') or '/'
+    if path in ROUTES:
+        return ROUTES[path], {}
+    if path.startswith('/api/players/'):
+        return ROUTES['/api/players'], {'player': unquote(path[len('/api/players/'):])}
+    raise LookupError(f"No endpoint at {path}")
+
+
+def get_response(path: str, query: Dict[str, str], data_version: str) -> Tuple[bytes, Optional[bytes], str]:
+    """
+    Return the JSON body, its gzipped form (None if too small to be worth it) and ETag for a request, from the
+    response cache when the same request has been answered for this data version.
+    """
+    key = (path, tuple(sorted(query.items())), data_version)
+    with _cache_lock:
+        if key in _response_cache:
+            _response_cache.move_to_end(key)
+            return _response_cache[key]
+
+    handler, path_args = dispatch(path)
+    body = json.dumps(handler(data_version, **path_args, **query), separators=(',', ':')).encode('utf-8')
+    compressed = gzip.compress(body) if len(body) >= GZIP_MIN_BYTES else None
+    etag = f'"{hashlib.sha1(body).hexdigest()}"'
+    response = (body, compressed, etag)
+
+    with _cache_lock:
+        _response_cache[key] = response
+        while len(_response_cache) > MAX_CACHED_RESPONSES:
+            _response_cache.popitem(last=False)
+    return response
+
+
+class StatsRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves GET and HEAD requests for the registered endpoints.
+    """
+    server_version = 'TEGStatsAPI/1.0'
+
+    def do_GET(self) -> None:
+        self.respond(send_body=True)
+
+    def do_HEAD(self) -> None:
+        self.respond(send_body=False)
+
+    def respond(self, send_body: bool) -> None:
+        url = urlsplit(self.path)
+        if url.path.rstrip('/') == LIVE_PATH:
+            return self.stream_live(send_body)
+        try:
+            query = dict(parse_qsl(url.query))
+            body, compressed, etag = get_response(url.path, query, current_version())
+        except LookupError as e:
+            return self.send_error_json(404, str(e).strip("'\""), send_body)
+        except (ValueError, TypeError) as e:
+            return self.send_error_json(400, str(e), send_body)
+        except Exception:
+            logger.exception(f"Error handling {self.path}")
+            return self.send_error_json(500, 'Internal error', send_body)
+
+        if etag in [tag.strip().removeprefix('W/') for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(304)
+            self.send_common_headers(etag)
+            self.end_headers()
+            return
+
+        use_gzip = compressed is not None and 'gzip' in self.headers.get('Accept-Encoding', '')
+        payload = compressed if use_gzip else body
+        self.send_response(200)
+        self.send_common_headers(etag)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        if use_gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(payload)
+
+    def stream_live(self, send_body: bool) -> None:
+        """
+        Stream live leaderboard changes as Server-Sent Events: a 'snapshot' event per live leaderboard on
+        connect, then a 'leaderboard' event each time an ingest changes one, until the client disconnects.
+        A client that falls more than LIVE_QUEUE_SIZE deltas behind has them dropped and gets a 'reset' event,
+        telling it to discard its boards, followed by a fresh snapshot.
+        """
+        worker = _live_worker
+        if worker is None:
+            return self.send_error_json(404, 'Live scoring is not running. Start the API with --live.', send_body)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-store')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        if not send_body:
+            return
+
+        events = queue.Queue(maxsize=LIVE_QUEUE_SIZE)
+        overflowed = threading.Event()
+
+        def listener(event: dict) -> None:
+            # Runs on the worker thread, so it must never wait for a slow client
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                overflowed.set()
+
+        worker.add_listener(listener)
+        try:
+            for event in worker.leaderboard_snapshot():
+                self.send_event('snapshot', event)
+            while True:
+                if overflowed.is_set():
+                    overflowed.clear()
+                    while not events.empty():
+                        events.get_nowait()
+                    self.send_event('reset', {'version': worker.version})
+                    for event in worker.leaderboard_snapshot():
+                        self.send_event('snapshot', event)
+                    continue
+                try:
+                    event = events.get(timeout=LIVE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    self.wfile.write(b': keepalive\n\n')
+                    self.wfile.flush()
+                    continue
+                self.send_event('leaderboard', event)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            worker.remove_listener(listener)
+
+    def send_event(self, name: str, event: dict) -> None:
+        data = json.dumps(event, separators=(',', ':'))
+        self.wfile.write(f"event: {name}\nid: {event['version']}\ndata: {data}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def send_common_headers(self, etag: str) -> None:
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', f'public, max-age={CACHE_MAX_AGE}')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+
+    def send_error_json(self, status: int, message: str, send_body: bool) -> None:
+        body = json.dumps({'error': message}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.info(f"{self.address_string()} {format % args}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve the TEG stats as a local read-only JSON API.")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"Interface to listen on (default {DEFAULT_HOST}).")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"Port to listen on (default {DEFAULT_PORT}).")
+    parser.add_argument('--live', action='store_true',
+                        help=f"Run the live scoring worker and stream leaderboard changes at {LIVE_PATH}.")
+    args = parser.parse_args()
+
+    global _live_worker
+    if args.live:
+        _live_worker = LiveScoringWorker()
+        _live_worker.start()
+
+    server = ThreadingHTTPServer((args.host, args.port), StatsRequestHandler)
+    server.daemon_threads = True
+    logger.info(f"Serving the stats API at http://{args.host}:{args.port}/api")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if _live_worker is not None:
+            _live_worker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Opt-in persistent timing telemetry.
+
+When TEG_TELEMETRY=1, every timed function call (see timing.py) and every page run is appended as one JSON
+line to data/telemetry/timings.jsonl (TEG_TELEMETRY_FILE to override), rotated at TELEMETRY_MAX_BYTES with
+TELEMETRY_BACKUPS old files kept. Running totals per page and function are also written to a Prometheus
+text-format snapshot (timings.prom next to the log) for scraping with the node exporter's textfile collector.
+
+Each record carries the release (TEG_RELEASE, or the git commit) so timings can be compared across
+deployments with telemetry_report.py.
+"""
+import os
+import json
+import time
+import logging
+import threading
+import subprocess
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional, Tuple
+import pandas as pd
+
+# Configure Logging
+logger = logging.getLogger(__name__)
+
+# Constants
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TELEMETRY_ENABLED = os.environ.get('TEG_TELEMETRY', '0') == '1'
+TELEMETRY_FILE = os.environ.get('TEG_TELEMETRY_FILE', os.path.join(BASE_DIR, "../data/telemetry/timings.jsonl"))
+TELEMETRY_MAX_BYTES = 5 * 1024 * 1024
+TELEMETRY_BACKUPS = 5
+PROMETHEUS_FILE = os.path.join(os.path.dirname(TELEMETRY_FILE), 'timings.prom')
+PROMETHEUS_WRITE_SECONDS = 10  # Minimum interval between snapshot rewrites
+MAX_ARG_LENGTH = 40
+
+_sink: Optional[logging.Logger] = None
+_sink_lock = threading.Lock()
+_totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+_totals_lock = threading.Lock()
+_last_snapshot = 0.0
+
+
+def get_release() -> str:
+    """
+    Return the deployment the app is running: TEG_RELEASE if set, otherwise the short git commit hash.
+    """
+    release = os.environ.get('TEG_RELEASE')
+    if release:
+        return release
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or 'unknown'
+    except (OSError, subprocess.SubprocessError):
+        return 'unknown'
+
+
+RELEASE = get_release() if TELEMETRY_ENABLED else None
+
+
+def _get_sink() -> logging.Logger:
+    """
+    Return the logger that writes telemetry lines, creating the file handler on first use.
+    """
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            os.makedirs(os.path.dirname(TELEMETRY_FILE), exist_ok=True)
+            handler = RotatingFileHandler(TELEMETRY_FILE, maxBytes=TELEMETRY_MAX_BYTES, backupCount=TELEMETRY_BACKUPS,
+                                          encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            sink = logging.getLogger('teg.telemetry')
+            sink.setLevel(logging.INFO)
+            sink.propagate = False
+            sink.addHandler(handler)
+            _sink = sink
+        return _sink
+
+
+def current_data_version() -> Optional[str]:
+    """
+    Return the data version of the all-data file, for tagging a page run.
+    """
+    # Imported here because utils imports timing, which imports this module
+    from utils import get_data_version
+    try:
+        return get_data_version()
+    except OSError:
+        return None
+
+
+def args_signature(args: tuple, kwargs: dict, max_length: Optional[int] = MAX_ARG_LENGTH) -> str:
+    """
+    Describe a call's arguments compactly: DataFrames by shape, scalars by value (truncated to max_length
+    characters unless it is None), anything else by type.
+    """
+    def describe(value: Any) -> str:
+        if isinstance(value, pd.DataFrame):
+            return f"DataFrame[{value.shape[0]}x{value.shape[1]}]"
+        if isinstance(value, pd.Series):
+            return f"Series[{len(value)}]"
+        if value is None or isinstance(value, (str, int, float, bool, tuple)):
+            text = repr(value)
+            return text if max_length is None or len(text) <= max_length else text[:max_length - 3] + '...'
+        return type(value).__name__
+
+    return '(' + ', '.join([describe(a) for a in args] + [f"{k}={describe(v)}" for k, v in kwargs.items()]) + ')'
+
+
+def count_rows(value: Any) -> Optional[int]:
+    """
+    Return the number of DataFrame rows in a value (summed over a tuple or list of DataFrames), or None if it
+    holds no DataFrames.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        counts = [len(v) for v in value if isinstance(v, (pd.DataFrame, pd.Series))]
+        return sum(counts) if counts else None
+    return None
+
+
+def record_function(run: Dict[str, Any], name: str, elapsed: float, cache: Optional[str],
+                    call: Optional[Tuple[tuple, dict]] = None, result: Any = None) -> None:
+    """
+    Append a function timing record for a call made during a page run.
+
+    Parameters:
+        run (dict): The page run from timing.start_run.
+        name (str): Function or timer name.
+        elapsed (float): Wall time in seconds.
+        cache (str, optional): 'hit' or 'miss' for cached getters, otherwise None.
+        call (tuple, optional): The call's (args, kwargs).
+        result: The call's return value, used to count rows out.
+    """
+    args, kwargs = call if call is not None else ((), {})
+    rows_in = count_rows(list(args) + list(kwargs.values()))
+    _write({
+        'type': 'function',
+        'page': run['page'],
+        'function': name,
+        'args': args_signature(args, kwargs) if call is not None else None,
+        'duration_ms': round(elapsed * 1000, 3),
+        'rows_in': rows_in,
+        'rows_out': count_rows(result),
+        'cache': cache,
+        'data_version': run.get('data_version'),
+        'release': RELEASE
+    })
+    _add_total('function', name, elapsed, cache)
+
+
+def record_page_run(run: Dict[str, Any], elapsed: float) -> None:
+    """
+    Append a page run record and refresh the Prometheus snapshot.
+    """
+    functions = run['functions'].values()
+    _write({
+        'type': 'page',
+        'page': run['page'],
+        'function': None,
+        'duration_ms': round(elapsed * 1000, 3),
+        'calls': int(sum(f['Calls'] for f in functions)),
+        'cache_hits': int(sum(f['Hits'] for f in functions)),
+        'cache_misses': int(sum(f['Misses'] for f in functions)),
+        'data_version': run.get('data_version'),
+        'release': RELEASE
+    })
+    _add_total('page', run['page'], elapsed, None)
+    write_prometheus_snapshot()
+
+
+def _write(record: Dict[str, Any]) -> None:
+    record = {'ts': datetime.now().isoformat(timespec='milliseconds'), **record}
+    try:
+        _get_sink().info(json.dumps(record, separators=(',', ':')))
+    except OSError as e:
+        logger.warning(f"Could not write telemetry: {e}")
+
+
+def _add_total(kind: str, name: str, elapsed: float, cache: Optional[str]) -> None:
+    with _totals_lock:
+        totals = _totals.setdefault((kind, name), {'count': 0, 'sum': 0.0, 'hits': 0, 'misses': 0})
+        totals['count'] += 1
+        totals['sum'] += elapsed
+        if cache == 'hit':
+            totals['hits'] += 1
+        elif cache == 'miss':
+            totals['misses'] += 1
+
+
+def prometheus_text() -> str:
+    """
+    Return the running totals since the process started in Prometheus text exposition format.
+    """
+    def label(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    with _totals_lock:
+        totals = {key: dict(value) for key, value in _totals.items()}
+
+    release = label(RELEASE or 'unknown')
+    lines = []
+    metrics = [
+        ('teg_page_run_seconds', 'page', 'summary', 'Wall time of page runs.'),
+        ('teg_function_seconds', 'function', 'summary', 'Wall time of timed function calls.')
+    ]
+    for metric, kind, metric_type, help_text in metrics:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {metric_type}"]
+        for (key_kind, name), value in sorted(totals.items()):
+            if key_kind == kind:
+                labels = f'{kind}="{label(name)}",release="{release}"'
+                lines.append(f"{metric}_count{{{labels}}} {value['count']}")
+                lines.append(f"{metric}_sum{{{labels}}} {value['sum']:.6f}")
+    for metric, field, help_text in [('teg_cache_hits_total', 'hits', 'Cache hits of cached getters.'),
+                                     ('teg_cache_misses_total', 'misses', 'Cache misses of cached getters.')]:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+        for (key_kind, name), value in sorted(totals.items()):
+            if key_kind == 'function' and value['hits'] + value['misses'] > 0:
+                lines.append(f'{metric}{{function="{label(name)}",release="{release}"}} {value[field]}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus_snapshot(force: bool = False) -> None:
+    """
+    Rewrite the Prometheus snapshot file, at most once every PROMETHEUS_WRITE_SECONDS unless forced.
+    """
+    global _last_snapshot
+    now = time.monotonic()
+    if not force and now - _last_snapshot < PROMETHEUS_WRITE_SECONDS:
+        return
+    _last_snapshot = now
+    tmp_file = f"{PROMETHEUS_FILE}.tmp"
+    try:
+        os.makedirs(os.path.dirname(PROMETHEUS_FILE), exist_ok=True)
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(prometheus_text())
+        os.replace(tmp_file, PROMETHEUS_FILE)
+    except OSError as e:
+        logger.warning(f"Could not write Prometheus snapshot: {e}")
@@ -0,0 +1,97 @@
+"""
+Summarise the timing telemetry written when TEG_TELEMETRY=1 (see telemetry.py).
+
+Reads the JSONL log and its rotated backups and prints the run count, p50, p95 and max wall time per page,
+by release so a regression after a deployment stands out. With --functions it summarises the timed functions
+instead, with their cache hit rate.
+
+Usage:
+    python telemetry_report.py [--file FILE] [--since YYYY-MM-DD] [--functions] [--top N] [--all-releases]
+"""
+import os
+import glob
+import argparse
+import logging
+import pandas as pd
+from telemetry import TELEMETRY_FILE
+
+# Configure Logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def load_telemetry(telemetry_file: str = TELEMETRY_FILE) -> pd.DataFrame:
+    """
+    Load the telemetry log and its rotated backups (timings.jsonl.1, .2, ...) into one DataFrame.
+    """
+    backups = [f for f in glob.glob(f"{telemetry_file}.*") if f.rsplit('.', 1)[-1].isdigit()]
+    files = [f for f in backups + [telemetry_file] if os.path.exists(f) and os.path.getsize(f) > 0]
+    if not files:
+        return pd.DataFrame()
+    records = pd.concat([pd.read_json(f, lines=True, dtype=False) for f in files], ignore_index=True)
+    records['ts'] = pd.to_datetime(records['ts'])
+    return records.sort_values('ts').reset_index(drop=True)
+
+
+def summarise_timings(records: pd.DataFrame, group_columns: list) -> pd.DataFrame:
+    """
+    Count, p50, p95 and max duration (ms) for each group, slowest p95 first.
+    """
+    grouped = records.groupby(group_columns, dropna=False)['duration_ms']
+    summary = grouped.agg(Runs='count', p50=lambda x: x.quantile(0.5), p95=lambda x: x.quantile(0.95), Max='max')
+    return summary.round(1).reset_index().sort_values('p95', ascending=False)
+
+
+def page_report(records: pd.DataFrame, by_release: bool = True) -> pd.DataFrame:
+    """
+    Summarise page run times per page (and release).
+    """
+    pages = records[records['type'] == 'page']
+    return summarise_timings(pages, ['page', 'release'] if by_release else ['page'])
+
+
+def function_report(records: pd.DataFrame, by_release: bool = True) -> pd.DataFrame:
+    """
+    Summarise function call times per function (and release), with the cache hit rate of cached getters.
+    """
+    functions = records[records['type'] == 'function']
+    group_columns = ['function', 'release'] if by_release else ['function']
+    summary = summarise_timings(functions, group_columns)
+    cached = functions.dropna(subset=['cache'])
+    if not cached.empty:
+        hit_rate = (cached['cache'] == 'hit').groupby([cached[c] for c in group_columns]).mean().rename('Hit rate')
+        summary = summary.merge(hit_rate.reset_index(), on=group_columns, how='left')
+        summary['Hit rate'] = summary['Hit rate'].map(lambda x: '' if pd.isna(x) else f"{x:.0%}")
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarise page and function timings from the telemetry log.")
+    parser.add_argument('--file', default=TELEMETRY_FILE, help="Telemetry JSONL file (rotated backups are read too).")
+    parser.add_argument('--since', default=None, help="Only include records on or after this date (YYYY-MM-DD).")
+    parser.add_argument('--functions', action='store_true', help="Summarise timed functions rather than pages.")
+    parser.add_argument('--top', type=int, default=None, help="Only show the N slowest rows by p95.")
+    parser.add_argument('--all-releases', action='store_true', help="Combine releases rather than splitting by release.")
+    args = parser.parse_args()
+
+    records = load_telemetry(args.file)
+    if records.empty:
+        print(f"No telemetry found at {args.file}. Set TEG_TELEMETRY=1 when running the app to record it.")
+        return
+    if args.since:
+        records = records[records['ts'] >= pd.Timestamp(args.since)]
+        if records.empty:
+            print(f"No telemetry since {args.since}.")
+            return
+
+    by_release = not args.all_releases
+    report = function_report(records, by_release) if args.functions else page_report(records, by_release)
+    if args.top:
+        report = report.head(args.top)
+
+    print(f"{len(records)} records from {records['ts'].min():%Y-%m-%d %H:%M} to {records['ts'].max():%Y-%m-%d %H:%M}. Durations in ms.")
+    print(report.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
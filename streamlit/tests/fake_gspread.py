@@ -0,0 +1,40 @@
+"""
+A minimal in-memory stand-in for an authorised gspread client, covering the calls fetch_sheet_blocks makes:
+client.open(name).worksheet(name).get_all_values() and the spreadsheet's lastUpdateTime.
+"""
+from typing import Any, Dict, List
+
+
+class FakeWorksheet:
+    def __init__(self, values: List[List[Any]]):
+        self.values = values
+        self.fetches = 0
+
+    def get_all_values(self) -> List[List[Any]]:
+        self.fetches += 1
+        return [list(row) for row in self.values]
+
+
+class FakeSpreadsheet:
+    def __init__(self, worksheets: Dict[str, FakeWorksheet], revision: str = '1'):
+        self.worksheets = worksheets
+        self.lastUpdateTime = revision
+
+    def worksheet(self, name: str) -> FakeWorksheet:
+        return self.worksheets[name]
+
+
+class FakeClient:
+    def __init__(self, spreadsheets: Dict[str, FakeSpreadsheet]):
+        self.spreadsheets = spreadsheets
+
+    def open(self, name: str) -> FakeSpreadsheet:
+        return self.spreadsheets[name]
+
+    def edit(self, sheet_name: str, worksheet_name: str, row: int, col: int, value: Any) -> None:
+        """
+        Change one cell and bump the spreadsheet's revision, as an edit in Google Sheets would.
+        """
+        spreadsheet = self.spreadsheets[sheet_name]
+        spreadsheet.worksheets[worksheet_name].values[row][col] = value
+        spreadsheet.lastUpdateTime = str(int(spreadsheet.lastUpdateTime) + 1)
@@ -0,0 +1,138 @@
+import http.client
+import json
+import threading
+from http.server import ThreadingHTTPServer
+import pandas as pd
+import pytest
+import stats_api
+from live_scoring import leaderboard_deltas
+from stats_api import StatsRequestHandler, LIVE_PATH
+
+
+class StubWorker:
+    """
+    Stands in for LiveScoringWorker: holds a fixed snapshot and lets the test push delta events to listeners.
+    """
+    def __init__(self):
+        self.version = 1
+        self.listeners = []
+        self.snapshots = 0
+        self.release_first_snapshot = threading.Event()
+        self.release_first_snapshot.set()
+        self.listening = threading.Event()
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+        self.listening.set()
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def leaderboard_snapshot(self):
+        self.snapshots += 1
+        if self.snapshots == 1:
+            self.release_first_snapshot.wait(timeout=5)
+        return [{'teg': 'TEG 16', 'measure': measure, 'version': self.version, 'changes': []}
+                for measure in ['Stableford', 'GrossVP']]
+
+    def push(self, event):
+        for listener in list(self.listeners):
+            listener(event)
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    stub = StubWorker()
+    monkeypatch.setattr(stats_api, '_live_worker', stub)
+    yield stub
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), StatsRequestHandler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def open_stream(server):
+    connection = http.client.HTTPConnection(*server.server_address, timeout=5)
+    connection.request('GET', LIVE_PATH)
+    response = connection.getresponse()
+    assert response.status == 200
+    assert response.getheader('Content-Type') == 'text/event-stream'
+    return connection, response
+
+
+def read_event(response):
+    """
+    Read the next Server-Sent Event, skipping keepalive comments. Returns (name, data).
+    """
+    name, data = None, None
+    while True:
+        line = response.fp.readline().decode('utf-8').rstrip('\n')
+        if line.startswith('event: '):
+            name = line[len('event: '):]
+        elif line.startswith('data: '):
+            data = json.loads(line[len('data: '):])
+        elif line == '' and name is not None:
+            return name, data
+
+
+def delta(version):
+    return {'teg': 'TEG 16', 'measure': 'Stableford', 'version': version,
+            'changes': [{'Player': 'Alex Baker', 'Rank': '1', 'Previous Rank': '2', 'Total': 40.0, 'R2': 20.0}]}
+
+
+def test_stream_sends_snapshot_on_connect(worker, server):
+    connection, response = open_stream(server)
+    events = [read_event(response) for _ in range(2)]
+    assert [name for name, _ in events] == ['snapshot', 'snapshot']
+    assert [data['measure'] for _, data in events] == ['Stableford', 'GrossVP']
+    connection.close()
+
+
+def test_stream_sends_deltas_in_order(worker, server):
+    connection, response = open_stream(server)
+    for _ in range(2):
+        read_event(response)
+    for version in [2, 3]:
+        worker.push(delta(version))
+    assert [read_event(response) for _ in range(2)] == [('leaderboard', delta(2)), ('leaderboard', delta(3))]
+    connection.close()
+
+
+def test_stream_resends_snapshot_after_overflow(worker, server, monkeypatch):
+    monkeypatch.setattr(stats_api, 'LIVE_QUEUE_SIZE', 1)
+    worker.release_first_snapshot.clear()
+    connection, response = open_stream(server)
+
+    # Hold the handler in its first snapshot until more deltas than the queue holds have arrived
+    assert worker.listening.wait(timeout=5)
+    for version in [2, 3, 4]:
+        worker.push(delta(version))
+    worker.version = 4
+    worker.release_first_snapshot.set()
+
+    names = [read_event(response)[0] for _ in range(5)]
+    assert names == ['snapshot', 'snapshot', 'reset', 'snapshot', 'snapshot']
+    assert worker.snapshots == 2
+    connection.close()
+
+
+def test_deltas_report_removed_players_and_boards():
+    board = pd.DataFrame({'Rank': ['1', '2'], 'Total': [40.0, 38.0], 'R1': [40.0, 38.0]},
+                         index=pd.Index(['Alex Baker', 'Chris Dee'], name='Player'))
+    previous = {('TEG 16', 'Stableford'): board, ('TEG 16', 'GrossVP'): board}
+    current = {('TEG 16', 'Stableford'): board.drop(index='Chris Dee')}
+
+    events = leaderboard_deltas(previous, current, version=5)
+
+    assert events == [
+        {'teg': 'TEG 16', 'measure': 'Stableford', 'version': 5, 'changes': [
+            {'Player': 'Chris Dee', 'Rank': None, 'Previous Rank': '2', 'Total': None, 'Removed': True}]},
+        {'teg': 'TEG 16', 'measure': 'GrossVP', 'version': 5, 'removed': True, 'changes': []}
+    ]
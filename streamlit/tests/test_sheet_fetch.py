@@ -0,0 +1,55 @@
+import pytest
+from fake_gspread import FakeClient, FakeSpreadsheet, FakeWorksheet
+from utils import fetch_sheet_blocks, clear_sheet_fetch_state
+
+ID_VARS = ['TEGNum', 'Round', 'Hole', 'Par', 'SI']
+HEADER = ['TEGNum', 'Round', 'Hole', 'Par', 'SI', 'AB', 'CD']
+
+
+@pytest.fixture
+def client():
+    clear_sheet_fetch_state()
+    rows = [HEADER]
+    for teg_num, rd in [(16, 1), (16, 2)]:
+        for hole in range(1, 4):
+            rows.append([teg_num, rd, hole, 4, hole, 5, 4])
+    rows.append(['Notes: R2 moved to the back nine', '', '', '', '', '', ''])
+    rows.append(['TEGNum', 'Round', 'Hole', 'Par', 'SI', 'AB', 'CD'])
+    yield FakeClient({'Scores sheet': FakeSpreadsheet({'Scores': FakeWorksheet(rows)})})
+    clear_sheet_fetch_state()
+
+
+def fetch(client):
+    return fetch_sheet_blocks('Scores sheet', 'Scores', ID_VARS, client=client)
+
+
+def test_first_fetch_returns_every_block(client):
+    long_df, changed = fetch(client)
+    assert sorted(changed) == [(16, 1), (16, 2)]
+    assert len(long_df) == 12
+    assert set(long_df['Pl']) == {'AB', 'CD'}
+
+
+def test_unchanged_revision_skips_download(client):
+    first, _ = fetch(client)
+    worksheet = client.open('Scores sheet').worksheet('Scores')
+    long_df, changed = fetch(client)
+    assert changed == []
+    assert worksheet.fetches == 1
+    assert long_df.equals(first)
+
+
+def test_only_edited_block_is_changed(client):
+    fetch(client)
+    client.edit('Scores sheet', 'Scores', row=5, col=5, value=7)  # TEG 16 R2 hole 2, AB
+    long_df, changed = fetch(client)
+    assert changed == [(16, 2)]
+    edited = long_df[(long_df['Round'] == 2) & (long_df['Hole'] == 2) & (long_df['Pl'] == 'AB')]
+    assert edited['Score'].tolist() == [7]
+
+
+def test_new_revision_without_edits_changes_nothing(client):
+    fetch(client)
+    client.open('Scores sheet').lastUpdateTime = '2'
+    _, changed = fetch(client)
+    assert changed == []
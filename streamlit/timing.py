@@ -0,0 +1,248 @@
+"""
+Function-level timing for the Streamlit pages.
+
+Functions decorated with `timed`, blocks wrapped in `timer`, and cached getters declared with
+`timed_cache_data` (a drop-in for st.cache_data that also records cache hits and misses) are timed on every
+call. Timings are collected per page run and per session: each page calls start_run() at the top and
+show_timings() at the bottom, which adds a sidebar panel with the call counts, wall times and cache hits of
+every timed function when debug is enabled (TEG_DEBUG=1 in the environment, or ?debug=1 in the page URL).
+
+Calls made outside a page run (warm-up threads, scripts, the stats API) are not collected. With
+TEG_TELEMETRY=1 the calls and page runs are also logged to disk (see telemetry.py).
+"""
+import os
+import time
+import logging
+import functools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import telemetry
+import cache_inspector
+
+# Configure Logging
+logger = logging.getLogger(__name__)
+
+# Constants
+DEBUG_MODE = os.environ.get('TEG_DEBUG', '0') == '1'
+MAX_SESSIONS = 100  # Page runs kept for this many of the most recent sessions
+TIMING_COLUMNS = ['Function', 'Calls', 'Hits', 'Misses', 'Total ms', 'Self ms', 'Max ms']
+
+_runs: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+_runs_lock = threading.Lock()
+_local = threading.local()
+
+
+def _current_run() -> Optional[Dict[str, Any]]:
+    """
+    Return the run being collected for the calling session, or None outside a page run.
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return None
+    with _runs_lock:
+        return _runs.get(ctx.session_id)
+
+
+def start_run(page: str) -> None:
+    """
+    Start collecting timings for a run of `page` in the calling session, discarding the previous run.
+
+    As every page calls this first, it also starts the cache warm-up on the first page load of the server
+    process, whichever page that is (see warmup.warm_up_on_start, which runs once per process).
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return
+
+    # Imported here because warmup imports utils, which imports this module
+    from warmup import warm_up_on_start
+    warm_up_on_start()
+
+    data_version = telemetry.current_data_version() if telemetry.TELEMETRY_ENABLED else None
+    with _runs_lock:
+        _runs.pop(ctx.session_id, None)
+        _runs[ctx.session_id] = {'page': page, 'started': time.perf_counter(), 'functions': {}, 'finished': False}
+        _runs[ctx.session_id]['data_version'] = data_version
+        while len(_runs) > MAX_SESSIONS:
+            _runs.popitem(last=False)
+
+
+@contextmanager
+def timer(name: str) -> Iterator[Dict[str, Any]]:
+    """
+    Time a block of code and record it under `name` in the current page run.
+
+    Nested timers and timed functions are subtracted from the enclosing one's self time. The yielded frame
+    can be marked as a cache miss with frame['miss'] = True (see timed_cache_data), and given the call's
+    (args, kwargs) as frame['call'] and return value as frame['result'] for telemetry.
+    """
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    frame = {'miss': False, 'children': 0.0}
+    stack.append(frame)
+    start = time.perf_counter()
+    try:
+        yield frame
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        if stack:
+            stack[-1]['children'] += elapsed
+        _record(name, elapsed, elapsed - frame['children'], frame)
+
+
+def _record(name: str, elapsed: float, self_time: float, frame: Dict[str, Any]) -> None:
+    run = _current_run()
+    if run is None:
+        return
+    cached, miss = frame.get('cached', False), frame['miss']
+    stats = run['functions'].setdefault(name, {'Calls': 0, 'Hits': 0, 'Misses': 0, 'Total': 0.0, 'Self': 0.0, 'Max': 0.0})
+    stats['Calls'] += 1
+    stats['Total'] += elapsed
+    stats['Self'] += self_time
+    stats['Max'] = max(stats['Max'], elapsed)
+    if cached:
+        stats['Misses' if miss else 'Hits'] += 1
+    if telemetry.TELEMETRY_ENABLED:
+        telemetry.record_function(run, name, elapsed, ('miss' if miss else 'hit') if cached else None,
+                                  frame.get('call'), frame.get('result'))
+
+
+def timed(func: Optional[Callable] = None, *, name: Optional[str] = None) -> Callable:
+    """
+    Decorator that records the wall time of each call in the current page run.
+
+    Usage:
+        @timed
+        def aggregate_data(...): ...
+
+        @timed(name='race chart')
+        def get_race_chart(...): ...
+    """
+    def decorate(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(label) as frame:
+                result = func(*args, **kwargs)
+                if telemetry.TELEMETRY_ENABLED:
+                    frame['call'], frame['result'] = (args, kwargs), result
+                return result
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def _timed_cache(cache_decorator: Callable, cache: str, func: Optional[Callable], cache_kwargs: Dict[str, Any]) -> Callable:
+    """
+    Wrap `func` in a Streamlit cache decorator, timing each call, recording whether it was a hit or miss,
+    and registering the cache entries with the cache inspector.
+    """
+    def decorate(func: Callable) -> Callable:
+        label = func.__qualname__
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            # Only runs on a cache miss, inside the caller's timer frame
+            stack = getattr(_local, 'stack', None)
+            if stack:
+                stack[-1]['miss'] = True
+            return func(*args, **kwargs)
+
+        cached = cache_decorator(compute, **cache_kwargs)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(label) as frame:
+                frame['cached'] = True
+                result = cached(*args, **kwargs)
+                if telemetry.TELEMETRY_ENABLED:
+                    frame['call'], frame['result'] = (args, kwargs), result
+            key = cache_inspector.entry_key(func, args, kwargs)
+            if frame['miss']:
+                cache_inspector.record_miss(label, key, result)
+            else:
+                cache_inspector.record_hit(label, key)
+            return result
+
+        def clear() -> None:
+            cached.clear()
+            cache_inspector.forget(label)
+
+        wrapper.clear = clear
+        cache_inspector.register_cached_function(label, cached.clear, cache_kwargs.get('max_entries'), cache)
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def timed_cache_data(func: Optional[Callable] = None, **cache_kwargs) -> Callable:
+    """
+    Drop-in replacement for st.cache_data that also records each call's wall time and whether it was a
+    cache hit or miss, and the memory of each cached entry (see cache_inspector.py). Keyword arguments
+    (show_spinner, max_entries, ttl, ...) are passed to st.cache_data.
+
+    The cache key is unchanged: st.cache_data sees the original function's name, source and signature.
+    """
+    return _timed_cache(st.cache_data, 'data', func, cache_kwargs)
+
+
+def timed_cache_resource(func: Optional[Callable] = None, **cache_kwargs) -> Callable:
+    """
+    Drop-in replacement for st.cache_resource with the same timing and cache accounting as timed_cache_data.
+    """
+    return _timed_cache(st.cache_resource, 'resource', func, cache_kwargs)
+
+
+def run_timings() -> pd.DataFrame:
+    """
+    Return the timings of the current page run, one row per function, slowest (by self time) first.
+    """
+    run = _current_run()
+    if run is None or not run['functions']:
+        return pd.DataFrame(columns=TIMING_COLUMNS)
+    timings = pd.DataFrame([{'Function': name, **stats} for name, stats in run['functions'].items()])
+    for col in ['Total', 'Self', 'Max']:
+        timings[f'{col} ms'] = (timings.pop(col) * 1000).round(1)
+    return timings[TIMING_COLUMNS].sort_values('Self ms', ascending=False).reset_index(drop=True)
+
+
+def debug_enabled() -> bool:
+    """
+    Return True if the timing panel should be shown: TEG_DEBUG=1 in the environment or ?debug=1 in the URL.
+    """
+    if DEBUG_MODE:
+        return True
+    try:
+        return st.query_params.get('debug') == '1'
+    except Exception:
+        return False
+
+
+def show_timings() -> None:
+    """
+    Finish the current page run: log it to telemetry if enabled, and show its timings in a sidebar panel when
+    debug is enabled.
+    """
+    run = _current_run()
+    if run is None:
+        return
+    elapsed = time.perf_counter() - run['started']
+    if telemetry.TELEMETRY_ENABLED and not run['finished']:
+        telemetry.record_page_run(run, elapsed)
+    run['finished'] = True
+    if not debug_enabled():
+        return
+    timings = run_timings()
+    with st.sidebar.expander('⏱️ Timings', expanded=True):
+        st.caption(f"{run['page']} ran in {elapsed * 1000:.0f} ms. "
+                   f"{int(timings['Hits'].sum())} cache hits, {int(timings['Misses'].sum())} misses.")
+        st.dataframe(timings, hide_index=True)
+        st.caption('Self ms excludes time spent in other timed functions called from that function.')
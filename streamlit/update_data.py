@@ -1,4 +1,5 @@
-from utils import update_all_data, check_for_complete_and_duplicate_data
+import pandas as pd
+from utils import update_all_data, validate_data_integrity
 
 # Define file paths
 ALL_SCORES_PATH = '../data/all-scores.csv'
@@ -9,7 +10,10 @@ CSV_OUTPUT_FILE = '../data/all-data.csv'
 # Update all data
 update_all_data(ALL_SCORES_PATH, PARQUET_FILE, CSV_OUTPUT_FILE)
 
-# Check for complete and duplicate data
-check_for_complete_and_duplicate_data(ALL_SCORES_PATH, PARQUET_FILE)
+# Validate the rebuilt data
+report = validate_data_integrity(pd.read_parquet(PARQUET_FILE))
+for check, problems in report.items():
+    if not problems.empty:
+        print(f"{check}: {len(problems)} problems")
 
 print("Data update and check completed successfully.")
\ No newline at end of file
@@ -2,12 +2,20 @@ import pandas as pd
 import os
 import numpy as np
 import logging
+import hashlib
+import threading
 from math import floor
 from google.oauth2.service_account import Credentials
 import gspread
-from typing import Dict, Any, List
+from typing import Dict, Any, List, NamedTuple, Tuple, Optional
 import streamlit as st
 from pathlib import Path
+from timing import timed, timed_cache_data, timed_cache_resource
+from data_store import (
+    save_normalised_store, store_is_current, store_columns, read_columns,
+    extend_registry, player_codes, player_names, hole_keys, format_hole_ids,
+    write_arrow_cache, open_arrow_table, arrow_frame_view, own_frame
+)
 
 #print("utils module is being imported")
 
@@ -23,18 +31,23 @@ CONFIG: Dict[str, str] = {
 }
 
 FILE_PATH_ALL_DATA = os.path.join(BASE_DIR, "../data/all-data.parquet")  # Dynamically construct the path
+FILE_PATH_RACE_SERIES = os.path.join(BASE_DIR, "../data/race-series.parquet")
+FILE_PATH_SCORE_HASHES = os.path.join(BASE_DIR, "../data/score-hashes.csv")
+FILE_PATH_STORE = os.path.join(BASE_DIR, "../data/store")
+FILE_PATH_ARROW_CACHE = os.path.join(BASE_DIR, "../data/arrow")
+FILE_PATH_COURSE_HOLE_STATS = os.path.join(BASE_DIR, "../data/course-hole-stats.parquet")
+FILE_PATH_RECORD_INDEX = os.path.join(BASE_DIR, "../data/record-index.parquet")
+FILE_PATH_RECORDS_BROKEN = os.path.join(BASE_DIR, "../data/records-broken.csv")
 TOTAL_HOLES = 18
+SCORE_BLOCK_KEY = ['TEGNum', 'Round', 'Pl']
+RACE_SERIES = ['Stableford Cum TEG', 'Adjusted Stableford', 'GrossVP Cum TEG', 'Adjusted GrossVP']
 
-PLAYER_DICT = {
-    'AB': 'Alex BAKER',
-    'JB': 'Jon BAKER',
-    'DM': 'David MULLIN',
-    'GW': 'Gregg WILLIAMS',
-    'HM': 'Henry MELLER',
-    'SN': 'Stuart NEUMANN',
-    'JP': 'John PATTERSON',
-    # Add more player initials and names as needed
-}
+# Scope required for Google Sheets and Drive access
+SHEETS_SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+# Per-worksheet state for incremental Google Sheets fetches, keyed by (sheet_name, worksheet_name)
+_SHEET_FETCH_STATE: Dict[Tuple[str, str], Dict[str, Any]] = {}
+_SHEET_FETCH_LOCK = threading.Lock()
 
 TEG_ROUNDS = {
     'TEG 1': 1,
@@ -49,10 +62,59 @@ TEG_OVERRIDES = {
     }
 }
 
-@st.cache_data
+class BaseFrame(NamedTuple):
+    """
+    The hole-level data for one data version, with the row positions of each load_all_data filter.
+    """
+    data: pd.DataFrame
+    rows: Dict[Tuple[bool, bool], np.ndarray]  # (exclude_teg_50, exclude_incomplete_tegs) -> row positions
+
+
+@timed_cache_resource(show_spinner=False, max_entries=2)
+def get_base_data(data_version: str) -> Optional[BaseFrame]:
+    """
+    Load the hole-level data once per server process and data version, and work out which rows each
+    combination of load_all_data's filters keeps. Shared by every session, so it must not be modified; use
+    load_all_data to get a frame of your own.
+
+    When the Arrow cache is current the frame is a view of the memory-mapped file (see arrow_frame_view), so
+    every process on the machine shares one copy of the data through the OS page cache.
+
+    Parameters:
+        data_version (str): The current data version, from get_data_version().
+
+    Returns:
+        BaseFrame or None: The base frame, or None if the all-data file is missing.
+    """
+    # Use the memory-mapped Arrow cache when it is current, then the normalised store, and only parse the wide
+    # Parquet file if neither was built from this data version
+    table = get_current_arrow_table('all-data')
+    df = arrow_frame_view(table) if table is not None else None
+    if df is None and store_is_current(data_version, FILE_PATH_STORE):
+        df = read_columns(None, FILE_PATH_STORE)
+    if df is None:
+        if not os.path.exists(FILE_PATH_ALL_DATA):
+            return None
+        df = pd.read_parquet(FILE_PATH_ALL_DATA)
+    df = filter_all_data(df)
+
+    not_teg_50 = (df['TEGNum'] != 50).to_numpy()
+    complete = complete_teg_mask(df)
+    rows = {
+        (True, False): np.flatnonzero(not_teg_50),
+        (False, True): np.flatnonzero(complete),
+        (True, True): np.flatnonzero(not_teg_50 & complete)
+    }
+    return BaseFrame(df, rows)
+
+
+@timed
 def load_all_data(exclude_teg_50: bool = False, exclude_incomplete_tegs: bool = False) -> pd.DataFrame:
     """
     Load the main dataset from the specified file path with optional filters.
+
+    The data is read once per data version (see get_base_data); each call returns its own copy of the rows
+    the filters keep, so callers are free to modify it.
     
     Parameters:
         exclude_teg_50 (bool): If True, excludes data with TEG 50.
@@ -61,14 +123,31 @@ def load_all_data(exclude_teg_50: bool = False, exclude_incomplete_tegs: bool =
     Returns:
         pd.DataFrame: The filtered dataset.
     """
-    if os.path.exists(FILE_PATH_ALL_DATA):
-        df = pd.read_parquet(FILE_PATH_ALL_DATA)
-    else:
+    base = get_base_data(get_data_version())
+    if base is None:
         st.error(f"File not found: {FILE_PATH_ALL_DATA}")
         return pd.DataFrame()  # Return an empty DataFrame if file is missing
 
+    if not (exclude_teg_50 or exclude_incomplete_tegs):
+        return own_frame(base.data)
+    return own_frame(base.data, base.rows[(bool(exclude_teg_50), bool(exclude_incomplete_tegs))])
+
+
+def filter_all_data(df: pd.DataFrame, exclude_teg_50: bool = False, exclude_incomplete_tegs: bool = False) -> pd.DataFrame:
+    """
+    Apply load_all_data's type fixes and optional filters to hole-level data.
+
+    Parameters:
+        df (pd.DataFrame): Hole-level data.
+        exclude_teg_50 (bool): If True, excludes data with TEG 50.
+        exclude_incomplete_tegs (bool): If True, excludes TEGs with incomplete rounds.
+
+    Returns:
+        pd.DataFrame: The filtered dataset.
+    """
     # Ensure 'Year' is of integer type
-    df['Year'] = df['Year'].astype('Int64')
+    if 'Year' in df.columns:
+        df['Year'] = df['Year'].astype('Int64')
     
     # Exclude TEG 50 if the flag is set
     if exclude_teg_50:
@@ -81,6 +160,32 @@ def load_all_data(exclude_teg_50: bool = False, exclude_incomplete_tegs: bool =
     return df
 
 
+def complete_teg_mask(df: pd.DataFrame) -> np.ndarray:
+    """
+    Return a boolean array marking the rows of TEGs that are complete: every expected round has been played
+    and no round in progress (provisional) is included.
+
+    Parameters:
+        df (pd.DataFrame): Hole-level data.
+
+    Returns:
+        np.ndarray: True for rows of complete TEGs.
+    """
+    # Compute the number of unique rounds per TEGNum
+    observed_rounds = df.groupby('TEGNum')['Round'].nunique()
+
+    # Identify incomplete TEGs where observed rounds do not match expected rounds
+    expected_rounds = observed_rounds.index.map(get_teg_rounds)
+    incomplete_tegs = observed_rounds.index[observed_rounds.to_numpy() != expected_rounds.to_numpy()]
+
+    # TEGs with a partial round in progress are also incomplete
+    if 'Provisional' in df.columns:
+        incomplete_tegs = incomplete_tegs.union(df.loc[df['Provisional'].eq(True), 'TEGNum'].unique())
+
+    return ~df['TEGNum'].isin(incomplete_tegs).to_numpy()
+
+
+@timed
 def exclude_incomplete_tegs_function(df: pd.DataFrame) -> pd.DataFrame:
     """
     Exclude TEGs with incomplete rounds based on the number of unique rounds in the data.
@@ -91,26 +196,11 @@ def exclude_incomplete_tegs_function(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: The dataset with incomplete TEGs excluded.
     """
-    # Compute the number of unique rounds per TEGNum
-    observed_rounds = df.groupby('TEGNum')['Round'].nunique()
-    
-    # Create a DataFrame with TEGNum and observed rounds
-    teg_rounds = observed_rounds.reset_index(name='ObservedRounds')
-    
-    # Apply get_teg_rounds to get the expected number of rounds per TEGNum
-    teg_rounds['ExpectedRounds'] = teg_rounds['TEGNum'].apply(get_teg_rounds)
-    
-    # Identify incomplete TEGs where observed rounds do not match expected rounds
-    incomplete_tegs = teg_rounds[teg_rounds['ObservedRounds'] != teg_rounds['ExpectedRounds']]['TEGNum']
-    
-    # Exclude the incomplete TEGs from the dataset
-    df_filtered = df[~df['TEGNum'].isin(incomplete_tegs)]
-    
-    return df_filtered
+    return df[complete_teg_mask(df)]
 
 def get_player_name(initials: str) -> str:
     """
-    Retrieve the player's full name based on their initials.
+    Retrieve the player's full name based on their initials, from the player registry (data/players.csv).
 
     Parameters:
         initials (str): The initials of the player.
@@ -118,7 +208,7 @@ def get_player_name(initials: str) -> str:
     Returns:
         str: Full name of the player or 'Unknown Player' if not found.
     """
-    return PLAYER_DICT.get(initials.upper(), 'Unknown Player')
+    return player_names(player_codes(pd.Series([initials])))[0]
 
 
 def process_round_for_all_scores(long_df: pd.DataFrame, hc_long: pd.DataFrame) -> pd.DataFrame:
@@ -148,18 +238,14 @@ def process_round_for_all_scores(long_df: pd.DataFrame, hc_long: pd.DataFrame) -
     long_df['HC'] = long_df['HC'].fillna(0)
     logger.debug("Handicap data merged.")
 
-    # Create 'HoleID' using vectorized operations
-    long_df['HoleID'] = (
-        "T" + long_df['TEGNum'].astype(int).astype(str).str.zfill(2) +
-        "|R" + long_df['Round'].astype(int).astype(str).str.zfill(2) +
-        "|H" + long_df['Hole'].astype(int).astype(str).str.zfill(2)
-    )
+    # Create 'HoleID' from integer hole keys, formatting each distinct hole once
+    long_df['HoleID'] = format_hole_ids(hole_keys(long_df['TEGNum'], long_df['Round'], long_df['Hole']))
 
     # Determine 'FrontBack' using vectorized operations
     long_df['FrontBack'] = np.where(long_df['Hole'] < 10, 'Front', 'Back')
 
-    # Map player names
-    long_df['Player'] = long_df['Pl'].apply(get_player_name)
+    # Map player names through the registry's integer codes
+    long_df['Player'] = player_names(player_codes(long_df['Pl']))
 
     # Calculate 'HCStrokes' using vectorized operations
     long_df['HCStrokes'] = (long_df['HC'] // 18) + ((long_df['HC'] % 18 >= long_df['SI']).astype(int))
@@ -184,94 +270,905 @@ def check_hc_strokes_combinations(transformed_df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         pd.DataFrame: DataFrame with unique combinations of HC, SI, and HCStrokes.
     """
-    hc_si_strokes_df = transformed_df[['HC', 'SI', 'HCStrokes']].drop_duplicates()
-    logger.info("Unique combinations of HC, SI, and HCStrokes obtained.")
-    return hc_si_strokes_df
+    hc_si_strokes_df = transformed_df[['HC', 'SI', 'HCStrokes']].drop_duplicates()
+    logger.info("Unique combinations of HC, SI, and HCStrokes obtained.")
+    return hc_si_strokes_df
+
+
+def add_cumulative_scores(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add cumulative scores and averages for specified measures across rounds, TEGs, and career.
+
+    Parameters:
+        df (pd.DataFrame): DataFrame containing the golf data.
+
+    Returns:
+        pd.DataFrame: DataFrame with cumulative and average scores added.
+    """
+    logger.info("Adding cumulative scores and averages.")
+
+    # Sort data
+    df.sort_values(by=['Pl', 'TEGNum', 'Round', 'Hole'], inplace=True)
+
+    # Create 'Hole Order Ever'
+    df['Hole Order Ever'] = df.groupby(['Pl']).cumcount() + 1
+
+    measures = ['Sc', 'GrossVP', 'NetVP', 'Stableford']
+    groupings = {
+        'Round': ['Pl', 'TEGNum', 'Round'],
+        'TEG': ['Pl', 'TEGNum'],
+        'Career': ['Pl']
+    }
+
+    for measure in measures:
+        for period, group_cols in groupings.items():
+            cum_col = f'{measure} Cum {period}'
+            df[cum_col] = df.groupby(group_cols)[measure].cumsum()
+
+    # Add counts
+    df['TEG Count'] = df.groupby(['Pl', 'TEGNum']).cumcount() + 1
+    df['Career Count'] = df.groupby('Pl').cumcount() + 1
+
+    # Add averages
+    for measure in measures:
+        df[f'{measure} Round Avg'] = df[f'{measure} Cum Round'] / df['Hole']
+        df[f'{measure} TEG Avg'] = df[f'{measure} Cum TEG'] / df['TEG Count']
+        df[f'{measure} Career Avg'] = df[f'{measure} Cum Career'] / df['Career Count']
+
+    logger.info("Cumulative scores and averages added.")
+    return df
+
+
+def mark_provisional(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Flag rows that belong to a partial round (fewer than TOTAL_HOLES holes for the player) as provisional.
+
+    Parameters:
+        df (pd.DataFrame): DataFrame containing hole-level golf data.
+
+    Returns:
+        pd.DataFrame: A copy of the DataFrame with a boolean 'Provisional' column added. The input is not modified.
+    """
+    holes_in_round = df.groupby(['TEGNum', 'Round', 'Pl'])['Hole'].transform('size')
+    return df.assign(Provisional=holes_in_round < TOTAL_HOLES)
+
+
+def upsert_hole_scores(all_data: pd.DataFrame, new_rows: pd.DataFrame, replace_on: List[str] = None,
+                       remove: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Insert or replace hole rows and update the cumulative columns incrementally.
+
+    Rows of all_data that match new_rows on the replace_on columns are removed and new_rows are added. Only the
+    rows of TEGs from the earliest one with new or removed rows onwards are touched; the earlier rows are passed
+    through as they are and put back in front. Within that slice, cumulative Round/TEG/Career columns are
+    recomputed only for the affected players, from the start of the earliest TEG they have new or removed rows
+    in, using their last untouched row as the career baseline. For live scores in the latest TEG this costs
+    O(rows in that TEG) rather than O(all data), apart from the final concat.
+
+    Parameters:
+        all_data (pd.DataFrame): Hole-level data with cumulative columns, as produced by update_all_data.
+        new_rows (pd.DataFrame): Processed hole rows (with round info and Year) to insert.
+        replace_on (List[str], optional): Columns identifying rows to replace. Must include 'TEGNum'. Defaults
+            to one row per hole (['TEGNum', 'Round', 'Pl', 'Hole']); use ['TEGNum', 'Round'] to replace whole
+            rounds.
+        remove (pd.DataFrame, optional): Rows to delete without a replacement, identified by their replace_on
+            columns (e.g. holes cleared from the score sheet).
+
+    Returns:
+        pd.DataFrame: Updated hole-level data: the untouched TEGs, then the updated slice sorted by Pl, TEGNum,
+        Round and Hole.
+    """
+    logger.info(f"Upserting {len(new_rows)} hole rows.")
+
+    if replace_on is None:
+        replace_on = ['TEGNum', 'Round', 'Pl', 'Hole']
+    if remove is None:
+        remove = new_rows.iloc[:0]
+    if new_rows.empty and remove.empty:
+        return all_data
+
+    # Split off the TEGs that cannot change
+    first_changed_teg = min(teg_nums.min() for teg_nums in [new_rows['TEGNum'], remove['TEGNum']] if not teg_nums.empty)
+    in_slice = (all_data['TEGNum'] >= first_changed_teg).to_numpy()
+    head, tail = all_data[~in_slice], all_data[in_slice]
+
+    tail_keys = tail.set_index(replace_on).index
+    replaced = tail_keys.isin(new_rows.set_index(replace_on).index)
+    if not remove.empty:
+        replaced |= tail_keys.isin(remove.set_index(replace_on).index)
+
+    # Each affected player is recomputed from the start of the earliest TEG they have new or removed rows in
+    touched = pd.concat([tail.loc[replaced, ['Pl', 'TEGNum']], new_rows[['Pl', 'TEGNum']]])
+    first_teg = touched.groupby('Pl')['TEGNum'].min()
+
+    kept = tail[~replaced]
+    recompute = (kept['TEGNum'] >= kept['Pl'].map(first_teg)).to_numpy()
+    unchanged = kept[~recompute]
+
+    recomputed = add_cumulative_scores(pd.concat([kept[recompute], new_rows], ignore_index=True))
+    recomputed = mark_provisional(recomputed)
+
+    # Offset career columns by the last unchanged row of each affected player, in this slice or before it
+    before = pd.concat([_last_hole_rows(head), _last_hole_rows(unchanged)], ignore_index=True)
+    baseline = _last_hole_rows(before[before['Pl'].isin(first_teg.index)].reset_index(drop=True)).set_index('Pl')
+
+    for col in ['Hole Order Ever', 'Career Count']:
+        recomputed[col] = recomputed[col] + recomputed['Pl'].map(baseline[col]).fillna(0).astype(int)
+
+    for measure in ['Sc', 'GrossVP', 'NetVP', 'Stableford']:
+        recomputed[f'{measure} Cum Career'] += recomputed['Pl'].map(baseline[f'{measure} Cum Career']).fillna(0)
+        recomputed[f'{measure} Career Avg'] = recomputed[f'{measure} Cum Career'] / recomputed['Career Count']
+
+    if 'Provisional' not in unchanged.columns:
+        unchanged = mark_provisional(unchanged)
+    if 'Provisional' not in head.columns:
+        head = mark_provisional(head)
+
+    updated_slice = pd.concat([unchanged, recomputed], ignore_index=True)
+    updated_slice = updated_slice.sort_values(by=['Pl', 'TEGNum', 'Round', 'Hole'], ignore_index=True)
+    updated = pd.concat([head, updated_slice], ignore_index=True)
+
+    logger.info(f"Upsert complete. Recomputed {len(recomputed)} of {len(updated)} rows.")
+    return updated
+
+
+def _last_hole_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return each player's last row in play order (highest 'Hole Order Ever').
+    """
+    if df.empty:
+        return df
+    return df.loc[df.groupby('Pl')['Hole Order Ever'].idxmax()]
+
+
+def save_to_parquet(df: pd.DataFrame, output_file: str) -> None:
+    """
+    Save DataFrame to a Parquet file.
+
+    Parameters:
+        df (pd.DataFrame): DataFrame containing the updated golf data.
+        output_file (str): Path to save the Parquet file.
+    """
+    df.to_parquet(output_file, index=False)
+    logger.info(f"Data successfully saved to {output_file}")
+
+
+def get_data_version(parquet_file: str = FILE_PATH_ALL_DATA) -> str:
+    """
+    Return a token that changes whenever the all-data Parquet file is rewritten. Used to key caches of
+    anything derived from it.
+
+    Parameters:
+        parquet_file (str): Path to the all-data Parquet file.
+
+    Returns:
+        str: Modification time and size of the file, or an empty string if it does not exist.
+    """
+    try:
+        stat = os.stat(parquet_file)
+    except FileNotFoundError:
+        return ""
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+@timed
+def build_race_series(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the series plotted on the TEG race charts: one row per player and hole with the x position across
+    the TEG and the standard and adjusted cumulative Stableford and GrossVP values.
+
+    The adjusted values show performance against net par (2 points a hole) and bogey golf (par+1) so the
+    gaps between players are easier to see.
+
+    Parameters:
+        df (pd.DataFrame): Hole-level data with cumulative scores, as produced by add_cumulative_scores.
+
+    Returns:
+        pd.DataFrame: Race series sorted by TEGNum, Round, Hole and Pl.
+    """
+    series = df[['TEGNum', 'TEG', 'Pl', 'Round', 'Hole', 'Stableford Cum TEG', 'GrossVP Cum TEG']].copy()
+    series['x_value'] = (series['Round'] - 1) * TOTAL_HOLES + series['Hole']
+    series['Adjusted Stableford'] = series['Stableford Cum TEG'] - (2 * df['TEG Count'])
+    series['Adjusted GrossVP'] = series['GrossVP Cum TEG'] - df['TEG Count']
+    return series[['TEGNum', 'TEG', 'Pl', 'Round', 'Hole', 'x_value'] + RACE_SERIES].sort_values(
+        ['TEGNum', 'Round', 'Hole', 'Pl'], ignore_index=True)
+
+
+def save_race_series(df: pd.DataFrame, output_file: str = FILE_PATH_RACE_SERIES, parquet_file: str = FILE_PATH_ALL_DATA) -> None:
+    """
+    Build the race series from the hole-level data and save it next to the all-data Parquet file, tagged with
+    the data version it was built from.
+
+    Parameters:
+        df (pd.DataFrame): Hole-level data that has just been saved to `parquet_file`.
+        output_file (str): Path to save the race series Parquet file.
+        parquet_file (str): Path to the all-data Parquet file the series belongs to.
+    """
+    series = build_race_series(df)
+    series.attrs['data_version'] = get_data_version(parquet_file)
+    series.to_parquet(output_file, index=False)
+    logger.info(f"Race series saved to {output_file}")
+
+
+@timed_cache_data(show_spinner=False)
+def load_race_series(data_version: str) -> pd.DataFrame:
+    """
+    Load the precomputed race series for the given data version. If the saved series is missing or was built
+    from a different version of the data (the all-data file was written without save_race_series), a warning is
+    logged and it is rebuilt from the all-data file, once per process and data version.
+
+    Parameters:
+        data_version (str): The current data version, from get_data_version().
+
+    Returns:
+        pd.DataFrame: Race series as returned by build_race_series.
+    """
+    if not os.path.exists(FILE_PATH_RACE_SERIES):
+        logger.warning(f"Race series not found at {FILE_PATH_RACE_SERIES}; it is saved at ingest by "
+                       f"save_race_series. Rebuilding from all data.")
+    else:
+        series = pd.read_parquet(FILE_PATH_RACE_SERIES)
+        if series.attrs.get('data_version') == data_version:
+            return series
+        logger.warning(f"Race series was built from data version {series.attrs.get('data_version')}, not "
+                       f"{data_version}; the all-data file was updated without save_race_series. Rebuilding from all data.")
+
+    return build_race_series(load_all_data())
+
+
+COURSE_HOLE_KEY = ['Course', 'Hole', 'PAR', 'SI']
+
+# Scoring distribution buckets for the course hole stats, as GrossVP ranges (inclusive)
+SCORE_DISTRIBUTION = {
+    'Eagles_or_Better': (-np.inf, -2),
+    'Birdies': (-1, -1),
+    'Pars': (0, 0),
+    'Bogeys': (1, 1),
+    'Doubles': (2, 2),
+    'TBPs': (3, np.inf),
+}
+
+
+def count_course_holes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Count holes played, total GrossVP and the scoring distribution for each course hole. The counts are
+    additive, so stats for new rounds can be added to (and replaced rounds subtracted from) a saved table.
+
+    Parameters:
+        df (pd.DataFrame): Hole-level data with Course, Hole, PAR, SI and GrossVP. Rows without a course are ignored.
+
+    Returns:
+        pd.DataFrame: One row per (Course, Hole, PAR, SI) with Holes_Played, GrossVP_Total and a count per
+        SCORE_DISTRIBUTION bucket.
+    """
+    scored = df.dropna(subset=COURSE_HOLE_KEY + ['GrossVP'])
+    gross_vp = scored['GrossVP']
+
+    counts = scored[COURSE_HOLE_KEY].astype({'Hole': 'int64', 'PAR': 'int64', 'SI': 'int64'})
+    counts['Holes_Played'] = 1
+    counts['GrossVP_Total'] = gross_vp.astype('int64')
+    for bucket, (low, high) in SCORE_DISTRIBUTION.items():
+        counts[bucket] = gross_vp.between(low, high).astype('int64')
+
+    return counts.groupby(COURSE_HOLE_KEY, as_index=False).sum()
+
+
+def update_course_hole_stats(stats: pd.DataFrame, added: pd.DataFrame, removed: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Apply new and replaced hole rows to a course hole stats table without recounting the whole history.
+
+    Parameters:
+        stats (pd.DataFrame): Stats as returned by count_course_holes.
+        added (pd.DataFrame): Hole rows added to the data.
+        removed (pd.DataFrame, optional): Hole rows removed from the data, e.g. replaced by `added`.
+
+    Returns:
+        pd.DataFrame: The updated stats.
+    """
+    parts = [stats, count_course_holes(added)]
+    if removed is not None and not removed.empty:
+        negated = count_course_holes(removed)
+        value_cols = negated.columns.difference(COURSE_HOLE_KEY)
+        negated[value_cols] = -negated[value_cols]
+        parts.append(negated)
+
+    updated = pd.concat(parts, ignore_index=True).groupby(COURSE_HOLE_KEY, as_index=False).sum()
+    return updated[updated['Holes_Played'] > 0].reset_index(drop=True)
+
+
+def save_course_hole_stats(stats: pd.DataFrame, output_file: str = FILE_PATH_COURSE_HOLE_STATS, parquet_file: str = FILE_PATH_ALL_DATA) -> None:
+    """
+    Save the course hole stats, tagged with the version of the all-data file they describe.
+
+    Parameters:
+        stats (pd.DataFrame): Stats as returned by count_course_holes or update_course_hole_stats.
+        output_file (str): Path to save the stats Parquet file.
+        parquet_file (str): Path to the all-data Parquet file the stats belong to.
+    """
+    stats = stats.copy()
+    stats.attrs['data_version'] = get_data_version(parquet_file)
+    stats.to_parquet(output_file, index=False)
+    logger.info(f"Course hole stats saved to {output_file}")
+
+
+def read_course_hole_stats(data_version: str, stats_file: str = FILE_PATH_COURSE_HOLE_STATS) -> Optional[pd.DataFrame]:
+    """
+    Read the saved course hole stats if they were built from the given data version, otherwise return None.
+    """
+    if not os.path.exists(stats_file):
+        return None
+    stats = pd.read_parquet(stats_file)
+    if stats.attrs.get('data_version') != data_version:
+        return None
+    return stats
+
+
+@timed
+def summarise_course_holes(stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the derived course hole metrics: average GrossVP, birdie rate (birdie or better), the share of each
+    scoring bucket and the hole's difficulty rank within its course (1 = hardest, by average GrossVP).
+
+    Parameters:
+        stats (pd.DataFrame): Stats as returned by count_course_holes.
+
+    Returns:
+        pd.DataFrame: The stats with the derived columns, sorted by Course and Hole.
+    """
+    summary = stats.copy()
+    played = summary['Holes_Played']
+    summary['Avg_GrossVP'] = summary['GrossVP_Total'] / played
+    summary['Birdie_Rate'] = (summary['Eagles_or_Better'] + summary['Birdies']) / played
+    for bucket in SCORE_DISTRIBUTION:
+        summary[f'{bucket}_Rate'] = summary[bucket] / played
+    summary['Difficulty_Rank'] = summary.groupby('Course')['Avg_GrossVP'].rank(method='min', ascending=False).astype(int)
+    return summary.sort_values(['Course', 'Hole', 'PAR', 'SI'], ignore_index=True)
+
+
+@timed_cache_data(show_spinner=False)
+def load_course_hole_stats(data_version: str) -> pd.DataFrame:
+    """
+    Load the course hole stats saved at ingest for the given data version, with derived metrics. If they are
+    missing or out of date they are counted from the all-data file.
+
+    Parameters:
+        data_version (str): The current data version, from get_data_version().
+
+    Returns:
+        pd.DataFrame: Stats as returned by summarise_course_holes.
+    """
+    stats = read_course_hole_stats(data_version)
+    if stats is None:
+        logger.info("Course hole stats are missing or out of date. Counting from all data.")
+        stats = count_course_holes(load_columns(tuple(COURSE_HOLE_KEY + ['GrossVP']), data_version))
+    return summarise_course_holes(stats)
+
+
+# Levels records are kept at, with the columns identifying one result at that level
+RECORD_LEVELS = {
+    'TEG': ['Player', 'TEGNum', 'TEG'],
+    'Round': ['Player', 'TEGNum', 'TEG', 'Round'],
+    'FrontBack': ['Player', 'TEGNum', 'TEG', 'Round', 'FrontBack'],
+}
+RECORD_MEASURES = ['Sc', 'GrossVP', 'NetVP', 'Stableford']
+RECORD_SCOPES = {'All-time record': ['Level', 'Measure'], 'Personal best': ['Level', 'Measure', 'Player']}
+RECORD_COLUMNS = ['Level', 'Measure', 'Player', 'Value', 'TEGNum', 'TEG', 'Round', 'FrontBack']
+
+
+def _record_sign(measure: pd.Series) -> np.ndarray:
+    # Lower is better except for Stableford
+    return np.where(measure == 'Stableford', -1, 1)
+
+
+@timed
+def record_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Total complete TEGs, rounds and nines for every player, in the long form used by the record index.
+    Partial rounds, TEG 50 and TEGs without all their rounds are left out.
+
+    Parameters:
+        df (pd.DataFrame): Hole-level data, either all of it or just the TEGs being checked.
+
+    Returns:
+        pd.DataFrame: One row per result and measure, with the RECORD_COLUMNS.
+    """
+    df = exclude_provisional(df[df['TEGNum'] != 50])
+    frames = []
+    for level, keys in RECORD_LEVELS.items():
+        totals = df.groupby(keys, as_index=False).agg(Holes=('Hole', 'size'), **{m: (m, 'sum') for m in RECORD_MEASURES})
+        if level == 'TEG':
+            expected = totals['TEG'].map(get_teg_rounds) * TOTAL_HOLES
+        else:
+            expected = TOTAL_HOLES if level == 'Round' else TOTAL_HOLES // 2
+        totals = totals[totals['Holes'] == expected]
+        long = totals.melt(id_vars=keys, value_vars=RECORD_MEASURES, var_name='Measure', value_name='Value')
+        long['Level'] = level
+        frames.append(long)
+    return pd.concat(frames, ignore_index=True).reindex(columns=RECORD_COLUMNS)
+
+
+def build_record_index(aggregates: pd.DataFrame) -> pd.DataFrame:
+    """
+    Keep the best value of each measure at each level, all-time and for each player. Ties go to the earliest.
+
+    Parameters:
+        aggregates (pd.DataFrame): Results as returned by record_aggregates, or a previous index's rows plus new
+            results.
+
+    Returns:
+        pd.DataFrame: The record index: a Scope column ('All-time record' or 'Personal best') and the
+        RECORD_COLUMNS of the holder.
+    """
+    ranked = aggregates.assign(_key=aggregates['Value'] * _record_sign(aggregates['Measure'])).sort_values(
+        ['_key', 'TEGNum', 'Round', 'FrontBack'], na_position='first', kind='stable')
+    frames = [ranked.drop_duplicates(keys).assign(Scope=scope) for scope, keys in RECORD_SCOPES.items()]
+    return (pd.concat(frames, ignore_index=True)[['Scope'] + RECORD_COLUMNS]
+            .sort_values(['Scope', 'Level', 'Measure', 'Player'], ignore_index=True))
+
+
+def detect_record_breaks(index: pd.DataFrame, new_results: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare new results against the record index. Only the new results are scanned, with one merge per scope.
+    A result is not compared with an index entry for the same TEG, round and nine, so re-ingesting a round
+    does not report it as equalling itself.
+
+    Parameters:
+        index (pd.DataFrame): Record index as returned by build_record_index.
+        new_results (pd.DataFrame): Results of the ingested rounds, as returned by record_aggregates.
+
+    Returns:
+        pd.DataFrame: One row per record broken or equalled, with the previous value and holder.
+    """
+    feed = []
+    for scope, keys in RECORD_SCOPES.items():
+        current = index.loc[index['Scope'] == scope, RECORD_COLUMNS]
+        current = pd.concat([current[keys], current.add_suffix(' Previous')], axis=1)
+        candidates = new_results.merge(current, on=keys, how='inner')
+
+        same_result = ((candidates['Player'] == candidates['Player Previous']) &
+                       (candidates['TEGNum'] == candidates['TEGNum Previous']) &
+                       (candidates['Round'].fillna(0) == candidates['Round Previous'].fillna(0)) &
+                       (candidates['FrontBack'].fillna('') == candidates['FrontBack Previous'].fillna('')))
+        sign = _record_sign(candidates['Measure'])
+        new_key, previous_key = candidates['Value'] * sign, candidates['Value Previous'] * sign
+
+        candidates['Status'] = np.where(new_key < previous_key, 'Broken', 'Equalled')
+        hits = candidates[~same_result & (new_key <= previous_key)]
+        feed.append(pd.DataFrame({
+            'Scope': scope, 'Level': hits['Level'], 'Measure': hits['Measure'], 'Status': hits['Status'],
+            'Player': hits['Player'], 'Value': hits['Value'], 'TEG': hits['TEG'], 'Round': hits['Round'],
+            'FrontBack': hits['FrontBack'], 'Previous': hits['Value Previous'],
+            'Previous Holder': hits['Player Previous'], 'Previous TEG': hits['TEG Previous'],
+        }))
+    return pd.concat(feed, ignore_index=True)
+
+
+def check_new_records(index: pd.DataFrame, all_data: pd.DataFrame, new_rows: pd.DataFrame,
+                      previous_data: Optional[pd.DataFrame] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Detect the records broken by newly ingested rows and bring the record index up to date. Only the TEGs the
+    new rows belong to are totalled, and only their rounds and nines are checked. A personal best held by a
+    replaced result is recomputed from that player's rows only.
+
+    Parameters:
+        index (pd.DataFrame): Record index from before the new rows were added.
+        all_data (pd.DataFrame): Hole-level data including the new rows.
+        new_rows (pd.DataFrame): The rows just ingested.
+        previous_data (pd.DataFrame, optional): Hole-level data before the new rows were added. Results that
+            are unchanged from it (e.g. a round ingested again) are not reported.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: The updated index and the records broken, as returned by
+        detect_record_breaks.
+    """
+    touched_tegs = new_rows['TEGNum'].unique()
+    touched_rounds = new_rows[['TEGNum', 'Round']].drop_duplicates()
+
+    results = record_aggregates(all_data[all_data['TEGNum'].isin(touched_tegs)])
+    in_touched_round = results[['TEGNum', 'Round']].merge(touched_rounds, how='left', indicator=True)['_merge'] == 'both'
+    results = results[(results['Level'] == 'TEG') | in_touched_round.to_numpy()]
+
+    checked = results
+    if previous_data is not None:
+        previous = record_aggregates(previous_data[previous_data['TEGNum'].isin(touched_tegs)])
+        unchanged = results.merge(previous, how='left', indicator=True)['_merge'] == 'both'
+        checked = results[~unchanged.to_numpy()]
+    records_broken = detect_record_breaks(index, checked)
+
+    # A replaced result that held a personal best may now be worse, so those bests are worked out again from
+    # the player's own rows. All-time records are the best of the personal bests, so the index can be rebuilt
+    # from the personal bests and the new results alone
+    bests = index.loc[index['Scope'] == 'Personal best', RECORD_COLUMNS]
+    in_touched_round = bests[['TEGNum', 'Round']].merge(touched_rounds, how='left', indicator=True)['_merge'] == 'both'
+    stale = np.where(bests['Level'] == 'TEG', bests['TEGNum'].isin(touched_tegs), in_touched_round.to_numpy())
+    candidates = [bests[~stale], results]
+    if stale.any():
+        stale_keys = bests.loc[stale, ['Level', 'Measure', 'Player']]
+        players = all_data[all_data['Player'].isin(stale_keys['Player'].unique())]
+        candidates.append(record_aggregates(players).merge(stale_keys)[RECORD_COLUMNS])
+    index = build_record_index(pd.concat(candidates, ignore_index=True))
+    return index, records_broken
+
+
+def read_record_index(data_version: str, index_file: str = FILE_PATH_RECORD_INDEX) -> Optional[pd.DataFrame]:
+    """
+    Read the saved record index if it was built from the given data version, otherwise return None.
+    """
+    if not os.path.exists(index_file):
+        return None
+    index = pd.read_parquet(index_file)
+    if index.attrs.get('data_version') != data_version:
+        return None
+    return index
+
+
+def save_record_index(index: pd.DataFrame, output_file: str = FILE_PATH_RECORD_INDEX, parquet_file: str = FILE_PATH_ALL_DATA) -> None:
+    """
+    Save the record index, tagged with the version of the all-data file it describes.
+    """
+    index = index.copy()
+    index.attrs['data_version'] = get_data_version(parquet_file)
+    index.to_parquet(output_file, index=False)
+    logger.info(f"Record index saved to {output_file}")
+
+
+@timed_cache_data(show_spinner=False)
+def load_record_index(data_version: str) -> pd.DataFrame:
+    """
+    Load the record index saved at ingest for the given data version. If it is missing or out of date it is
+    rebuilt from the all-data file.
+
+    Parameters:
+        data_version (str): The current data version, from get_data_version().
+
+    Returns:
+        pd.DataFrame: Record index as returned by build_record_index.
+    """
+    index = read_record_index(data_version)
+    if index is None:
+        logger.info("Record index is missing or out of date. Building from all data.")
+        index = build_record_index(record_aggregates(load_all_data()))
+    return index
+
+
+def append_records_broken(feed: pd.DataFrame, feed_file: str = FILE_PATH_RECORDS_BROKEN) -> None:
+    """
+    Add detected record breaks to the records broken feed, stamped with the time they were found.
+    """
+    if feed.empty:
+        return
+    feed = feed.copy()
+    feed.insert(0, 'Detected', pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S'))
+    feed.to_csv(feed_file, mode='a', header=not os.path.exists(feed_file), index=False)
+    logger.info(f"{len(feed)} record(s) broken or equalled; added to {feed_file}")
+
+
+def load_records_broken(since: Optional[str] = None, feed_file: str = FILE_PATH_RECORDS_BROKEN) -> pd.DataFrame:
+    """
+    Load the records broken feed, most recent first. Returns an empty DataFrame if nothing has been recorded.
+
+    Parameters:
+        since (str, optional): Only return records detected at or after this time ('%Y-%m-%d %H:%M:%S').
+        feed_file (str): Path to the feed CSV file.
+    """
+    if not os.path.exists(feed_file):
+        return pd.DataFrame()
+    feed = pd.read_csv(feed_file)
+    if since is not None:
+        feed = feed[feed['Detected'] >= since]
+    return feed.iloc[::-1].reset_index(drop=True)
+
+
+def save_store(df: pd.DataFrame, parquet_file: str = FILE_PATH_ALL_DATA) -> None:
+    """
+    Save the normalised store (fact table plus course hole, round and player dimensions) in a 'store' folder
+    next to the all-data Parquet file, tagged with the data version it was built from.
+
+    Parameters:
+        df (pd.DataFrame): Hole-level data that has just been saved to `parquet_file`.
+        parquet_file (str): Path to the all-data Parquet file the store belongs to.
+    """
+    store_dir = os.path.join(os.path.dirname(parquet_file), 'store')
+    save_normalised_store(df, get_data_version(parquet_file), store_dir)
+
+
+@timed_cache_data(show_spinner=False)
+def load_columns(columns: Tuple[str, ...], data_version: str, exclude_teg_50: bool = False,
+                 exclude_incomplete_tegs: bool = False) -> pd.DataFrame:
+    """
+    Load only the given columns of the hole-level data from the normalised store, with load_all_data's
+    filters. Dimension tables are read and joined only when a requested column comes from them. Falls back to
+    all data if the store is missing or out of date.
+
+    Parameters:
+        columns (Tuple[str, ...]): Columns of the all-data view to return.
+        data_version (str): The current data version, from get_data_version().
+        exclude_teg_50 (bool): If True, excludes data with TEG 50.
+        exclude_incomplete_tegs (bool): If True, excludes TEGs with incomplete rounds.
+
+    Returns:
+        pd.DataFrame: The requested columns, one row per player and hole.
+    """
+    columns = list(columns)
+    if store_is_current(data_version, FILE_PATH_STORE):
+        # The filters need the TEG and round keys (and Provisional, if saved) even when they weren't asked for
+        filter_columns = []
+        if exclude_teg_50 or exclude_incomplete_tegs:
+            filter_columns = [col for col in ['TEGNum', 'Round', 'Provisional']
+                              if col in store_columns(FILE_PATH_STORE) and col not in columns]
+        df = filter_all_data(read_columns(columns + filter_columns, FILE_PATH_STORE), exclude_teg_50, exclude_incomplete_tegs)
+        return df[columns].reset_index(drop=True)
+
+    logger.info("Normalised store is missing or out of date. Loading columns from all data.")
+    return load_all_data(exclude_teg_50, exclude_incomplete_tegs)[columns].reset_index(drop=True)
+
+
+# Aggregates saved to the Arrow cache at ingest: name -> (aggregation level, exclude incomplete TEGs)
+ARROW_AGGREGATES = {
+    'teg': ('TEG', True),
+    'teg-inc-in-progress': ('TEG', False),
+    'round': ('Round', False),
+    'frontback': ('FrontBack', False),
+    'player': ('Player', False),
+}
+
+
+def save_arrow_cache(df: pd.DataFrame, parquet_file: str = FILE_PATH_ALL_DATA) -> None:
+    """
+    Save the hole-level data and the aggregates in ARROW_AGGREGATES as memory-mappable Arrow files in an
+    'arrow' folder next to the all-data Parquet file, tagged with the data version.
+
+    Parameters:
+        df (pd.DataFrame): Hole-level data that has just been saved to `parquet_file`.
+        parquet_file (str): Path to the all-data Parquet file the cache belongs to.
+    """
+    all_data = filter_all_data(df.reset_index(drop=True))
+    frames = {'all-data': all_data}
+    for name, (level, exclude_incomplete) in ARROW_AGGREGATES.items():
+        frames[name] = aggregate_data(filter_all_data(all_data, True, exclude_incomplete), level)
+
+    arrow_dir = os.path.join(os.path.dirname(parquet_file), 'arrow')
+    write_arrow_cache(frames, get_data_version(parquet_file), arrow_dir)
+
+
+@timed_cache_resource(show_spinner=False, max_entries=2 * (len(ARROW_AGGREGATES) + 1))
+def get_arrow_table(name: str, data_version: str, file_version: str):
+    """
+    Memory-map a table from the Arrow cache once per server process and version of the file.
+
+    Parameters:
+        name (str): 'all-data' or a key of ARROW_AGGREGATES.
+        data_version (str): The current data version, from get_data_version().
+        file_version (str): Version of the Arrow file itself, so a rewritten file is mapped again.
+
+    Returns:
+        pyarrow.Table or None: The mapped table, or None if it was built from another data version.
+    """
+    return open_arrow_table(name, data_version, FILE_PATH_ARROW_CACHE)
+
+
+def get_current_arrow_table(name: str):
+    """
+    Return the memory-mapped table from the Arrow cache, or None if the cache is missing or out of date.
+    """
+    file_version = get_data_version(os.path.join(FILE_PATH_ARROW_CACHE, f"{name}.arrow"))
+    if not file_version:
+        return None
+    return get_arrow_table(name, get_data_version(), file_version)
+
+
+def load_arrow_frame(name: str) -> Optional[pd.DataFrame]:
+    """
+    Return a table from the Arrow cache as a DataFrame of the caller's own, or None if the cache is missing or
+    out of date.
+    """
+    table = get_current_arrow_table(name)
+    if table is None:
+        return None
+    return table.to_pandas()
+
+
+@timed_cache_data(show_spinner=False)
+def build_aggregate(name: str, data_version: str) -> pd.DataFrame:
+    """
+    Aggregate all data as for the Arrow cache's table of the given name, for when the cache is not current.
+
+    Parameters:
+        name (str): A key of ARROW_AGGREGATES.
+        data_version (str): The current data version, from get_data_version().
+
+    Returns:
+        pd.DataFrame: The aggregated data.
+    """
+    level, exclude_incomplete = ARROW_AGGREGATES[name]
+    return aggregate_data(load_all_data(exclude_teg_50=True, exclude_incomplete_tegs=exclude_incomplete), level)
+
+
+def load_aggregate(name: str) -> pd.DataFrame:
+    """
+    Return one of the ARROW_AGGREGATES as a frame of the caller's own. It is converted from the memory-mapped
+    Arrow cache, which each process maps once, rather than kept in st.cache_data; only when the cache is not
+    current is it built from all data and cached per data version.
+    """
+    cached = load_arrow_frame(name)
+    if cached is not None:
+        return cached
+    return build_aggregate(name, get_data_version())
+
+
+@st.cache_resource(show_spinner=False)
+def get_gspread_client() -> gspread.Client:
+    """
+    Build an authorised gspread client once per server process, using credentials stored in Streamlit secrets.
+
+    Returns:
+        gspread.Client: The authorised client, shared by every caller.
+    """
+    logger.info("Authorising Google Sheets client.")
+    service_account_info = st.secrets["google"]
+    creds = Credentials.from_service_account_info(service_account_info, scopes=SHEETS_SCOPE)
+    return gspread.authorize(creds)
+
+
+def get_google_sheet(sheet_name: str, worksheet_name: str, client: Optional[Any] = None) -> pd.DataFrame:
+    """
+    Load data from a specified Google Sheet and worksheet using the cached authorised client.
+
+    Parameters:
+        sheet_name (str): Name of the Google Sheet.
+        worksheet_name (str): Name of the worksheet within the sheet.
+        client (optional): An authorised gspread client or compatible fake. Defaults to get_gspread_client().
+
+    Returns:
+        pd.DataFrame: All records in the worksheet.
+    """
+    logger.info(f"Fetching data from Google Sheet: {sheet_name}, Worksheet: {worksheet_name}")
+
+    try:
+        client = client or get_gspread_client()
+        sheet = client.open(sheet_name).worksheet(worksheet_name)
+        
+        # Fetch data from the sheet
+        data = sheet.get_all_records()
+        df = pd.DataFrame(data)
+        logger.info("Data fetched successfully from Google Sheets.")
+        return df
+    except Exception as e:
+        logger.error(f"Error fetching data from Google Sheets: {e}")
+        st.error(f"Error fetching data: {e}")
+        raise
+
+
+def _get_sheet_revision(spreadsheet: Any) -> Optional[str]:
+    """
+    Return the spreadsheet's last modified time from the Drive metadata, or None if it is unavailable.
+    """
+    try:
+        if hasattr(spreadsheet, 'get_lastUpdateTime'):
+            return spreadsheet.get_lastUpdateTime()
+        return getattr(spreadsheet, 'lastUpdateTime', None)
+    except Exception as e:
+        logger.warning(f"Could not read sheet revision, falling back to content hashes: {e}")
+        return None
+
+
+def _sheet_values_to_frame(values: List[List[Any]], id_vars: List[str]) -> pd.DataFrame:
+    """
+    Convert raw worksheet values (header row first) into a wide DataFrame with numeric identifier columns.
+    Rows without a numeric TEGNum or Round (e.g. blank template rows, notes or repeated headers) are dropped.
+    """
+    if not values:
+        return pd.DataFrame(columns=id_vars)
+
+    header = [str(col).strip() for col in values[0]]
+    df = pd.DataFrame(values[1:], columns=header)
+    df = df.loc[:, [col != '' for col in header]]
+
+    is_blank = (df['TEGNum'].astype(str).str.strip() == '') | (df['Round'].astype(str).str.strip() == '')
+    df = df[~is_blank].copy()
+
+    for col in id_vars:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    not_numeric = df['TEGNum'].isna() | df['Round'].isna()
+    if not_numeric.any():
+        logger.warning(f"Skipping {not_numeric.sum()} worksheet rows with a non-numeric TEGNum or Round.")
+        df = df[~not_numeric].copy()
+
+    df['TEGNum'] = df['TEGNum'].astype(int)
+    df['Round'] = df['Round'].astype(int)
+    return df
+
+
+def _hash_block(block: pd.DataFrame) -> str:
+    """
+    Return a content hash of a block of worksheet rows, including its column headers.
+    """
+    digest = hashlib.sha1('|'.join(block.columns).encode())
+    digest.update(pd.util.hash_pandas_object(block, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def new_sheet_fetch_state() -> Dict[str, Any]:
+    """
+    Return an empty fetch state for fetch_sheet_blocks, for a caller that tracks changes on its own.
+    """
+    return {'revision': None, 'hashes': {}, 'blocks': {}}
 
 
-def add_cumulative_scores(df: pd.DataFrame) -> pd.DataFrame:
+def fetch_sheet_blocks(sheet_name: str, worksheet_name: str, id_vars: List[str], client: Optional[Any] = None,
+                       state: Optional[Dict[str, Any]] = None) -> Tuple[pd.DataFrame, List[Tuple[int, int]]]:
     """
-    Add cumulative scores and averages for specified measures across rounds, TEGs, and career.
+    Incrementally fetch a scores worksheet and return it in long format.
+
+    The spreadsheet revision is checked first; if it has not changed since the previous call the cached data is
+    returned without downloading any values. Otherwise the values are fetched in one call, hashed per
+    (TEGNum, Round) block, and only blocks whose hash changed are reshaped.
 
     Parameters:
-        df (pd.DataFrame): DataFrame containing the golf data.
+        sheet_name (str): Name of the Google Sheet.
+        worksheet_name (str): Name of the worksheet within the sheet.
+        id_vars (List[str]): Identifier columns for reshape_round_data. Must include 'TEGNum' and 'Round'.
+        client (optional): An authorised gspread client or compatible fake. Defaults to get_gspread_client().
+        state (dict, optional): The revision, hashes and blocks of this caller's previous fetch, from
+            new_sheet_fetch_state(); updated in place. Defaults to the state shared by every caller of the
+            worksheet, so a caller that must not miss changes seen by others (e.g. the live worker) passes its own.
 
     Returns:
-        pd.DataFrame: DataFrame with cumulative and average scores added.
+        Tuple[pd.DataFrame, List[Tuple[int, int]]]: Long-format data for every block in the worksheet, and the
+        (TEGNum, Round) keys of the blocks that are new, changed or removed since the previous fetch.
     """
-    logger.info("Adding cumulative scores and averages.")
+    logger.info(f"Incrementally fetching Google Sheet: {sheet_name}, Worksheet: {worksheet_name}")
+    client = client or get_gspread_client()
 
-    # Sort data
-    df.sort_values(by=['Pl', 'TEGNum', 'Round', 'Hole'], inplace=True)
+    with _SHEET_FETCH_LOCK:
+        if state is None:
+            state = _SHEET_FETCH_STATE.setdefault((sheet_name, worksheet_name), new_sheet_fetch_state())
 
-    # Create 'Hole Order Ever'
-    df['Hole Order Ever'] = df.groupby(['Pl']).cumcount() + 1
+        spreadsheet = client.open(sheet_name)
+        revision = _get_sheet_revision(spreadsheet)
+        if revision is not None and revision == state['revision']:
+            logger.info("Sheet revision unchanged. Using cached data.")
+            return _combine_sheet_blocks(state['blocks']), []
 
-    measures = ['Sc', 'GrossVP', 'NetVP', 'Stableford']
-    groupings = {
-        'Round': ['Pl', 'TEGNum', 'Round'],
-        'TEG': ['Pl', 'TEGNum'],
-        'Career': ['Pl']
-    }
+        values = spreadsheet.worksheet(worksheet_name).get_all_values()
+        wide_df = _sheet_values_to_frame(values, id_vars)
 
-    for measure in measures:
-        for period, group_cols in groupings.items():
-            cum_col = f'{measure} Cum {period}'
-            df[cum_col] = df.groupby(group_cols)[measure].cumsum()
+        hashes: Dict[Tuple[int, int], str] = {}
+        blocks: Dict[Tuple[int, int], pd.DataFrame] = {}
+        changed_blocks: List[Tuple[int, int]] = []
 
-    # Add counts
-    df['TEG Count'] = df.groupby(['Pl', 'TEGNum']).cumcount() + 1
-    df['Career Count'] = df.groupby('Pl').cumcount() + 1
+        for (teg_num, rd), block in wide_df.groupby(['TEGNum', 'Round'], sort=True):
+            key = (int(teg_num), int(rd))
+            hashes[key] = _hash_block(block)
+            if state['hashes'].get(key) == hashes[key]:
+                blocks[key] = state['blocks'][key]
+            else:
+                blocks[key] = reshape_round_data(block, id_vars)
+                changed_blocks.append(key)
+        changed_blocks += sorted(set(state['hashes']) - set(hashes))
 
-    # Add averages
-    for measure in measures:
-        df[f'{measure} Round Avg'] = df[f'{measure} Cum Round'] / df['Hole']
-        df[f'{measure} TEG Avg'] = df[f'{measure} Cum TEG'] / df['TEG Count']
-        df[f'{measure} Career Avg'] = df[f'{measure} Cum Career'] / df['Career Count']
+        state.update(revision=revision, hashes=hashes, blocks=blocks)
 
-    logger.info("Cumulative scores and averages added.")
-    return df
+    logger.info(f"Sheet fetched. {len(changed_blocks)} of {len(blocks)} blocks changed.")
+    return _combine_sheet_blocks(blocks), changed_blocks
 
 
-def save_to_parquet(df: pd.DataFrame, output_file: str) -> None:
+def _combine_sheet_blocks(blocks: Dict[Tuple[int, int], pd.DataFrame]) -> pd.DataFrame:
     """
-    Save DataFrame to a Parquet file.
-
-    Parameters:
-        df (pd.DataFrame): DataFrame containing the updated golf data.
-        output_file (str): Path to save the Parquet file.
+    Combine cached long-format blocks into a single DataFrame.
     """
-    df.to_parquet(output_file, index=False)
-    logger.info(f"Data successfully saved to {output_file}")
+    if not blocks:
+        return pd.DataFrame(columns=['TEGNum', 'Round', 'Pl', 'Score'])
+    return pd.concat(blocks.values(), ignore_index=True)
 
 
-def get_google_sheet(sheet_name: str, worksheet_name: str) -> pd.DataFrame:
+def clear_sheet_fetch_state() -> None:
     """
-    Load data from a specified Google Sheet and worksheet using credentials stored in Streamlit secrets.
+    Forget all cached revisions, hashes and blocks so the next fetch downloads and reshapes everything.
     """
-    logger.info(f"Fetching data from Google Sheet: {sheet_name}, Worksheet: {worksheet_name}")
-    
-    # Define the required scope for Google Sheets and Drive access
-    SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-
-    try:
-        # Use service account info from Streamlit secrets
-        service_account_info = st.secrets["google"]
-        creds = Credentials.from_service_account_info(service_account_info, scopes=SCOPE)
-        
-        # Authorize and access the Google Sheets API
-        client = gspread.authorize(creds)
-        sheet = client.open(sheet_name).worksheet(worksheet_name)
-        
-        # Fetch data from the sheet
-        data = sheet.get_all_records()
-        df = pd.DataFrame(data)
-        logger.info("Data fetched successfully from Google Sheets.")
-        return df
-    except Exception as e:
-        logger.error(f"Error fetching data from Google Sheets: {e}")
-        st.error(f"Error fetching data: {e}")
-        raise
+    with _SHEET_FETCH_LOCK:
+        _SHEET_FETCH_STATE.clear()
 
 def reshape_round_data(df: pd.DataFrame, id_vars: List[str]) -> pd.DataFrame:
     """
@@ -338,6 +1235,109 @@ def summarise_existing_rd_data(existing_rows: pd.DataFrame) -> pd.DataFrame:
     return summary
 
 
+def hash_score_blocks(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute a content hash for each (TEGNum, Round, Pl) block of hole scores.
+
+    Each row's Hole, score, par and SI are hashed in one vectorised call and the row hashes are summed per
+    block, so the hash does not depend on row order. Accepts both sheet data ('Score', 'Par') and processed
+    data ('Sc', 'PAR').
+
+    Parameters:
+        df (pd.DataFrame): Hole-level scores.
+
+    Returns:
+        pd.DataFrame: TEGNum, Round, Pl and Hash, one row per block.
+    """
+    blocks = df.rename(columns={'Score': 'Sc', 'Par': 'PAR'})[SCORE_BLOCK_KEY + ['Hole', 'Sc', 'PAR', 'SI']].copy()
+    blocks[SCORE_BLOCK_KEY[:2] + ['Hole', 'PAR', 'SI']] = blocks[SCORE_BLOCK_KEY[:2] + ['Hole', 'PAR', 'SI']].astype('int64')
+    blocks['Sc'] = blocks['Sc'].astype('float64')
+    blocks['Pl'] = blocks['Pl'].astype(str)
+    blocks['Hash'] = pd.util.hash_pandas_object(blocks[['Pl', 'Hole', 'Sc', 'PAR', 'SI']], index=False).to_numpy()
+
+    hashes = blocks.groupby(SCORE_BLOCK_KEY)['Hash'].sum().reset_index()
+    hashes['Hash'] = hashes['Hash'].map(lambda h: f"{int(h) & 0xFFFFFFFFFFFFFFFF:016x}")
+    return hashes
+
+
+def load_score_hashes(hashes_path: str = FILE_PATH_SCORE_HASHES, all_scores_path: Optional[str] = None) -> pd.DataFrame:
+    """
+    Load the stored block hashes. If none have been stored yet they are computed from all-scores.
+
+    Parameters:
+        hashes_path (str): Path to the score hashes CSV file.
+        all_scores_path (str, optional): Path to the all-scores CSV file, used when no hashes are stored.
+
+    Returns:
+        pd.DataFrame: TEGNum, Round, Pl and Hash.
+    """
+    if os.path.exists(hashes_path):
+        return pd.read_csv(hashes_path, dtype={'Hash': str})
+    if all_scores_path is not None and os.path.exists(all_scores_path):
+        logger.info("No stored score hashes. Computing them from all-scores.")
+        return hash_score_blocks(pd.read_csv(all_scores_path))
+    return pd.DataFrame(columns=SCORE_BLOCK_KEY + ['Hash'])
+
+
+def save_score_hashes(stored: pd.DataFrame, new_hashes: pd.DataFrame, hashes_path: str = FILE_PATH_SCORE_HASHES) -> pd.DataFrame:
+    """
+    Replace or add the hashes of newly saved blocks and write the hash store.
+
+    Parameters:
+        stored (pd.DataFrame): The current hash store.
+        new_hashes (pd.DataFrame): Hashes of the blocks just saved, from hash_score_blocks.
+        hashes_path (str): Path to the score hashes CSV file.
+
+    Returns:
+        pd.DataFrame: The updated hash store.
+    """
+    replaced = stored.set_index(SCORE_BLOCK_KEY).index.isin(new_hashes.set_index(SCORE_BLOCK_KEY).index)
+    updated = pd.concat([stored[~replaced], new_hashes], ignore_index=True).sort_values(SCORE_BLOCK_KEY, ignore_index=True)
+    updated.to_csv(hashes_path, index=False)
+    logger.info(f"Score hashes saved to {hashes_path}")
+    return updated
+
+
+def rebuild_score_hashes(all_scores: pd.DataFrame, hashes_path: str = FILE_PATH_SCORE_HASHES) -> pd.DataFrame:
+    """
+    Recompute the hash of every block from a full all-scores table and rewrite the hash store, so it matches
+    all-scores after a rebuild (update_all_data, which update_data.py and backfill_history.py run).
+
+    Parameters:
+        all_scores (pd.DataFrame): The all-scores table the data was rebuilt from.
+        hashes_path (str): Path to the score hashes CSV file.
+
+    Returns:
+        pd.DataFrame: The new hash store.
+    """
+    hashes = hash_score_blocks(all_scores).sort_values(SCORE_BLOCK_KEY, ignore_index=True)
+    hashes.to_csv(hashes_path, index=False)
+    logger.info(f"Score hashes rebuilt for {len(hashes)} blocks and saved to {hashes_path}")
+    return hashes
+
+
+def compare_score_blocks(long_df: pd.DataFrame, stored: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare the blocks in newly loaded scores with the stored hashes.
+
+    Parameters:
+        long_df (pd.DataFrame): Newly loaded hole-level scores.
+        stored (pd.DataFrame): The hash store, from load_score_hashes.
+
+    Returns:
+        pd.DataFrame: TEGNum, Round, Pl, Hash and Status ('new', 'changed' or 'unchanged') for each loaded block.
+    """
+    hashes = hash_score_blocks(long_df)
+    stored = stored[SCORE_BLOCK_KEY + ['Hash']].astype({'TEGNum': 'int64', 'Round': 'int64', 'Pl': str})
+    compared = hashes.merge(stored, on=SCORE_BLOCK_KEY, how='left', suffixes=('', ' Stored'))
+    compared['Status'] = np.select(
+        [compared['Hash Stored'].isna(), compared['Hash'] == compared['Hash Stored']],
+        ['new', 'unchanged'],
+        default='changed'
+    )
+    return compared.drop(columns=['Hash Stored'])
+
+
 def add_round_info(all_data: pd.DataFrame) -> pd.DataFrame:
     """
     Add round information to the DataFrame.
@@ -383,6 +1383,9 @@ def update_all_data(csv_file: str, parquet_file: str, csv_output_file: str) -> N
         logger.error(f"CSV file not found: {csv_file}")
         raise
 
+    # Keep the score hashes in step with the scores, so the next Sheets load only flags real changes
+    rebuild_score_hashes(df)
+
     # Add round info
     df = add_round_info(df)
     logger.debug("Round info added.")
@@ -391,6 +1394,9 @@ def update_all_data(csv_file: str, parquet_file: str, csv_output_file: str) -> N
     df_transformed = add_cumulative_scores(df)
     logger.debug("Cumulative scores and averages applied.")
 
+    # Flag rows from partial rounds
+    df_transformed = mark_provisional(df_transformed)
+
     # Add 'Year' column and convert to pandas nullable integer type
     df_transformed['Year'] = pd.to_datetime(
         df_transformed['Date'], dayfirst=True, errors='coerce'
@@ -398,12 +1404,69 @@ def update_all_data(csv_file: str, parquet_file: str, csv_output_file: str) -> N
 
     # Save the transformed dataframe to a Parquet file
     save_to_parquet(df_transformed, parquet_file)
+    save_race_series(df_transformed, parquet_file=parquet_file)
+    save_store(df_transformed, parquet_file=parquet_file)
+    save_arrow_cache(df_transformed, parquet_file=parquet_file)
+    save_course_hole_stats(count_course_holes(df_transformed), parquet_file=parquet_file)
+    save_record_index(build_record_index(record_aggregates(df_transformed)), parquet_file=parquet_file)
 
     # Save the transformed dataframe to a CSV file for manual review
     df_transformed.to_csv(csv_output_file, index=False)
     logger.info(f"Transformed data saved to {csv_output_file}")
 
 
+def upsert_all_data(new_rows: pd.DataFrame, parquet_file: str, csv_output_file: str, replace_on: List[str] = None) -> pd.DataFrame:
+    """
+    Add processed rounds (complete or partial) to the all-data Parquet and CSV files without recomputing the
+    whole history.
+
+    Parameters:
+        new_rows (pd.DataFrame): Rows returned by process_round_for_all_scores.
+        parquet_file (str): Path to the all-data Parquet file.
+        csv_output_file (str): Path to the output CSV file for review.
+        replace_on (List[str], optional): Columns identifying existing rows to replace. See upsert_hole_scores.
+
+    Returns:
+        pd.DataFrame: The updated hole-level data.
+    """
+    logger.info(f"Upserting {len(new_rows)} rows into {parquet_file}")
+
+    all_data = pd.read_parquet(parquet_file)
+    course_hole_stats = read_course_hole_stats(get_data_version(parquet_file))
+    record_index = read_record_index(get_data_version(parquet_file))
+
+    new_rows = add_round_info(new_rows)
+    new_rows['Year'] = pd.to_datetime(new_rows['Date'], dayfirst=True, errors='coerce').dt.year.astype('Int64')
+
+    df_updated = upsert_hole_scores(all_data, new_rows, replace_on=replace_on)
+
+    save_to_parquet(df_updated, parquet_file)
+    save_race_series(df_updated, parquet_file=parquet_file)
+    save_store(df_updated, parquet_file=parquet_file)
+    save_arrow_cache(df_updated, parquet_file=parquet_file)
+
+    # Course hole stats only need the replaced rows taken out and the new rows added
+    if course_hole_stats is None:
+        course_hole_stats = count_course_holes(df_updated)
+    else:
+        keys = replace_on or ['TEGNum', 'Round', 'Pl', 'Hole']
+        removed = all_data[all_data.set_index(keys).index.isin(new_rows.set_index(keys).index)]
+        course_hole_stats = update_course_hole_stats(course_hole_stats, new_rows, removed)
+    save_course_hole_stats(course_hole_stats, parquet_file=parquet_file)
+
+    # Check the TEGs, rounds and nines the new rows belong to against the record index
+    if record_index is None:
+        record_index = build_record_index(record_aggregates(df_updated))
+    else:
+        record_index, records_broken = check_new_records(record_index, df_updated, new_rows, previous_data=all_data)
+        append_records_broken(records_broken)
+    save_record_index(record_index, parquet_file=parquet_file)
+
+    df_updated.to_csv(csv_output_file, index=False)
+    logger.info(f"Transformed data saved to {csv_output_file}")
+    return df_updated
+
+
 def check_for_complete_and_duplicate_data(all_scores_path: str, all_data_path: str) -> Dict[str, pd.DataFrame]:
     """
     Check for complete and duplicate data in the all-scores (CSV) and all-data (Parquet) files.
@@ -466,6 +1529,139 @@ def check_for_complete_and_duplicate_data(all_scores_path: str, all_data_path: s
     return summary
 
 
+INTEGRITY_CHECKS = {
+    'duplicate_holes': "Holes entered more than once for a player",
+    'incomplete_rounds': "Completed rounds without 18 holes",
+    'inconsistent_layout': "Holes with different PAR or SI for different players, or rounds whose SIs are not 1-18",
+    'scoring_errors': "HCStrokes, GrossVP, Net, NetVP or Stableford not matching Sc, PAR, SI and HC",
+    'cumulative_errors': "Cumulative or count columns not matching the hole scores",
+    'missing_round_info': "Rounds without a course or date in round_info.csv",
+    'layout_changes': "Course holes whose PAR or SI differ from the course's usual layout",
+}
+INTEGRITY_WARNINGS = ['layout_changes']  # Reported, but can be legitimate (e.g. tees or nines changed)
+
+
+def _integrity_failures(df: pd.DataFrame, failed: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn a boolean frame of failed checks (one column per checked column) into one row per failure. failed is
+    indexed by labels of df, which must be unique.
+    """
+    stacked = failed.stack()
+    stacked = stacked[stacked]
+    if stacked.empty:
+        return pd.DataFrame(columns=['TEGNum', 'Round', 'Pl', 'Hole', 'Column'])
+    rows, columns = zip(*stacked.index)
+    failures = df.loc[list(rows), ['TEGNum', 'Round', 'Pl', 'Hole']].reset_index(drop=True)
+    failures['Column'] = columns
+    return failures
+
+
+@timed
+def validate_data_integrity(all_data: pd.DataFrame, rounds: Optional[pd.DataFrame] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Check the hole-level data in one vectorised pass per check. See INTEGRITY_CHECKS for what is checked.
+
+    Parameters:
+        all_data (pd.DataFrame): Hole-level data, as saved to all-data.parquet.
+        rounds (pd.DataFrame, optional): TEGNum and Round of the rounds to validate, e.g. the rounds touched
+            by the last ingest. Cumulative columns and layout changes are still checked against the rest of
+            the data, but only problems in these rounds are reported. None validates everything.
+
+    Returns:
+        Dict[str, pd.DataFrame]: The problems found for each key of INTEGRITY_CHECKS. Empty frames mean the
+        check passed.
+    """
+    logger.info("Validating data integrity.")
+    df = all_data.sort_values(['Pl', 'TEGNum', 'Round', 'Hole'], ignore_index=True)
+    if rounds is not None:
+        round_keys = pd.MultiIndex.from_frame(rounds[['TEGNum', 'Round']].drop_duplicates())
+        in_scope = df.set_index(['TEGNum', 'Round']).index.isin(round_keys)
+    else:
+        in_scope = np.ones(len(df), dtype=bool)
+    scoped = df[in_scope]
+    report: Dict[str, pd.DataFrame] = {}
+
+    # Hole counts
+    hole_key = ['TEGNum', 'Round', 'Pl', 'Hole']
+    report['duplicate_holes'] = scoped[scoped.duplicated(hole_key, keep=False)][hole_key].drop_duplicates()
+    complete = scoped[~scoped['Provisional'].eq(True)] if 'Provisional' in scoped.columns else scoped
+    hole_counts = complete.groupby(['TEGNum', 'Round', 'Pl']).size().reset_index(name='EntryCount')
+    report['incomplete_rounds'] = hole_counts[hole_counts['EntryCount'] != TOTAL_HOLES]
+
+    # Layout within each round
+    layout = scoped.groupby(['TEGNum', 'Round', 'Hole'])[['PAR', 'SI']].nunique()
+    mixed_holes = layout[(layout > 1).any(axis=1)].reset_index()[['TEGNum', 'Round', 'Hole']]
+    round_si = scoped.drop_duplicates(['TEGNum', 'Round', 'Hole']).groupby(['TEGNum', 'Round'])['SI']
+    bad_si = round_si.agg(lambda si: set(si) != set(range(1, TOTAL_HOLES + 1)) if len(si) == TOTAL_HOLES else si.duplicated().any())
+    bad_si_rounds = bad_si[bad_si].reset_index()[['TEGNum', 'Round']].assign(Hole=pd.NA)
+    report['inconsistent_layout'] = pd.concat([mixed_holes, bad_si_rounds], ignore_index=True)
+
+    # Scoring columns recomputed from Sc, PAR, SI and HC
+    hc_strokes = (scoped['HC'] // 18) + (scoped['HC'] % 18 >= scoped['SI']).astype(int)
+    net = scoped['Sc'] - hc_strokes
+    expected = pd.DataFrame({
+        'HCStrokes': hc_strokes,
+        'GrossVP': scoped['Sc'] - scoped['PAR'],
+        'Net': net,
+        'NetVP': net - scoped['PAR'],
+        'Stableford': (2 - (net - scoped['PAR'])).clip(lower=0)
+    })
+    scoring_failed = pd.DataFrame(~np.isclose(scoped[expected.columns], expected), index=scoped.index, columns=expected.columns)
+    report['scoring_errors'] = _integrity_failures(scoped, scoring_failed)
+
+    # Cumulative and count columns: each row must equal the previous row in its group plus this hole. With rounds
+    # given, only the affected players from their first checked TEG onwards are needed, plus the row before as
+    # the career baseline (the same slice upsert_hole_scores recomputes)
+    if rounds is not None:
+        first_teg = scoped.groupby('Pl')['TEGNum'].min()
+        from_first = (df['TEGNum'] >= df['Pl'].map(first_teg)).to_numpy()
+        next_from_first = np.append(from_first[1:], False)
+        same_player_next = (df['Pl'] == df['Pl'].shift(-1)).to_numpy()
+        cum_rows = from_first | (next_from_first & same_player_next)
+    else:
+        cum_rows = np.ones(len(df), dtype=bool)
+    cum_df = df[cum_rows]
+    measures = ['Sc', 'GrossVP', 'NetVP', 'Stableford']
+    groupings = {
+        'Round': ['Pl', 'TEGNum', 'Round'],
+        'TEG': ['Pl', 'TEGNum'],
+        'Career': ['Pl']
+    }
+    counts = {'TEG Count': 'TEG', 'Career Count': 'Career', 'Hole Order Ever': 'Career'}
+    failed = {}
+    for period, group_cols in groupings.items():
+        cum_cols = [f'{measure} Cum {period}' for measure in measures]
+        count_cols = [col for col, col_period in counts.items() if col_period == period]
+        previous = cum_df.groupby(group_cols)[cum_cols + count_cols].shift(1).fillna(0)
+        for measure, cum_col in zip(measures, cum_cols):
+            failed[cum_col] = ~np.isclose(cum_df[cum_col] - previous[cum_col], cum_df[measure])
+        for count_col in count_cols:
+            failed[count_col] = (cum_df[count_col] - previous[count_col]) != 1
+    failed = pd.DataFrame(failed, index=cum_df.index)[in_scope[cum_rows]]
+    report['cumulative_errors'] = _integrity_failures(df, failed)
+
+    # Round info coverage
+    round_info = pd.read_csv(CONFIG["ROUND_INFO_PATH"])
+    scoped_rounds = scoped[['TEGNum', 'Round']].drop_duplicates()
+    merged = scoped_rounds.merge(round_info[['TEGNum', 'Round', 'Course', 'Date']], on=['TEGNum', 'Round'], how='left')
+    report['missing_round_info'] = merged[merged[['Course', 'Date']].isna().any(axis=1)][['TEGNum', 'Round']]
+
+    # Layout changes against each course's usual layout
+    round_holes = (~df.duplicated(['TEGNum', 'Round', 'Hole']) & df['Course'].isin(scoped['Course'].dropna().unique())).to_numpy()
+    course_holes = df[round_holes]
+    usual = (course_holes.groupby(['Course', 'Hole'])[['PAR', 'SI']]
+             .agg(lambda x: x.mode().iloc[0]).rename(columns={'PAR': 'Usual PAR', 'SI': 'Usual SI'}).reset_index())
+    compared = df[round_holes & in_scope].merge(usual, on=['Course', 'Hole'])
+    changed = (compared['PAR'] != compared['Usual PAR']) | (compared['SI'] != compared['Usual SI'])
+    report['layout_changes'] = compared[changed][['Course', 'TEGNum', 'Round', 'Hole', 'PAR', 'SI', 'Usual PAR', 'Usual SI']]
+
+    for check, problems in report.items():
+        if not problems.empty:
+            logger.warning(f"Integrity check '{check}' found {len(problems)} problems.")
+    logger.info("Data integrity validation complete.")
+    return report
+
+
 def get_teg_rounds(TEG: str) -> int:
     """
     Return the number of rounds for a given TEG.
@@ -499,6 +1695,45 @@ def format_vs_par(value: float) -> str:
         return "="
 
 
+# Sort order of each leaderboard measure (True = lowest is best)
+LEADERBOARD_MEASURES = {'Stableford': False, 'GrossVP': True, 'NetVP': True, 'Sc': True}
+
+
+@timed
+def build_leaderboard(leaderboard_df: pd.DataFrame, value_column: str, ascending: bool = True) -> pd.DataFrame:
+    """
+    Build a TEG leaderboard: one row per player with their score for each round, the total and a rank
+    (tied ranks are suffixed with '=').
+
+    Parameters:
+        leaderboard_df (pd.DataFrame): Round-level data for a single TEG.
+        value_column (str): Column to use for ranking.
+        ascending (bool): Whether to sort in ascending order (True when the lowest score is best).
+
+    Returns:
+        pd.DataFrame: Leaderboard with Rank, Player, R1..Rn and Total columns.
+    """
+    pivot_df = leaderboard_df.pivot_table(
+        index='Player',
+        columns='Round',
+        values=value_column,
+        aggfunc='sum',
+        fill_value=0
+    ).assign(Total=lambda x: x.sum(axis=1)).sort_values('Total', ascending=ascending)
+
+    pivot_df.columns = [f'R{col}' if isinstance(col, int) else col for col in pivot_df.columns]
+    pivot_df = pivot_df.reset_index()
+    pivot_df['Rank'] = pivot_df['Total'].rank(method='min', ascending=ascending).astype(int).astype(object)
+
+    duplicated_scores = pivot_df['Total'].duplicated(keep=False)
+    pivot_df.loc[duplicated_scores, 'Rank'] = pivot_df.loc[duplicated_scores, 'Rank'].astype(str) + '='
+
+    columns = ['Rank', 'Player'] + [col for col in pivot_df.columns if col not in ['Rank', 'Player']]
+    logger.info(f"Leaderboard created for {value_column}.")
+    return pivot_df[columns]
+
+
+@timed
 def get_teg_winners(df: pd.DataFrame) -> pd.DataFrame:
     """
     Generate TEG winners, best net, gross, and worst net by TEG.
@@ -569,6 +1804,7 @@ def get_teg_winners(df: pd.DataFrame) -> pd.DataFrame:
 from typing import List
 import pandas as pd
 
+@timed
 def aggregate_data(data: pd.DataFrame, aggregation_level: str, measures: List[str] = None, additional_group_fields: List[str] = None) -> pd.DataFrame:
     """
     Generalized aggregation function with dynamic level of aggregation and additional group fields.
@@ -609,8 +1845,8 @@ def aggregate_data(data: pd.DataFrame, aggregation_level: str, measures: List[st
             additional_group_fields = [additional_group_fields]  # Wrap in a list if it's a string
         group_columns.extend(additional_group_fields)
 
-    # Ensure group columns are unique
-    group_columns = list(set(group_columns))
+    # Ensure group columns are unique, keeping hierarchy order so the output is the same in every process
+    group_columns = list(dict.fromkeys(group_columns))
 
     # Debug: Print group columns and check if they exist in the DataFrame
     #print(f"Group columns: {group_columns}")
@@ -621,41 +1857,54 @@ def aggregate_data(data: pd.DataFrame, aggregation_level: str, measures: List[st
     if missing_columns:
         raise ValueError(f"Missing columns in the DataFrame: {missing_columns}")
 
-    # Perform aggregation
-    aggregated_df = data.groupby(group_columns, as_index=False)[measures].sum()
-    aggregated_df = aggregated_df.sort_values(by=group_columns)
+    # Perform aggregation, grouping on integer player codes and adding Pl and Player back for display
+    name_columns = [col for col in ['Pl', 'Player'] if col in group_columns]
+    if name_columns and 'Pl' in data.columns:
+        codes = _player_keys(data)
+        keys = [col for col in group_columns if col not in name_columns]
+        aggregated_df = (data[keys + measures].assign(PlayerCode=codes)
+                         .groupby(['PlayerCode'] + keys, as_index=False)[measures].sum())
+        names = data[name_columns].groupby(codes).first()
+        aggregated_df = aggregated_df.join(names, on='PlayerCode')[group_columns + measures]
+    else:
+        aggregated_df = data.groupby(group_columns, as_index=False)[measures].sum()
+    aggregated_df = aggregated_df.sort_values(by=group_columns, ignore_index=True)
 
     return aggregated_df
 
-@st.cache_data
+@timed_cache_data
+def get_teg_winners_data(data_version: str):
+    return get_teg_winners(load_all_data(exclude_incomplete_tegs=True, exclude_teg_50=True))
+
+@timed
 def get_complete_teg_data():
-    all_data = load_all_data(exclude_teg_50 = True, exclude_incomplete_tegs= True)
-    aggregated_data = aggregate_data(all_data,'TEG')
-    return aggregated_data
+    return load_aggregate('teg')
 
-@st.cache_data
+@timed
 def get_teg_data_inc_in_progress():
-    all_data = load_all_data(exclude_teg_50 = True, exclude_incomplete_tegs= False)
-    aggregated_data = aggregate_data(all_data,'TEG')
-    return aggregated_data
+    return load_aggregate('teg-inc-in-progress')
 
-@st.cache_data
+@timed
 def get_round_data():
-    all_data = load_all_data(exclude_teg_50 = True, exclude_incomplete_tegs= False)
-    aggregated_data = aggregate_data(all_data,'Round')
-    return aggregated_data
+    return load_aggregate('round')
 
-@st.cache_data
+@timed
 def get_9_data():
-    all_data = load_all_data(exclude_teg_50 = True, exclude_incomplete_tegs= False)
-    aggregated_data = aggregate_data(all_data,'FrontBack')
-    return aggregated_data    
+    return load_aggregate('frontback')
 
-@st.cache_data
+@timed
 def get_Pl_data():
-    all_data = load_all_data(exclude_teg_50 = True, exclude_incomplete_tegs= False)
-    aggregated_data = aggregate_data(all_data,'Player')
-    return aggregated_data
+    return load_aggregate('player')
+
+def _player_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    Return the integer player code for each row, giving unregistered players codes of their own.
+    """
+    codes = player_codes(df['Pl'])
+    if (codes < 0).any():
+        codes = player_codes(df['Pl'], extend_registry(df))
+    return codes
+
 
 def list_fields_by_aggregation_level(df):
     # Define the levels of aggregation
@@ -667,14 +1916,26 @@ def list_fields_by_aggregation_level(df):
         #'Hole': ['Player', 'TEG', 'Round', 'FrontBack', 'Hole']
     }
 
+    # Group on integer player codes where the data has initials, and count distinct holes by their integer key
+    keys = {col: df[col] for col in ['Player', 'TEG', 'Round', 'FrontBack'] if col in df.columns}
+    if 'Pl' in df.columns and 'Player' in df.columns:
+        keys['Player'] = pd.Series(_player_keys(df), index=df.index)
+    counted = df
+    if {'HoleID', 'TEGNum', 'Round', 'Hole'}.issubset(df.columns):
+        counted = df.assign(HoleID=hole_keys(df['TEGNum'], df['Round'], df['Hole']))
+
+    # Count distinct values of every field within each group, one grouping per level
+    max_distinct = {level: counted.groupby([keys[field] for field in group_fields]).nunique().max()
+                    for level, group_fields in aggregation_levels.items()}
+
     # Dictionary to hold fields unique at each level
     fields_by_level = {level: [] for level in aggregation_levels}
 
     # For each field in the dataframe, determine its uniqueness level
     for col in df.columns:
-        for level, group_fields in aggregation_levels.items():
+        for level in aggregation_levels:
             # Check if the field is unique at this level
-            if df.groupby(group_fields)[col].nunique().max() == 1:
+            if max_distinct[level][col] == 1:
                 fields_by_level[level].append(col)
                 break  # Stop after finding the lowest level of uniqueness
 
@@ -686,6 +1947,7 @@ def list_fields_by_aggregation_level(df):
 #     print(f"Fields unique at {level} level: {fields}")
 
 
+@timed
 def add_ranks(df, fields_to_rank=None, rank_ascending=None):
 
     """
@@ -752,24 +2014,240 @@ def add_ranks(df, fields_to_rank=None, rank_ascending=None):
     
     return df
 
-@st.cache_data
-def get_ranked_teg_data():
+@timed_cache_data
+def get_ranked_teg_data(data_version: str):
     df = get_complete_teg_data()
     ranked_data = add_ranks(df)
     return ranked_data
 
-@st.cache_data
-def get_ranked_round_data():
-    df = get_round_data()
+def exclude_provisional(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drop rows from partial rounds so they are not ranked against complete rounds.
+    """
+    if 'Provisional' not in df.columns:
+        return df
+    return df[~df['Provisional'].eq(True)]
+
+@timed_cache_data
+def get_ranked_round_data(data_version: str):
+    df = exclude_provisional(get_round_data())
     ranked_data = add_ranks(df)
     return ranked_data
 
-@st.cache_data
-def get_ranked_frontback_data():
-    df = get_9_data()
+@timed_cache_data
+def get_ranked_frontback_data(data_version: str):
+    df = exclude_provisional(get_9_data())
     ranked_data = add_ranks(df)
     return ranked_data
 
+FORM_MEASURES = ['GrossVP', 'NetVP', 'Stableford']
+FORM_WINDOW = 5
+FORM_SPAN = 5
+
+
+@timed
+def build_player_form(round_data: pd.DataFrame, window: int = FORM_WINDOW, span: int = FORM_SPAN) -> pd.DataFrame:
+    """
+    Compute each player's form: rolling and exponentially weighted averages of their round scores, in career
+    order. All players are handled in one grouped rolling pass and one grouped EWM pass.
+
+    Parameters:
+        round_data (pd.DataFrame): Round-level data, as returned by get_round_data.
+        window (int): Number of rounds in the rolling average. Early rounds average over what is available.
+        span (int): Span of the exponentially weighted average.
+
+    Returns:
+        pd.DataFrame: One row per player and round, in career order, with 'Career Round' and for each of
+        FORM_MEASURES the round score, '<measure> Rolling' and '<measure> EWM'.
+    """
+    form = (exclude_provisional(round_data)
+            .sort_values(['Player', 'TEGNum', 'Round'], ignore_index=True)
+            [['Player', 'Pl', 'TEG', 'TEGNum', 'Round', 'Date', 'Course'] + FORM_MEASURES])
+    form['Career Round'] = form.groupby('Player').cumcount() + 1
+
+    grouped = form.groupby('Player', sort=False)[FORM_MEASURES]
+    rolling = grouped.rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
+    ewm = grouped.ewm(span=span).mean().reset_index(level=0, drop=True)
+
+    for measure in FORM_MEASURES:
+        form[f'{measure} Rolling'] = rolling[measure]
+        form[f'{measure} EWM'] = ewm[measure]
+
+    return form
+
+
+@timed_cache_data(show_spinner=False)
+def get_player_form(data_version: str, window: int = FORM_WINDOW, span: int = FORM_SPAN) -> pd.DataFrame:
+    """
+    Return build_player_form for the current round data, cached per data version and window.
+
+    Parameters:
+        data_version (str): The current data version, from get_data_version().
+        window (int): Number of rounds in the rolling average.
+        span (int): Span of the exponentially weighted average.
+
+    Returns:
+        pd.DataFrame: Player form as returned by build_player_form.
+    """
+    return build_player_form(get_round_data(), window=window, span=span)
+
+
+def current_form(form: pd.DataFrame, measure: str) -> pd.DataFrame:
+    """
+    Summarise each player's latest form in one measure against their career average.
+
+    Parameters:
+        form (pd.DataFrame): Player form as returned by build_player_form.
+        measure (str): One of FORM_MEASURES.
+
+    Returns:
+        pd.DataFrame: One row per player with the last round played, the rolling and EWM averages after it,
+        the career average and the rolling average's difference from it, best form first.
+    """
+    latest = form.groupby('Player', sort=False).tail(1).set_index('Player')
+    summary = pd.DataFrame({
+        'Last Round': latest['TEG'] + ' | R' + latest['Round'].astype(str),
+        'Rounds': latest['Career Round'],
+        'Rolling': latest[f'{measure} Rolling'],
+        'EWM': latest[f'{measure} EWM'],
+        'Career': form.groupby('Player')[measure].mean(),
+    })
+    summary['vs Career'] = summary['Rolling'] - summary['Career']
+    # Stableford is better when higher; the vs-par measures when lower
+    return summary.sort_values('Rolling', ascending=(measure != 'Stableford')).reset_index()
+
+
+HEAD_TO_HEAD_BASES = {'Gross': 'Sc', 'Net': 'Net'}
+
+
+def pivot_hole_scores(all_data: pd.DataFrame, score_col: str) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Pivot hole scores into a [round, hole, player] array.
+
+    Parameters:
+        all_data (pd.DataFrame): Hole-level data.
+        score_col (str): Score column to pivot, e.g. 'Sc' or 'Net'.
+
+    Returns:
+        Tuple[pd.DataFrame, np.ndarray, np.ndarray]: The rounds (TEGNum, Round, TEG) in array order, the player
+        names in array order, and the scores with shape (rounds, TOTAL_HOLES, players), NaN where not played.
+    """
+    rounds = (all_data[['TEGNum', 'Round', 'TEG']].drop_duplicates(['TEGNum', 'Round'])
+              .sort_values(['TEGNum', 'Round'], ignore_index=True))
+    players = np.sort(all_data['Player'].unique())
+
+    round_pos = pd.MultiIndex.from_frame(rounds[['TEGNum', 'Round']]).get_indexer(
+        pd.MultiIndex.from_frame(all_data[['TEGNum', 'Round']]))
+    player_pos = np.searchsorted(players, all_data['Player'].to_numpy())
+
+    scores = np.full((len(rounds), TOTAL_HOLES, len(players)), np.nan)
+    scores[round_pos, all_data['Hole'].to_numpy(dtype=int) - 1, player_pos] = all_data[score_col].to_numpy(dtype=float)
+    return rounds, players, scores
+
+
+@timed
+def build_head_to_head(all_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compare every pair of players on every round they both completed, gross and net, by broadcasting the
+    [round, hole, player] score array against itself.
+
+    For each round and pair this gives the stroke difference and a simulated hole-by-hole match: holes won,
+    halved and lost, and the match result with its margin ('3&2', '1 up', 'AS'), the match ending as soon as
+    one player is more holes up than there are holes left.
+
+    Parameters:
+        all_data (pd.DataFrame): Hole-level data. TEG 50 and partial rounds should already be excluded.
+
+    Returns:
+        pd.DataFrame: One row per round, basis ('Gross' or 'Net'), player and opponent, from the player's side.
+    """
+    frames = []
+    for basis, score_col in HEAD_TO_HEAD_BASES.items():
+        rounds, players, scores = pivot_hole_scores(all_data, score_col)
+        n_players = len(players)
+
+        # Pairs where both players completed the round, excluding a player against themselves
+        completed = ~np.isnan(scores).any(axis=1)
+        paired = completed[:, :, None] & completed[:, None, :] & ~np.eye(n_players, dtype=bool)
+
+        # diff[r, h, i, j]: player i's score minus player j's on hole h of round r
+        diff = scores[:, :, :, None] - scores[:, :, None, :]
+        holes_won = (diff < 0).sum(axis=1)
+        holes_lost = (diff > 0).sum(axis=1)
+        holes_halved = (diff == 0).sum(axis=1)
+        strokes = np.nansum(diff, axis=1)
+
+        # Holes up after each hole, and the first hole where the lead exceeds the holes remaining
+        holes_up = np.cumsum(np.sign(-np.nan_to_num(diff)), axis=1).astype(int)
+        holes_left = (TOTAL_HOLES - 1 - np.arange(TOTAL_HOLES))[None, :, None, None]
+        decided = np.abs(holes_up) > holes_left
+        decided_at = np.where(decided.any(axis=1), decided.argmax(axis=1), TOTAL_HOLES - 1)
+        final_up = np.take_along_axis(holes_up, decided_at[:, None], axis=1)[:, 0]
+
+        r, i, j = np.nonzero(paired)
+        up = final_up[r, i, j]
+        left = TOTAL_HOLES - 1 - decided_at[r, i, j]
+        margin = np.where(up == 0, 'AS',
+                          np.where(left > 0,
+                                   np.char.add(np.char.add(np.abs(up).astype(str), '&'), left.astype(str)),
+                                   np.char.add(np.abs(up).astype(str), ' up')))
+
+        frame = rounds.iloc[r].reset_index(drop=True)
+        frame['Basis'] = basis
+        frame['Player'] = players[i]
+        frame['Opponent'] = players[j]
+        frame['Player Score'] = scores[r, :, i].sum(axis=1)
+        frame['Opponent Score'] = scores[r, :, j].sum(axis=1)
+        frame['Strokes'] = strokes[r, i, j]
+        frame['Holes Won'] = holes_won[r, i, j]
+        frame['Holes Halved'] = holes_halved[r, i, j]
+        frame['Holes Lost'] = holes_lost[r, i, j]
+        frame['Result'] = np.select([up > 0, up < 0], ['Won', 'Lost'], 'Halved')
+        frame['Margin'] = margin
+        frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def summarise_head_to_head(rounds: pd.DataFrame) -> pd.DataFrame:
+    """
+    Total head-to-head round results into one row per basis, player and opponent.
+
+    Parameters:
+        rounds (pd.DataFrame): Round results as returned by build_head_to_head.
+
+    Returns:
+        pd.DataFrame: Rounds played together, total and average stroke difference (negative means the player
+        scored fewer), round wins/ties/losses on strokes, and holes and matches won, halved and lost.
+    """
+    results = rounds.assign(
+        **{'Rounds Won': rounds['Strokes'] < 0, 'Rounds Tied': rounds['Strokes'] == 0, 'Rounds Lost': rounds['Strokes'] > 0,
+           'Matches Won': rounds['Result'] == 'Won', 'Matches Halved': rounds['Result'] == 'Halved',
+           'Matches Lost': rounds['Result'] == 'Lost'})
+
+    summary = results.groupby(['Basis', 'Player', 'Opponent'], as_index=False).agg(
+        **{'Rounds': ('Strokes', 'size'), 'Strokes': ('Strokes', 'sum')},
+        **{col: (col, 'sum') for col in ['Rounds Won', 'Rounds Tied', 'Rounds Lost', 'Holes Won', 'Holes Halved',
+                                         'Holes Lost', 'Matches Won', 'Matches Halved', 'Matches Lost']})
+    summary.insert(5, 'Strokes per Round', summary['Strokes'] / summary['Rounds'])
+    return summary
+
+
+@timed_cache_data(show_spinner=False)
+def get_head_to_head(data_version: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Return the head-to-head round results and pairwise summary for every pair of players, cached per data version.
+
+    Parameters:
+        data_version (str): The current data version, from get_data_version().
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: build_head_to_head and summarise_head_to_head outputs.
+    """
+    rounds = build_head_to_head(exclude_provisional(load_all_data(exclude_teg_50=True)))
+    return rounds, summarise_head_to_head(rounds)
+
+
 def get_best(df, measure_to_use, player_level = False, top_n = 1):
     valid_measures = ['Sc', 'GrossVP', 'NetVP', 'Stableford']
     if measure_to_use not in valid_measures:
@@ -863,6 +2341,81 @@ def chosen_teg_context(ranked_teg_df, teg = 'TEG 15', measure = None):
     return chosen_teg_context
 
 
+# Context levels and the columns that identify one round, TEG or nine
+CONTEXT_LEVELS = {
+    'Round': ['TEG', 'Round'],
+    'TEG': ['TEG'],
+    'FrontBack': ['TEG', 'Round', 'FrontBack'],
+}
+CONTEXT_MEASURES = ['Sc', 'GrossVP', 'NetVP', 'Stableford']
+
+
+@timed
+def build_context_table(ranked_df: pd.DataFrame, level: str) -> pd.DataFrame:
+    """
+    Precompute the context of every result at one level for every measure: the score, its rank within the
+    player's results and across all results (as 'rank / count' labels) and the matching percentiles.
+
+    Parameters:
+        ranked_df (pd.DataFrame): Ranked data at the level, from get_ranked_round_data, get_ranked_teg_data or
+            get_ranked_frontback_data.
+        level (str): A key of CONTEXT_LEVELS.
+
+    Returns:
+        pd.DataFrame: Indexed by the level's columns plus 'Measure', with rows in best-first order within each
+        index value. Percentiles are the share of results the result equals or beats (1.0 = best).
+    """
+    keys = CONTEXT_LEVELS[level]
+    all_count = len(ranked_df)
+    pl_count = ranked_df.groupby('Pl')['Pl'].transform('count')
+
+    frames = []
+    for measure in CONTEXT_MEASURES:
+        pl_rank = ranked_df[f'Rank_within_player_{measure}'].astype(int)
+        all_rank = ranked_df[f'Rank_within_all_{measure}'].astype(int)
+        frame = ranked_df[keys + ['TEGNum', 'Player']].copy()
+        frame['Measure'] = measure
+        frame['Value'] = ranked_df[measure].astype(int)
+        frame['Pl rank'] = pl_rank.astype(str) + ' / ' + pl_count.astype(str)
+        frame['All time rank'] = all_rank.astype(str) + ' / ' + str(all_count)
+        frame['Pl percentile'] = (pl_count - pl_rank + 1) / pl_count
+        frame['All time percentile'] = (all_count - all_rank + 1) / all_count
+        frame['_order'] = -frame['Value'] if measure == 'Stableford' else frame['Value']
+        frames.append(frame)
+
+    table = pd.concat(frames, ignore_index=True).sort_values(keys + ['Measure', '_order'], kind='stable')
+    return table.drop(columns='_order').set_index(keys + ['Measure'])
+
+
+@timed_cache_data(show_spinner=False)
+def get_context_table(level: str, data_version: str) -> pd.DataFrame:
+    """
+    Return build_context_table for a level, cached per data version.
+
+    Parameters:
+        level (str): 'Round', 'TEG' or 'FrontBack'.
+        data_version (str): The current data version, from get_data_version().
+    """
+    ranked = {'Round': get_ranked_round_data, 'TEG': get_ranked_teg_data, 'FrontBack': get_ranked_frontback_data}[level](data_version)
+    return build_context_table(ranked, level)
+
+
+def context_lookup(table: pd.DataFrame, measure: str, *key) -> pd.DataFrame:
+    """
+    Look up the context of one round, TEG or nine in a table from build_context_table.
+
+    Parameters:
+        table (pd.DataFrame): Context table for the level.
+        measure (str): One of CONTEXT_MEASURES.
+        *key: The level's identifying values, e.g. ('TEG 15', 4) for a round or ('TEG 15', 4, 'Front') for a nine.
+
+    Returns:
+        pd.DataFrame: Player, the measure, 'Pl rank', 'All time rank' and the two percentiles, best first.
+    """
+    rows = table.loc[(*key, measure), ['Player', 'Value', 'Pl rank', 'All time rank', 'Pl percentile', 'All time percentile']]
+    return rows.reset_index(drop=True).rename(columns={'Value': measure})
+
+
 def create_stat_section(title, value=None, df=None, divider=None):
 
 
@@ -960,6 +2513,7 @@ def define_score_types(gross_vp):
         'TBPs': (gross_vp > 2).sum()
     }
 
+@timed
 def apply_score_types(df, groupby_cols=['Player']):
     """
     Apply score type definitions to a DataFrame and return aggregated results.
@@ -985,10 +2539,11 @@ def apply_score_types(df, groupby_cols=['Player']):
     
     return grouped
 
-def score_type_stats(df=None):
+@timed_cache_data
+def score_type_stats(data_version: str, df=None):
 
     if df is None:
-        df = load_all_data(exclude_teg_50=True)
+        df = load_columns(('Player', 'GrossVP'), data_version, exclude_teg_50=True)
 
     # Apply score types grouped by Player
     stats = apply_score_types(df, groupby_cols=['Player'])
@@ -1011,10 +2566,11 @@ def score_type_stats(df=None):
     
     return stats
 
-def max_scoretype_per_round(df = None):
+@timed_cache_data
+def max_scoretype_per_round(data_version: str, df = None):
 
     if df is None:
-        df = load_all_data(exclude_teg_50=True)
+        df = load_columns(('Player', 'Round', 'TEG', 'GrossVP'), data_version, exclude_teg_50=True)
 
     # Apply score types with grouping by Player, Round, and TEG
     scores = apply_score_types(df, groupby_cols=['Player', 'Round', 'TEG'])
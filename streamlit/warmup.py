@@ -0,0 +1,148 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+import streamlit as st
+from utils import (
+    load_all_data,
+    get_complete_teg_data,
+    get_teg_data_inc_in_progress,
+    get_round_data,
+    get_9_data,
+    get_Pl_data,
+    get_ranked_teg_data,
+    get_ranked_round_data,
+    get_ranked_frontback_data,
+    get_teg_winners_data,
+    score_type_stats,
+    max_scoretype_per_round,
+    load_race_series,
+    load_course_hole_stats,
+    get_player_form,
+    get_head_to_head,
+    get_context_table,
+    get_data_version
+)
+from cache_inspector import log_cache_report
+
+# Configure Logging
+logger = logging.getLogger(__name__)
+
+# Constants
+WARMUP_WORKERS = 8
+
+# Registered warm-up tasks by stage. Every task in a stage runs concurrently; stages run in order, so the
+# base data a stage depends on is already cached when it starts.
+_WARMUP_STAGES: List[Dict[str, Callable[[], Any]]] = [{}, {}]
+
+_last_report: Optional[pd.DataFrame] = None
+_last_completed: Optional[datetime] = None
+_warmup_lock = threading.Lock()
+
+
+def register_warmup(name: str, func: Callable[[], Any], stage: int = 1) -> None:
+    """
+    Register a cached derived dataset to build during warm-up.
+
+    Parameters:
+        name (str): Name shown in the timing report.
+        func (Callable): Function taking no arguments that fills the cache, typically an st.cache_data getter.
+        stage (int): 0 for base data the other tasks load, 1 (default) for derived datasets.
+    """
+    while len(_WARMUP_STAGES) <= stage:
+        _WARMUP_STAGES.append({})
+    _WARMUP_STAGES[stage][name] = func
+
+
+# Base data
+# The filtered variants are taken from the same base frame, so loading it once covers them all
+register_warmup('All data', load_all_data, stage=0)
+
+# Derived datasets
+register_warmup('TEG data', get_complete_teg_data)
+register_warmup('TEG data inc. in progress', get_teg_data_inc_in_progress)
+register_warmup('Round data', get_round_data)
+register_warmup('9-hole data', get_9_data)
+register_warmup('Player data', get_Pl_data)
+register_warmup('Ranked TEG data', lambda: get_ranked_teg_data(get_data_version()))
+register_warmup('Ranked round data', lambda: get_ranked_round_data(get_data_version()))
+register_warmup('Ranked 9-hole data', lambda: get_ranked_frontback_data(get_data_version()))
+register_warmup('TEG winners', lambda: get_teg_winners_data(get_data_version()))
+register_warmup('Score type stats', lambda: score_type_stats(get_data_version()))
+register_warmup('Score types per round', lambda: max_scoretype_per_round(get_data_version()))
+register_warmup('Race series', lambda: load_race_series(get_data_version()))
+register_warmup('Course hole stats', lambda: load_course_hole_stats(get_data_version()))
+register_warmup('Player form', lambda: get_player_form(get_data_version()))
+register_warmup('Head to head', lambda: get_head_to_head(get_data_version()))
+register_warmup('Round context', lambda: get_context_table('Round', get_data_version()))
+register_warmup('TEG context', lambda: get_context_table('TEG', get_data_version()))
+register_warmup('9-hole context', lambda: get_context_table('FrontBack', get_data_version()))
+
+
+def _timed(name: str, func: Callable[[], Any], stage: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    error = None
+    try:
+        func()
+    except Exception as e:
+        error = str(e)
+        logger.error(f"Warm-up of '{name}' failed: {e}")
+    return {'Stage': stage, 'Dataset': name, 'Seconds': time.perf_counter() - start, 'Error': error}
+
+
+def run_warmup(max_workers: int = WARMUP_WORKERS) -> pd.DataFrame:
+    """
+    Build every registered dataset, running each stage's tasks concurrently in a thread pool.
+
+    Streamlit's cache lets only one thread compute a given entry, so a page that asks for a dataset while it
+    is being warmed waits for the warm-up rather than computing it again.
+
+    Parameters:
+        max_workers (int): Size of the thread pool.
+
+    Returns:
+        pd.DataFrame: One row per dataset with its stage, build time in seconds and any error. The total
+        wall-clock time is in report.attrs['elapsed'].
+    """
+    global _last_report, _last_completed
+
+    with _warmup_lock:
+        logger.info("Cache warm-up started.")
+        start = time.perf_counter()
+        rows = []
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='cache-warmup') as executor:
+            for stage, tasks in enumerate(_WARMUP_STAGES):
+                futures = [executor.submit(_timed, name, func, stage) for name, func in tasks.items()]
+                rows.extend(future.result() for future in futures)
+
+        report = pd.DataFrame(rows, columns=['Stage', 'Dataset', 'Seconds', 'Error'])
+        report.attrs['elapsed'] = time.perf_counter() - start
+        _last_report = report
+        _last_completed = datetime.now()
+
+    failed = report['Error'].notna().sum()
+    logger.info(f"Cache warm-up finished in {report.attrs['elapsed']:.2f}s: {len(report)} datasets, {failed} failed.")
+    log_cache_report()
+    return report
+
+
+def last_warmup() -> tuple:
+    """
+    Return the report of the most recent warm-up and when it finished, or (None, None) if none has run.
+    """
+    return _last_report, _last_completed
+
+
+@st.cache_resource(show_spinner=False)
+def warm_up_on_start() -> threading.Thread:
+    """
+    Start a warm-up in a background thread the first time any page is loaded on this server process. Called
+    by timing.start_run at the top of every page.
+    """
+    thread = threading.Thread(target=run_warmup, name='cache-warmup', daemon=True)
+    thread.start()
+    return thread